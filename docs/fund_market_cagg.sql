@@ -0,0 +1,62 @@
+-- 由日线聚合周线、月线的连续聚合（需要 TimescaleDB 2.8+，支持带时区与按月分桶）
+-- 创建后在 .env 中设置 USE_CONTINUOUS_AGGREGATES=true，DAO 会把 time_frame='1w'/'1M' 的查询路由到这里
+CREATE MATERIALIZED VIEW "public"."fund_market_1w"
+WITH (timescaledb.continuous) AS
+SELECT
+  time_bucket(INTERVAL '1 week', "time", 'Asia/Shanghai') AS "time",
+  "symbol",
+  first("open", "time") AS "open",
+  max("high") AS "high",
+  min("low") AS "low",
+  last("close", "time") AS "close",
+  first("pre_close", "time") AS "pre_close",
+  sum("vol") AS "vol",
+  sum("amount") AS "amount"
+FROM "public"."fund_market"
+WHERE "time_frame" = '1d'
+GROUP BY time_bucket(INTERVAL '1 week', "time", 'Asia/Shanghai'), "symbol"
+WITH NO DATA
+;
+
+CREATE MATERIALIZED VIEW "public"."fund_market_1mo"
+WITH (timescaledb.continuous) AS
+SELECT
+  time_bucket(INTERVAL '1 month', "time", 'Asia/Shanghai') AS "time",
+  "symbol",
+  first("open", "time") AS "open",
+  max("high") AS "high",
+  min("low") AS "low",
+  last("close", "time") AS "close",
+  first("pre_close", "time") AS "pre_close",
+  sum("vol") AS "vol",
+  sum("amount") AS "amount"
+FROM "public"."fund_market"
+WHERE "time_frame" = '1d'
+GROUP BY time_bucket(INTERVAL '1 month', "time", 'Asia/Shanghai'), "symbol"
+WITH NO DATA
+;
+
+ALTER MATERIALIZED VIEW "public"."fund_market_1w" OWNER TO "root";
+ALTER MATERIALIZED VIEW "public"."fund_market_1mo" OWNER TO "root";
+
+-- 未物化的最新桶实时从日线计算，当周/当月的 K 线也能查到
+ALTER MATERIALIZED VIEW "public"."fund_market_1w" SET (timescaledb.materialized_only = false);
+ALTER MATERIALIZED VIEW "public"."fund_market_1mo" SET (timescaledb.materialized_only = false);
+
+CREATE INDEX "fund_market_1w_symbol_time_idx" ON "public"."fund_market_1w" ("symbol", "time" DESC);
+CREATE INDEX "fund_market_1mo_symbol_time_idx" ON "public"."fund_market_1mo" ("symbol", "time" DESC);
+
+-- 每天刷新最近的桶，历史修正需手动 CALL refresh_continuous_aggregate(...)
+SELECT add_continuous_aggregate_policy('fund_market_1w',
+  start_offset => INTERVAL '1 month',
+  end_offset => INTERVAL '1 day',
+  schedule_interval => INTERVAL '1 day');
+
+SELECT add_continuous_aggregate_policy('fund_market_1mo',
+  start_offset => INTERVAL '3 months',
+  end_offset => INTERVAL '1 day',
+  schedule_interval => INTERVAL '1 day');
+
+-- 首次全量物化
+CALL refresh_continuous_aggregate('fund_market_1w', NULL, NULL);
+CALL refresh_continuous_aggregate('fund_market_1mo', NULL, NULL);
@@ -0,0 +1,22 @@
+-- 每个 (symbol, time_frame) 的行情覆盖范围，用于在加载行情前筛选可用的基金
+CREATE MATERIALIZED VIEW "public"."fund_market_coverage" AS
+SELECT
+  "symbol",
+  "time_frame",
+  min("time") AS "first_time",
+  max("time") AS "last_time",
+  count(*) AS "bar_count"
+FROM "public"."fund_market"
+GROUP BY "symbol", "time_frame"
+;
+
+ALTER MATERIALIZED VIEW "public"."fund_market_coverage"
+  OWNER TO "root";
+
+-- REFRESH ... CONCURRENTLY 需要唯一索引
+CREATE UNIQUE INDEX "uni_coverage_symbol_time_frame" ON "public"."fund_market_coverage" USING btree (
+  "symbol" COLLATE "pg_catalog"."default" "pg_catalog"."text_ops" ASC NULLS LAST,
+  "time_frame" COLLATE "pg_catalog"."default" "pg_catalog"."text_ops" ASC NULLS LAST
+);
+
+COMMENT ON MATERIALIZED VIEW "public"."fund_market_coverage" IS '行情覆盖范围，每日行情入库后执行 REFRESH MATERIALIZED VIEW CONCURRENTLY 刷新';
@@ -0,0 +1,26 @@
+-- 行情入库后通过 NOTIFY 推送 symbol 与 time，实时行情中心（LiveDataHub push=True）收到后只查询这一行
+-- payload 示例：{"symbol": "510300", "time": "2024-01-08T00:00:00+08:00", "time_frame": "1d"}
+CREATE OR REPLACE FUNCTION "public"."notify_fund_market"()
+RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('fund_market_insert', json_build_object(
+    'symbol', NEW."symbol",
+    'time', NEW."time",
+    -- 兼容没有 time_frame 列的表
+    'time_frame', to_jsonb(NEW) ->> 'time_frame'
+  )::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER FUNCTION "public"."notify_fund_market"()
+  OWNER TO "root";
+
+-- AFTER 触发器在事务提交时才投递通知，监听方查询时这一行已经可见
+-- 只通知 INSERT：实时行情中心不会重新分发已收到的 K 线，UPDATE 的通知只会多一次无用的查询
+DROP TRIGGER IF EXISTS "fund_market_notify" ON "public"."fund_market";
+CREATE TRIGGER "fund_market_notify" AFTER INSERT ON "public"."fund_market"
+FOR EACH ROW
+EXECUTE PROCEDURE "public"."notify_fund_market"();
+
+COMMENT ON FUNCTION "public"."notify_fund_market"() IS '行情写入后 NOTIFY fund_market_insert，供实时回测推送模式使用';
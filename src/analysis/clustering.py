@@ -0,0 +1,73 @@
+"""
+相关性聚类
+
+把相关矩阵按阈值转成边，再用向量化的并查集（挂接 + 指针跳跃）求连通分量，
+策略调仓与离线相关性分析共用。
+"""
+import numpy as np
+
+
+def threshold_edges(corr: np.ndarray, threshold: float, mask: np.ndarray = None, block_size: int = 2048):
+    """
+    返回上三角中 corr > threshold 的边 (rows, cols)
+    mask 为可选的同形布尔矩阵，只有为 True 的位置才算边（如重叠样本数足够）
+    按行分块处理，避免为大矩阵生成完整的布尔临时数组
+    """
+    n = len(corr)
+    rows, cols = [], []
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        block = corr[start:end] > threshold
+        if mask is not None:
+            block &= mask[start:end]
+        # 只保留 j > i 的上三角部分
+        block &= np.arange(n)[None, :] > np.arange(start, end)[:, None]
+        r, c = np.nonzero(block)
+        rows.append(r + start)
+        cols.append(c)
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(rows).astype(np.int64), np.concatenate(cols).astype(np.int64)
+
+
+def connected_components(n: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    无向图的连通分量标签，长度 n 的 int 数组
+    标签按分量中最小节点的先后编号，即第一个节点所在分量为 0
+    """
+    parent = np.arange(n, dtype=np.int64)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    while rows.size:
+        pr, pc = parent[rows], parent[cols]
+        lo, hi = np.minimum(pr, pc), np.maximum(pr, pc)
+        changed = lo != hi
+        if not changed.any():
+            break
+        # 挂接：把较大的根指向较小的根
+        np.minimum.at(parent, hi[changed], lo[changed])
+        # 指针跳跃：压缩到根
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+        # 已经在同一分量内的边不再参与下一轮
+        rows, cols = rows[changed], cols[changed]
+    _, labels = np.unique(parent, return_inverse=True)
+    return labels.astype(np.int64)
+
+
+def correlation_labels(corr: np.ndarray, threshold: float, mask: np.ndarray = None) -> np.ndarray:
+    """相关系数大于 threshold 的标的互相连通，返回每个标的所在组的标签。"""
+    rows, cols = threshold_edges(corr, threshold, mask)
+    return connected_components(len(corr), rows, cols)
+
+
+def groups_from_labels(labels: np.ndarray) -> list:
+    """把标签数组拆成每组的下标数组，按标签顺序返回。"""
+    if len(labels) == 0:
+        return []
+    order = np.argsort(labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    return np.split(order, bounds)
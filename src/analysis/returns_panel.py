@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class ReturnsPanel:
+    """
+    多标的收益率面板：symbols × window 的环形缓冲区
+    每根 K 线只写入有新数据的标的，窗口收益、区间涨幅与有效性掩码都以数组运算得到
+    """
+
+    def __init__(self, size: int, window: int):
+        self.size = size
+        self.window = window
+        self._returns = np.full((size, window), np.nan)
+        self._closes = np.full((size, window), np.nan)
+        self._heads = np.zeros(size, dtype=np.int64)
+        self._counts = np.zeros(size, dtype=np.int64)
+
+    def update(self, idx: np.ndarray, closes: np.ndarray, returns: np.ndarray) -> None:
+        """写入 idx 对应标的的最新收盘价与收益率，idx 中不能有重复。"""
+        idx = np.asarray(idx, dtype=np.int64)
+        if idx.size == 0:
+            return
+        heads = self._heads[idx]
+        self._closes[idx, heads] = closes
+        self._returns[idx, heads] = returns
+        self._heads[idx] = (heads + 1) % self.window
+        self._counts[idx] += 1
+
+    def counts(self) -> np.ndarray:
+        return self._counts.copy()
+
+    def valid(self) -> np.ndarray:
+        """窗口已填满且窗口内没有 NaN 的标的。"""
+        full = self._counts >= self.window
+        return full & ~np.isnan(self._returns).any(axis=1) & ~np.isnan(self._closes).any(axis=1)
+
+    def window_returns(self, idx: np.ndarray = None) -> np.ndarray:
+        """按时间先后排列的窗口收益率，形状 len(idx) × window。"""
+        return self._ordered(self._returns, idx)
+
+    def window_closes(self, idx: np.ndarray = None) -> np.ndarray:
+        return self._ordered(self._closes, idx)
+
+    def latest_returns(self) -> np.ndarray:
+        """每个标的最近写入的收益率，尚无数据的为 NaN。"""
+        last = (self._heads - 1) % self.window
+        latest = self._returns[np.arange(self.size), last]
+        return np.where(self._counts > 0, latest, np.nan)
+
+    def total_return(self, idx: np.ndarray = None) -> np.ndarray:
+        """窗口首尾收盘价的涨幅（百分比），窗口未满或首个收盘价为 0 时为 NaN。"""
+        closes = self.window_closes(idx)
+        first, last = closes[:, 0], closes[:, -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total = (last / first - 1.0) * 100.0
+        counts = self._counts if idx is None else self._counts[idx]
+        return np.where((counts >= self.window) & (first != 0), total, np.nan)
+
+    def _ordered(self, buffer: np.ndarray, idx: np.ndarray = None) -> np.ndarray:
+        if idx is None:
+            idx = np.arange(self.size)
+        order = (self._heads[idx, None] + np.arange(self.window)) % self.window
+        return np.take_along_axis(buffer[idx], order, axis=1)
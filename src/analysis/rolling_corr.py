@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class RollingCorrelation:
+    """
+    滚动窗口相关系数：维护窗口内的和与交叉乘积和，每根 K 线以 O(n²) 增量更新，
+    取相关矩阵时不再对 n × window 的矩阵重新做 np.corrcoef。
+
+    - dtype 可选 np.float32，交叉乘积矩阵内存减半
+    - block_size 控制外积更新与重算时每次处理的行数，限制临时数组大小
+    - 每 recompute_every 次更新从窗口数据重算一次交叉乘积，消除累计的浮点误差
+    """
+
+    def __init__(self, size: int, window: int, dtype=np.float64, block_size: int = 1024, recompute_every: int = None):
+        self.size = size
+        self.window = window
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        self.recompute_every = recompute_every or window * 10
+        self._values = np.zeros((window, size), dtype=self.dtype)
+        self._missing = np.ones((window, size), dtype=bool)
+        self._sums = np.zeros(size, dtype=self.dtype)
+        self._cross = np.zeros((size, size), dtype=self.dtype)
+        self._missing_counts = np.full(size, window, dtype=np.int64)
+        self._head = 0
+        self._updates = 0
+
+    def update(self, values: np.ndarray) -> None:
+        """追加一列最新收益率（长度 size），NaN 表示该标的本根 K 线无数据。"""
+        values = np.asarray(values, dtype=self.dtype)
+        missing = np.isnan(values)
+        new = np.where(missing, 0, values).astype(self.dtype, copy=False)
+        old = self._values[self._head]
+
+        self._sums += new - old
+        # 秩 2 更新 C += new·newᵀ - old·oldᵀ，写成 (n×2)·(2×n) 的矩阵乘法交给 BLAS
+        left = np.stack([new, old], axis=1)
+        right = np.stack([new, -old], axis=0)
+        for start in range(0, self.size, self.block_size):
+            end = start + self.block_size
+            self._cross[start:end] += left[start:end] @ right
+
+        self._missing_counts += missing.astype(np.int64) - self._missing[self._head]
+        self._values[self._head] = new
+        self._missing[self._head] = missing
+        self._head = (self._head + 1) % self.window
+        self._updates += 1
+        if self._updates % self.recompute_every == 0:
+            self.recompute()
+
+    def recompute(self) -> None:
+        """从窗口数据分块重算和与交叉乘积。"""
+        self._sums = self._values.sum(axis=0, dtype=self.dtype)
+        for start in range(0, self.size, self.block_size):
+            end = start + self.block_size
+            self._cross[start:end] = self._values[:, start:end].T @ self._values
+
+    def valid(self) -> np.ndarray:
+        """窗口内每根 K 线都有数据的标的。"""
+        return self._missing_counts == 0
+
+    def corr(self, idx: np.ndarray = None) -> np.ndarray:
+        """idx 对应标的的相关矩阵，与 np.corrcoef(窗口数据[:, idx].T) 一致；方差为 0 时为 NaN。"""
+        if idx is None:
+            cov = self._cross.copy()
+            sums = self._sums
+        else:
+            idx = np.asarray(idx, dtype=np.int64)
+            cov = self._cross[np.ix_(idx, idx)]
+            sums = self._sums[idx]
+        means = sums / self.window
+        for start in range(0, len(cov), self.block_size):
+            end = start + self.block_size
+            cov[start:end] -= sums[start:end, None] * means[None, :]
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv = 1.0 / std
+            for start in range(0, len(cov), self.block_size):
+                end = start + self.block_size
+                cov[start:end] *= inv[start:end, None] * inv[None, :]
+        np.clip(cov, -1, 1, out=cov)
+        return cov
+
+    def threshold(self, idx: np.ndarray, corr_threshold: float) -> np.ndarray:
+        """corr > corr_threshold 的邻接矩阵（不含对角线）。"""
+        adj = self.corr(idx) > corr_threshold
+        np.fill_diagonal(adj, False)
+        return adj
@@ -0,0 +1,185 @@
+"""
+向量化回测（快速筛选）
+
+对多条序列（标的 × 参数组合）一次性计算信号、持仓、次日开盘价成交、FundCommission 费用与资金曲线，
+结果与 Cerebro 逐根 K 线回测一致（见 test/vector_backtest_test.py），
+用于在大量参数中先筛出候选，再用完整的事件驱动回测验证。
+
+撮合规则与 backtrader 默认 broker 相同：
+- 第 t 根 K 线产生信号，按 t 的收盘价提交检查，在 t + 1 的开盘价成交；最后一根的信号不成交
+- 成交后现金为负则拒单（Margin），不建仓
+- 多头全仓进出：买入 int(现金 × cash_fraction / 收盘价) 份，卖出时全部平仓
+"""
+import numpy as np
+import pandas as pd
+
+from commission.fund_commission import FundCommission
+from indicator.panel_indicators import left_aligned_panel, sma
+
+COMMISSION = FundCommission.params.commission
+MIN_COMMISSION = FundCommission.params.min_commission
+
+
+def commission(value: np.ndarray, rate: float = COMMISSION, min_commission: float = MIN_COMMISSION) -> np.ndarray:
+    """FundCommission 的佣金：成交金额 × 费率，不低于最低佣金。"""
+    return np.maximum(np.abs(value) * rate, min_commission)
+
+
+def crossover(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """
+    对应 bt.indicators.CrossOver：上穿为 1，下穿为 -1，否则为 0
+    与 backtrader 一样以最近一个非零差值判断前一根的相对位置，两线相等的 K 线不算交叉
+    """
+    diff = np.asarray(fast, dtype=float) - np.asarray(slow, dtype=float)
+    valid = ~np.isnan(diff)
+    # 首个有效值作为初值（即使为 0），之后遇到 0 沿用上一个非零差值
+    first = valid & ~np.roll(valid, 1, axis=-1)
+    first[..., 0] = valid[..., 0]
+    keep = valid & ((diff != 0) | first)
+    idx = np.where(keep, np.arange(diff.shape[-1]), -1)
+    idx = np.maximum.accumulate(idx, axis=-1)
+    nzd = np.where(idx >= 0, np.take_along_axis(diff, np.maximum(idx, 0), axis=-1), np.nan)
+
+    prev = np.full(diff.shape, np.nan)
+    prev[..., 1:] = nzd[..., :-1]
+    with np.errstate(invalid='ignore'):
+        up = (prev < 0) & (diff > 0)
+        down = (prev > 0) & (diff < 0)
+    return up.astype(np.int8) - down.astype(np.int8)
+
+
+def sma_cross_signals(close: np.ndarray, short_period: int, long_period: int) -> np.ndarray:
+    """SimpleMovingAverageStrategy 的信号：短期均线上穿长期均线为 1，下穿为 -1。"""
+    return crossover(sma(close, short_period), sma(close, long_period))
+
+
+def run_long_only(open_: np.ndarray, close: np.ndarray, signals: np.ndarray, cash: float = 100000.0,
+                  cash_fraction: float = 0.98, rate: float = COMMISSION, min_commission: float = MIN_COMMISSION,
+                  lengths: np.ndarray = None) -> dict:
+    """
+    open_/close/signals 形状为 (序列数, K 线数)，每条序列是独立账户；lengths 为每条序列的有效长度（左对齐面板）
+    返回 value/cash/position（与输入同形）、trades（完成的买入次数）与 final_value
+    """
+    open_ = np.atleast_2d(np.asarray(open_, dtype=float))
+    close = np.atleast_2d(np.asarray(close, dtype=float))
+    signals = np.atleast_2d(signals)
+    n, length = close.shape
+    lengths = np.full(n, length) if lengths is None else np.asarray(lengths, dtype=np.int64)
+
+    buys, sells = _pair_signals(signals, lengths)
+    rows = np.arange(n)
+    cash_now = np.full(n, float(cash))
+    cash_delta = np.zeros((n, length + 1))
+    pos_delta = np.zeros((n, length + 1))
+    trades = np.zeros(n, dtype=np.int64)
+
+    # 现金随每笔交易复利变化，只能按交易先后递推；每一步对所有序列同时计算
+    for k in range(buys.shape[1]):
+        b, s = buys[:, k], sells[:, k]
+        active = b >= 0
+        if not active.any():
+            break
+        bi = np.where(active, b, 0)
+        price = close[rows, bi]
+        size = np.where(active, np.floor(cash_now * cash_fraction / price), 0.0)
+        # 提交检查按信号 K 线的收盘价，成交按下一根开盘价，任一不足都会拒单
+        check = cash_now - size * price - commission(size * price, rate, min_commission)
+        fill_price = open_[rows, bi + 1]
+        cost = size * fill_price + commission(size * fill_price, rate, min_commission)
+        filled = active & (size > 0) & (check >= 0) & (cash_now - cost >= 0)
+
+        cash_now = np.where(filled, cash_now - cost, cash_now)
+        np.add.at(cash_delta, (rows[filled], bi[filled] + 1), -cost[filled])
+        np.add.at(pos_delta, (rows[filled], bi[filled] + 1), size[filled])
+        trades += filled
+
+        closed = filled & (s >= 0)
+        si = np.where(closed, s, 0)
+        exit_price = open_[rows, si + 1]
+        proceeds = size * exit_price - commission(size * exit_price, rate, min_commission)
+        cash_now = np.where(closed, cash_now + proceeds, cash_now)
+        np.add.at(cash_delta, (rows[closed], si[closed] + 1), proceeds[closed])
+        np.add.at(pos_delta, (rows[closed], si[closed] + 1), -size[closed])
+
+    cash_line = cash + np.cumsum(cash_delta[:, :length], axis=1)
+    position = np.cumsum(pos_delta[:, :length], axis=1)
+    value = cash_line + position * np.nan_to_num(close)
+    # 序列结束之后的净值保持不变
+    last = np.maximum(lengths - 1, 0)
+    beyond = np.arange(length)[None, :] > last[:, None]
+    value = np.where(beyond, value[rows, last][:, None], value)
+    return {
+        'value': value,
+        'cash': cash_line,
+        'position': position,
+        'trades': trades,
+        'final_value': value[rows, last],
+    }
+
+
+def _pair_signals(signals: np.ndarray, lengths: np.ndarray) -> tuple:
+    """
+    把信号整理成 (买入 K 线, 对应的卖出 K 线) 对，形状 (序列数, 最多对数)，缺位为 -1
+    只考虑下一根 K 线仍在序列内的信号；空仓时的卖出信号和持仓时的买入信号被忽略
+    """
+    n, length = signals.shape
+    tradable = np.arange(length)[None, :] < (lengths[:, None] - 1)
+    buy_mask = (signals > 0) & tradable
+    sell_mask = (signals < 0) & tradable
+
+    # 每个买入信号之后的第一个卖出信号
+    sell_idx = np.where(sell_mask, np.arange(length), length)
+    next_sell = np.minimum.accumulate(sell_idx[:, ::-1], axis=1)[:, ::-1]
+    next_sell = np.concatenate([next_sell[:, 1:], np.full((n, 1), length)], axis=1)
+
+    # 持仓期间的买入信号不算：只保留上一笔对应卖出之后的买入。交叉信号本身一买一卖交替，
+    # 所以只需去掉与前一个买入之间没有卖出的买入
+    sell_count = np.cumsum(sell_mask, axis=1)
+    rows, cols = np.nonzero(buy_mask)
+    counts = sell_count[rows, cols]
+    same_row = np.r_[False, rows[1:] == rows[:-1]]
+    prev_counts = np.r_[-1, counts[:-1]]
+    keep = ~(same_row & (prev_counts == counts))
+    rows, cols = rows[keep], cols[keep]
+
+    width = int(np.bincount(rows, minlength=n).max()) if len(rows) else 0
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    buys = np.full((n, width), -1, dtype=np.int64)
+    sells = np.full((n, width), -1, dtype=np.int64)
+    buys[rows, rank] = cols
+    s = next_sell[rows, cols]
+    sells[rows, rank] = np.where(s < length, s, -1)
+    return buys, sells
+
+
+def screen_sma(frames: dict, short_periods, long_periods, cash: float = 100000.0, **kwargs) -> pd.DataFrame:
+    """
+    对 frames（{symbol: 行情 DataFrame}）中的每个标的与每组 (short, long) 均线周期做向量化回测
+    返回每行一个 标的 × 参数 的结果表，按 total_return 降序
+    """
+    symbols = list(frames)
+    panel, _, _ = left_aligned_panel([frames[s] for s in symbols], ('open', 'close'))
+    lengths = np.array([len(frames[s]) for s in symbols], dtype=np.int64)
+    tables = []
+    for short_period in short_periods:
+        for long_period in long_periods:
+            if short_period >= long_period:
+                continue
+            signals = sma_cross_signals(panel['close'], short_period, long_period)
+            result = run_long_only(panel['open'], panel['close'], signals, cash=cash, lengths=lengths, **kwargs)
+            value = result['value']
+            drawdown = 1 - value / np.maximum.accumulate(value, axis=1)
+            tables.append(pd.DataFrame({
+                'symbol': symbols,
+                'short_period': short_period,
+                'long_period': long_period,
+                'final_value': result['final_value'],
+                'total_return': result['final_value'] / cash - 1,
+                'max_drawdown': drawdown.max(axis=1) * 100,
+                'trades': result['trades'],
+            }))
+    if not tables:
+        return pd.DataFrame(columns=['symbol', 'short_period', 'long_period', 'final_value',
+                                     'total_return', 'max_drawdown', 'trades'])
+    table = pd.concat(tables, ignore_index=True)
+    return table.sort_values('total_return', ascending=False, kind='stable').reset_index(drop=True)
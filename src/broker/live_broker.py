@@ -1,10 +1,32 @@
 import backtrader as bt
+from broker import order_journal
 
 class LiveBroker(bt.brokers.BackBroker):
+    params = (
+        ('journal', None),  # broker.order_journal.OrderJournal，后台线程写盘
+        ('verbose', False),  # 同时打印每个提交的订单（同步输出，订单多时很慢）
+    )
+
     def __init__(self, **kwargs):
         super(LiveBroker, self).__init__(**kwargs)
-    
-    def submit(self, order):
+
+    def submit(self, order, check=True):
         # 将订单发送到实盘交易所
-        print("summit order")
+        if self.p.verbose:
+            print(f"[LiveBroker] submit {'buy' if order.isbuy() else 'sell'} {order.data._name} size={order.size}")
         order.addinfo(real_order_id=1)
+        order.submit(self)
+        self.orders.append(order)
+        # 状态变化统一经过 notify：写日志并通知策略
+        self.notify(order)
+        return order
+
+    def notify(self, order):
+        if self.p.journal is not None:
+            self.p.journal.record(order_journal.order_event(order))
+        super(LiveBroker, self).notify(order)
+
+    def stop(self):
+        if self.p.journal is not None:
+            self.p.journal.flush()
+        super(LiveBroker, self).stop()
@@ -0,0 +1,150 @@
+"""
+订单与成交日志（write-behind）
+
+broker 在引擎线程中只把事件放进有界队列（put_nowait，不做任何 I/O），
+后台线程批量追加到 JSONL 文件，每批 flush + fsync。队列满时丢弃事件并计数，引擎线程永远不等待写盘。
+文件在构造时打开，路径不可写时错误直接抛给调用方。
+close() / flush() 等待队列写完，后台线程意外退出时不再等待；进程正常退出时由 atexit 兜底关闭。
+崩溃时最后一行可能只写了一半，replay 会跳过它。
+
+    journal = OrderJournal('orders.jsonl')
+    cerebro.broker = SimBroker(journal=journal)
+    ...
+    for event in order_journal.replay('orders.jsonl'): ...
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+import backtrader as bt
+
+# 停止后台线程的标记
+_STOP = object()
+# flush / close 检查后台线程是否存活的间隔（秒）
+_POLL = 0.1
+
+
+class OrderJournal:
+
+    def __init__(self, path: str, maxsize: int = 10000, batch_size: int = 500, fsync: bool = True):
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._closed = False
+        # 在调用方线程中打开，打不开时构造直接失败，而不是后台线程悄悄退出
+        self._file = open(path, 'a')
+        self._thread = threading.Thread(target=self._run, name='order-journal', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, event: dict) -> bool:
+        """放入队列，不阻塞；队列已满或已关闭时丢弃并返回 False。"""
+        if self._closed:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            if self.dropped == 0:
+                print(f"[OrderJournal] queue full, dropping events for {self.path}")
+            self.dropped += 1
+            return False
+
+    def flush(self) -> bool:
+        """等待已入队的事件全部写入文件；后台线程已退出、事件无法写完时返回 False。"""
+        done = self._queue.all_tasks_done
+        with done:
+            while self._queue.unfinished_tasks:
+                if not self._thread.is_alive():
+                    return False
+                done.wait(_POLL)
+        return True
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        # 队列满时等后台线程腾出位置，后台线程已退出时不再等待
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=_POLL)
+                break
+            except queue.Full:
+                continue
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        with self._file as f:
+            stop = False
+            while not stop:
+                batch = [self._queue.get()]
+                # 取出当前积压的事件，一次写入
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                events = [e for e in batch if e is not _STOP]
+                stop = len(events) < len(batch)
+                if events:
+                    try:
+                        f.write(''.join(json.dumps(e, separators=(',', ':'), default=str) + '\n' for e in events))
+                        f.flush()
+                        if self.fsync:
+                            os.fsync(f.fileno())
+                        self.written += len(events)
+                    except (OSError, TypeError, ValueError) as e:
+                        print(f"[OrderJournal] write failed: {e!r}")
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def order_event(order, event: str = None) -> dict:
+    """把订单当前状态转换为日志事件，event 默认为订单状态名。"""
+    data = order.data
+    try:
+        dt = bt.num2date(data.datetime[0]).isoformat() if len(data) else None
+    except IndexError:
+        dt = None
+    return {
+        'ts': time.time(),
+        'event': event or order.getstatusname(),
+        'ref': order.ref,
+        'data': data._name,
+        'dt': dt,
+        'side': 'buy' if order.isbuy() else 'sell',
+        'exectype': order.getordername(),
+        'size': order.size,
+        'price': order.price,
+        'executed_size': order.executed.size,
+        'executed_price': order.executed.price,
+        'comm': order.executed.comm,
+        'info': dict(order.info),
+    }
+
+
+def replay(path: str):
+    """按写入顺序返回日志中的事件，跳过崩溃时写了一半的最后一行。"""
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def last_events(path: str) -> dict:
+    """每个订单最后一条事件，{ref: event}，用于崩溃后查看哪些订单仍未结束。"""
+    return {event['ref']: event for event in replay(path)}
@@ -1,22 +1,51 @@
 
 import backtrader as bt
+from broker import order_journal
 
 class SimBroker(bt.brokers.BackBroker):
     """
-    Simulated Broker that behaves like BackBroker but logs orders 
-    and could be extended to persist state for "Paper Trading".
+    Simulated Broker that behaves like BackBroker but journals orders
+    and fills for "Paper Trading".
     """
+    params = (
+        ('journal', None), # broker.order_journal.OrderJournal; written by a background thread
+        ('verbose', False), # Also print every submitted order (synchronous, slow with many orders)
+    )
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self._before_next = []
+
+    def call_before_next(self, fn):
+        # fn() runs before every matching step until it returns True;
+        # broker.snapshot uses it to resubmit restored orders before the first bar is matched
+        self._before_next.append(fn)
+
+    def next(self):
+        self._before_next = [fn for fn in self._before_next if not fn()]
+        super().next()
+
+    def submit(self, order, check=True):
+        # Open orders and positions survive a restart through the
+        # broker.snapshot.LiveSnapshot analyzer; the journal keeps the order history.
+        if self.p.verbose:
+            action = 'BUY' if order.isbuy() else 'SELL'
+            print(f"[SimBroker] Order Submitted: {action} {order.data._name} Size: {order.size} Price: {order.price or 'Market'}")
+
+        return super().submit(order, check=check)
+
+    def notify(self, order):
+        # Every status change (Submitted, Accepted, Partial, Completed, Canceled...) passes here;
+        # record() only enqueues, the engine thread never waits on disk
+        if self.p.journal is not None:
+            self.p.journal.record(order_journal.order_event(order))
+        super().notify(order)
+
+    def stop(self):
+        # Flush on shutdown so the journal is complete when cerebro.run returns
+        if self.p.journal is not None:
+            self.p.journal.flush()
+        super().stop()
 
-    def submit(self, order):
-        # In a real PaperTrading scenario, we would save this order to DB
-        # so we can recover it if the process restarts.
-        # For now, we just print it.
-        action = 'BUY' if order.isbuy() else 'SELL'
-        print(f"[SimBroker] Order Submitted: {action} {order.data._name} Size: {order.size} Price: {order.price or 'Market'}")
-        
-        return super().submit(order)
-        
     # We can override other methods to simulate slippage/commission more specifically if needed
     # but BackBroker params usually handle that.
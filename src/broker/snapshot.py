@@ -0,0 +1,199 @@
+"""
+实时运行的快照与恢复
+
+LiveSnapshot 分析器在每根 K 线（或每隔 interval 秒）把 broker 现金、持仓、未成交订单、
+策略状态与各 feed 的 last_dt 写入本地 JSON（先写临时文件再原子替换）。重启时：
+
+    state = snapshot.load_snapshot(path)
+    data = FundLiveData(symbol=s, hub=hub, resume=snapshot.feed_resume(state, s))
+    cerebro.addanalyzer(snapshot.LiveSnapshot, path=path)
+
+feed 只补取 last_dt 之后的 K 线，不再回放 lookback 历史；分析器在策略启动时恢复现金、持仓与策略状态。
+live feed 在启动时还没有 K 线，无法创建订单，未成交订单等订单的 feed 有了 K 线后再重新提交：
+broker 提供 call_before_next（如 broker.sim_broker.SimBroker）时在恢复后第一根 K 线撮合之前提交，
+与不重启时一样在这根 K 线上成交；其它 broker 在第一根 K 线的策略逻辑之后提交，晚一根 K 线撮合。
+策略定义 get_state() / set_state(state) 时一并保存与恢复，返回值需可 JSON 序列化。
+指标不在快照中，依赖指标预热的策略应把需要的状态放进 get_state。
+"""
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import backtrader as bt
+
+VERSION = 1
+
+
+def write_json_atomic(path: str, obj) -> None:
+    """写入临时文件并刷盘后替换，崩溃时旧快照保持完整。"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: str) -> dict:
+    """读取快照，文件不存在或版本不符时返回 None。"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    return state if state.get('version') == VERSION else None
+
+
+def feed_resume(state: dict, name: str):
+    """快照中 name 对应 feed 的 last_dt，没有时返回 None（按 lookback 加载历史）。"""
+    if not state:
+        return None
+    return state.get('feeds', {}).get(name)
+
+
+def broker_state(broker, datas) -> dict:
+    positions = {}
+    for data in datas:
+        position = broker.getposition(data)
+        if position.size:
+            positions[data._name] = [position.size, position.price]
+    orders = []
+    seen = set()
+    # checksubmit 时新订单先在 submitted 中，下一根 K 线才进入 pending
+    for order in list(getattr(broker, 'submitted', ())) + list(broker.pending):
+        if order.ref in seen or not order.alive():
+            continue
+        seen.add(order.ref)
+        orders.append(order_state(order))
+    return {'cash': broker.getcash(), 'positions': positions, 'orders': orders}
+
+
+def order_state(order) -> dict:
+    trailing = order.exectype in (bt.Order.StopTrail, bt.Order.StopTrailLimit)
+    return {
+        'data': order.data._name,
+        'side': 'buy' if order.isbuy() else 'sell',
+        # 部分成交的订单只恢复剩余数量
+        'size': abs(order.executed.remsize) if order.executed.size else abs(order.size),
+        'exectype': order.getordername(),
+        # 跟踪止损的价格随行情移动，按 trailamount/trailpercent 重新计算
+        'price': None if trailing else order.created.price,
+        'plimit': None if trailing else order.created.pricelimit,
+        'valid': order.valid or None,
+        'trailamount': order.trailamount,
+        'trailpercent': order.trailpercent,
+        # broker 只撮合创建时间之后的 K 线，恢复时沿用原来的创建时间与收盘价
+        'created': order.created.dt,
+        'pclose': order.created.pclose,
+    }
+
+
+def restore_broker(broker, state: dict, data_map: dict) -> None:
+    """恢复现金与持仓，须在 broker.start() 之后调用。"""
+    broker.set_cash(state['cash'])
+    for name, (size, price) in state['positions'].items():
+        data = data_map.get(name)
+        if data is None:
+            print(f"Snapshot position for unknown data {name} ignored")
+            continue
+        broker.positions[data] = bt.Position(size=size, price=price)
+
+
+def submit_orders(strategy, orders: list, data_map: dict) -> list:
+    result = []
+    for state in orders:
+        data = data_map.get(state['data'])
+        if data is None:
+            print(f"Snapshot order for unknown data {state['data']} ignored")
+            continue
+        submit = strategy.buy if state['side'] == 'buy' else strategy.sell
+        order = submit(
+            data=data,
+            size=state['size'],
+            exectype=getattr(bt.Order, state['exectype']),
+            price=state['price'],
+            plimit=state['plimit'],
+            valid=state['valid'],
+            trailamount=state['trailamount'],
+            trailpercent=state['trailpercent'],
+        )
+        order.created.dt = state['created']
+        order.created.pclose = state['pclose']
+        result.append(order)
+    return result
+
+
+def feed_last_dt(data) -> str:
+    """feed 最近一根 K 线的时间（ISO 格式）；FundLiveData 使用行情原始的 time，其它 feed 按 UTC。"""
+    last_dt = getattr(data, 'last_dt', None)
+    if last_dt is None:
+        if not len(data):
+            return None
+        last_dt = bt.num2date(data.datetime[0]).replace(tzinfo=timezone.utc)
+    return last_dt.isoformat() if hasattr(last_dt, 'isoformat') else str(last_dt)
+
+
+class LiveSnapshot(bt.Analyzer):
+    params = (
+        ('path', 'live_snapshot.json'),
+        ('interval', 0),  # 两次保存的最短间隔（秒），0 表示每根 K 线都保存
+        ('restore', True),
+    )
+
+    def start(self):
+        self.data_map = {d._name: d for d in self.strategy.datas}
+        self.restored = load_snapshot(self.p.path) if self.p.restore else None
+        self._orders = []
+        self._saved = 0.0
+        if self.restored:
+            restore_broker(self.strategy.broker, self.restored['broker'], self.data_map)
+            if self.restored.get('strategy') is not None and hasattr(self.strategy, 'set_state'):
+                self.strategy.set_state(self.restored['strategy'])
+            self._orders = self.restored['broker']['orders']
+            broker = self.strategy.broker
+            if self._orders and hasattr(broker, 'call_before_next'):
+                broker.call_before_next(self._resubmit)
+
+    def _resubmit(self) -> bool:
+        """订单的 feed 都有 K 线后提交恢复的订单，只提交一次；返回是否已提交。"""
+        if not self._orders:
+            return True
+        datas = [self.data_map[o['data']] for o in self._orders if o['data'] in self.data_map]
+        # 实时循环中没有新 K 线时 broker.next 也会被调用
+        if not all(len(d) for d in datas):
+            return False
+        submit_orders(self.strategy, self._orders, self.data_map)
+        self._orders = []
+        return True
+
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        # broker 没有 call_before_next 时在这里提交，下一根 K 线撮合
+        self._resubmit()
+        now = time.monotonic()
+        if now - self._saved >= self.p.interval:
+            self.save()
+            self._saved = now
+
+    def stop(self):
+        self.save()
+
+    def save(self) -> None:
+        strategy = self.strategy
+        feeds = {d._name: feed_last_dt(d) for d in strategy.datas}
+        state = {
+            'version': VERSION,
+            'saved_at': datetime.now(timezone.utc).isoformat(),
+            'broker': broker_state(strategy.broker, strategy.datas),
+            'strategy': strategy.get_state() if hasattr(strategy, 'get_state') else None,
+            'feeds': {name: dt for name, dt in feeds.items() if dt is not None},
+        }
+        if self._orders:
+            # 还没重新提交的订单保持在快照中
+            state['broker']['orders'] = self._orders + state['broker']['orders']
+        write_json_atomic(self.p.path, state)
+
+    def get_analysis(self):
+        return {'path': self.p.path, 'restored': self.restored is not None}
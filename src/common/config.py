@@ -1,4 +1,24 @@
 from dotenv import load_dotenv
 import os
 load_dotenv()
-DB_URL = os.getenv('DB')
\ No newline at end of file
+DB_URL = os.getenv('DB')
+# 数据库会话时区，本地缓存按此时区解释不带时区的日期参数
+DB_TIMEZONE = os.getenv('DB_TIMEZONE', 'Asia/Shanghai')
+# 本地 K 线缓存目录与刷新间隔（秒），间隔内不再向数据库查询新数据
+BAR_CACHE_DIR = os.getenv('BAR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'backtesting', 'bars'))
+BAR_CACHE_TTL = int(os.getenv('BAR_CACHE_TTL', '3600'))
+# feed 加载与 runner 是否通过本地 K 线缓存（database.bar_cache）读取行情
+USE_BAR_CACHE = os.getenv('USE_BAR_CACHE', 'false').lower() in ('1', 'true', 'yes')
+# DAO 返回的 numeric 列使用的浮点类型（float64 或 float32）
+DB_FLOAT_DTYPE = os.getenv('DB_FLOAT_DTYPE', 'float64')
+# 连接池配置
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# 单条语句超时（毫秒），0 表示不限制
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+# 预取线程数与最多在内存中等待的批次数
+PREFETCH_WORKERS = int(os.getenv('PREFETCH_WORKERS', '4'))
+PREFETCH_MAX_PENDING = int(os.getenv('PREFETCH_MAX_PENDING', '8'))
+# 周线、月线是否从连续聚合（docs/fund_market_cagg.sql）读取
+USE_CONTINUOUS_AGGREGATES = os.getenv('USE_CONTINUOUS_AGGREGATES', 'false').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,350 @@
+"""
+fund_market 本地列式缓存
+
+每个 (time_frame, symbol) 一个 .npy 文件（结构化数组，time 为 UTC 纳秒），
+读取时以 mmap 方式打开，只拷贝查询区间内的行。文件中最后一根 K 线的时间即为
+该 symbol 的水位线，刷新时只从数据库拉取 time >= 水位线的数据。
+批量接口（list_by_symbols_limit / list_by_symbols）把未缓存与已过期的 symbol 各合并为一次查询。
+
+配置 USE_BAR_CACHE=true 后，feed 加载与 runner 通过 market_dao() 读取本缓存，否则直接查询数据库。
+命中统计在进程退出时追加到缓存目录下的 stats.jsonl，stats 命令汇总各进程的结果。
+
+命令行：
+    python -m database.bar_cache stats
+    python -m database.bar_cache invalidate [--symbol S] [--time-frame 1d]
+    python -m database.bar_cache rebuild --symbol S [--symbol S2 ...] [--time-frame 1d]
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import config
+from database import fund_market_dao
+
+_stats = {'hit': 0, 'refresh': 0, 'miss': 0}
+_STATS_FILE = 'stats.jsonl'
+
+
+def market_dao():
+    """USE_BAR_CACHE 开启时返回本模块（接口与 fund_market_dao 相同），否则返回 fund_market_dao。"""
+    return sys.modules[__name__] if config.USE_BAR_CACHE else fund_market_dao
+
+
+def list_fund_market(symbol: str, start_date: str, end_date: str, time_frame: str = '1d') -> pd.DataFrame:
+    """与 fund_market_dao.list_fund_market 相同，但优先读取本地缓存。"""
+    bars = _load(symbol, time_frame)
+    times = bars['time']
+    lo = np.searchsorted(times, _to_ns(start_date), side='left')
+    hi = np.searchsorted(times, _to_ns(end_date), side='right')
+    return _to_frame(bars[lo:hi], symbol, time_frame)
+
+
+def list_by_limit(symbol: str, end_date: str, limit: int = 500, time_frame: str = '1d') -> pd.DataFrame:
+    """与 fund_market_dao.list_by_limit 相同，但优先读取本地缓存。"""
+    bars = _load(symbol, time_frame)
+    hi = np.searchsorted(bars['time'], _to_ns(end_date), side='right')
+    return _to_frame(bars[:min(hi, limit)], symbol, time_frame)
+
+
+def list_by_symbols_limit(symbols: list, end_date: str, limit: int = 500, time_frame: str = '1d',
+                          chunk_size: int = 500) -> pd.DataFrame:
+    """与 fund_market_dao.list_by_symbols_limit 相同（每个 symbol 截至 end_date 的最近 limit 根），优先读取本地缓存。"""
+    end = _to_ns(end_date)
+    frames = []
+    for symbol, bars in _load_many(symbols, time_frame, chunk_size).items():
+        hi = np.searchsorted(bars['time'], end, side='right')
+        frames.append(_to_frame(bars[max(hi - limit, 0):hi], symbol, time_frame))
+    return _concat(frames)
+
+
+def list_by_symbols(symbols: list, start_date: str, end_date: str, time_frame: str = '1d',
+                    chunk_size: int = 500) -> pd.DataFrame:
+    """与 fund_market_dao.list_by_symbols 相同，优先读取本地缓存。"""
+    start, end = _to_ns(start_date), _to_ns(end_date)
+    frames = []
+    for symbol, bars in _load_many(symbols, time_frame, chunk_size).items():
+        times = bars['time']
+        lo = np.searchsorted(times, start, side='left')
+        hi = np.searchsorted(times, end, side='right')
+        frames.append(_to_frame(bars[lo:hi], symbol, time_frame))
+    return _concat(frames)
+
+
+def refresh(symbol: str, time_frame: str = '1d') -> int:
+    """强制从水位线增量刷新，返回缓存中的行数。"""
+    path = _path(symbol, time_frame)
+    if not os.path.exists(path):
+        return len(_rebuild(symbol, time_frame))
+    return len(_refresh(path, symbol, time_frame))
+
+
+def rebuild(symbols: list, time_frame: str = '1d') -> None:
+    """丢弃并重新拉取指定 symbol 的全部历史。"""
+    for symbol in symbols:
+        _rebuild(symbol, time_frame)
+
+
+def invalidate(symbol: str = None, time_frame: str = None) -> int:
+    """删除缓存文件，参数为空时表示全部，返回删除的文件数。"""
+    removed = 0
+    for tf in _time_frames(time_frame):
+        tf_dir = os.path.join(config.BAR_CACHE_DIR, tf)
+        if symbol is None:
+            removed += len(_cached_files(tf_dir))
+            shutil.rmtree(tf_dir, ignore_errors=True)
+            continue
+        path = _path(symbol, tf)
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def stats(counts: dict = None) -> dict:
+    """缓存命中统计（默认为本进程）：hit 完全命中，refresh 增量刷新，miss 全量加载。"""
+    counts = _stats if counts is None else counts
+    total = sum(counts[key] for key in _stats)
+    result = {key: counts[key] for key in _stats}
+    result['hit_rate'] = counts['hit'] / total if total else 0.0
+    return result
+
+
+def reset_stats() -> None:
+    for key in _stats:
+        _stats[key] = 0
+
+
+def save_stats() -> None:
+    """把本进程的统计追加到 stats.jsonl 并清零；进程退出时自动调用。"""
+    if not any(_stats.values()):
+        return
+    os.makedirs(config.BAR_CACHE_DIR, exist_ok=True)
+    line = json.dumps(dict(_stats, pid=os.getpid(), ts=time.time())) + '\n'
+    # 每个进程只追加一行，多个进程同时写入也不会互相覆盖
+    with open(os.path.join(config.BAR_CACHE_DIR, _STATS_FILE), 'a') as f:
+        f.write(line)
+    reset_stats()
+
+
+def saved_stats() -> dict:
+    """汇总 stats.jsonl 中各进程保存的统计。"""
+    counts = {key: 0 for key in _stats}
+    path = os.path.join(config.BAR_CACHE_DIR, _STATS_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                for key in counts:
+                    counts[key] += record.get(key, 0)
+    return stats(counts)
+
+
+atexit.register(save_stats)
+
+
+def _load(symbol: str, time_frame: str) -> np.ndarray:
+    path = _path(symbol, time_frame)
+    if not os.path.exists(path):
+        _stats['miss'] += 1
+        return _rebuild(symbol, time_frame)
+    if time.time() - os.path.getmtime(path) > config.BAR_CACHE_TTL:
+        _stats['refresh'] += 1
+        return _refresh(path, symbol, time_frame)
+    _stats['hit'] += 1
+    return np.load(path, mmap_mode='r')
+
+
+def _load_many(symbols: list, time_frame: str, chunk_size: int = 500) -> dict:
+    """按 symbols 顺序返回 {symbol: bars}，未缓存的一次批量全量拉取，过期的从最早的水位线一次批量增量拉取。"""
+    result, missing, stale = {}, [], {}
+    for symbol in symbols:
+        path = _path(symbol, time_frame)
+        if not os.path.exists(path):
+            missing.append(symbol)
+            continue
+        cached = np.load(path, mmap_mode='r')
+        if time.time() - os.path.getmtime(path) > config.BAR_CACHE_TTL:
+            if len(cached) == 0:
+                missing.append(symbol)
+            else:
+                stale[symbol] = cached
+            continue
+        _stats['hit'] += 1
+        result[symbol] = cached
+
+    if missing:
+        _stats['miss'] += len(missing)
+        groups = fund_market_dao.split_by_symbol(
+            fund_market_dao.list_since_by_symbols(missing, None, time_frame, chunk_size))
+        for symbol in missing:
+            result[symbol] = _save_frame(symbol, time_frame, groups.get(symbol))
+    if stale:
+        _stats['refresh'] += len(stale)
+        since = pd.Timestamp(min(int(c['time'][-1]) for c in stale.values()), unit='ns', tz='UTC')
+        groups = fund_market_dao.split_by_symbol(
+            fund_market_dao.list_since_by_symbols(list(stale), since, time_frame, chunk_size))
+        for symbol, cached in stale.items():
+            fresh = _to_records(groups.get(symbol, pd.DataFrame()))
+            # 按最早的水位线查询，只保留本 symbol 水位线之后的行
+            fresh = fresh[fresh['time'] >= cached['time'][-1]]
+            result[symbol] = _merge(_path(symbol, time_frame), symbol, time_frame, cached, fresh)
+    return {symbol: result[symbol] for symbol in symbols}
+
+
+def _rebuild(symbol: str, time_frame: str) -> np.ndarray:
+    return _save_frame(symbol, time_frame, fund_market_dao.list_since(symbol, None, time_frame))
+
+
+def _save_frame(symbol: str, time_frame: str, df: pd.DataFrame) -> np.ndarray:
+    bars = _to_records(df if df is not None else pd.DataFrame())
+    _save(_path(symbol, time_frame), bars)
+    return bars
+
+
+def _refresh(path: str, symbol: str, time_frame: str) -> np.ndarray:
+    cached = np.load(path, mmap_mode='r')
+    if len(cached) == 0:
+        return _rebuild(symbol, time_frame)
+    watermark = int(cached['time'][-1])
+    # 水位线那根 K 线可能是未收盘的数据，连同它一起重新拉取
+    since = pd.Timestamp(watermark, unit='ns', tz='UTC')
+    fresh = _to_records(fund_market_dao.list_since(symbol, since, time_frame))
+    return _merge(path, symbol, time_frame, cached, fresh)
+
+
+def _merge(path: str, symbol: str, time_frame: str, cached: np.ndarray, fresh: np.ndarray) -> np.ndarray:
+    """用 fresh 替换缓存中水位线及之后的行。"""
+    if len(fresh) == 0:
+        os.utime(path)
+        return cached
+    if fresh.dtype != cached.dtype:
+        return _rebuild(symbol, time_frame)
+    keep = np.searchsorted(cached['time'], fresh['time'][0], side='left')
+    bars = np.concatenate([cached[:keep], fresh])
+    _save(path, bars)
+    return bars
+
+
+def _to_records(df: pd.DataFrame) -> np.ndarray:
+    """把查询结果转换为结构化数组，只保留时间与数值列。"""
+    if df.empty:
+        return np.empty(0, dtype=[('time', 'i8')])
+    df = df.sort_values('time')
+    fields = [('time', 'i8')]
+    columns = {'time': pd.to_datetime(df['time'], utc=True).astype('int64').to_numpy()}
+    for col in df.columns:
+        if col in ('time', 'symbol', 'time_frame'):
+            continue
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            fields.append((col, 'i8'))
+            columns[col] = pd.to_datetime(series, utc=True).astype('int64').to_numpy()
+            continue
+        values = pd.to_numeric(series, errors='coerce')
+        if values.isna().all() and series.notna().any():
+            # 非数值列（如文本）不进入缓存
+            continue
+        fields.append((col, 'f8'))
+        columns[col] = values.to_numpy(dtype='f8')
+    bars = np.empty(len(df), dtype=fields)
+    for name, values in columns.items():
+        bars[name] = values
+    return bars
+
+
+def _to_frame(bars: np.ndarray, symbol: str, time_frame: str) -> pd.DataFrame:
+    data = {}
+    for name in bars.dtype.names:
+        values = np.array(bars[name])
+        if name == 'time' or bars.dtype[name] == np.dtype('i8'):
+            values = pd.to_datetime(values, utc=True).tz_convert(config.DB_TIMEZONE)
+        data[name] = values
+    df = pd.DataFrame(data)
+    df.insert(1, 'symbol', symbol)
+    df['time_frame'] = time_frame
+    return df
+
+
+def _concat(frames: list) -> pd.DataFrame:
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _to_ns(value) -> int:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(config.DB_TIMEZONE)
+    return ts.value
+
+
+def _save(path: str, bars: np.ndarray) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # 每次写入使用独立的临时文件，多个进程同时刷新同一 symbol 时互不覆盖
+    with tempfile.NamedTemporaryFile(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp',
+                                     delete=False) as f:
+        np.save(f, bars)
+    # 原子替换，避免其他进程读到写了一半的文件
+    os.replace(f.name, path)
+
+
+def _path(symbol: str, time_frame: str) -> str:
+    return os.path.join(config.BAR_CACHE_DIR, time_frame, f'{symbol}.npy')
+
+
+def _time_frames(time_frame: str = None) -> list:
+    if time_frame is not None:
+        return [time_frame]
+    if not os.path.isdir(config.BAR_CACHE_DIR):
+        return []
+    return sorted(d for d in os.listdir(config.BAR_CACHE_DIR) if os.path.isdir(os.path.join(config.BAR_CACHE_DIR, d)))
+
+
+def _cached_files(tf_dir: str) -> list:
+    if not os.path.isdir(tf_dir):
+        return []
+    return [f for f in os.listdir(tf_dir) if f.endswith('.npy')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='fund_market 本地缓存管理')
+    parser.add_argument('command', choices=['stats', 'invalidate', 'rebuild'])
+    parser.add_argument('--symbol', action='append', dest='symbols')
+    parser.add_argument('--time-frame', dest='time_frame')
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        for tf in _time_frames(args.time_frame):
+            tf_dir = os.path.join(config.BAR_CACHE_DIR, tf)
+            files = _cached_files(tf_dir)
+            size = sum(os.path.getsize(os.path.join(tf_dir, f)) for f in files)
+            print(f'{tf}: {len(files)} symbols, {size / 1024 / 1024:.1f} MB')
+        counts = saved_stats()
+        print(f"hit {counts['hit']}, refresh {counts['refresh']}, miss {counts['miss']}, "
+              f"hit rate {counts['hit_rate']:.1%}")
+    elif args.command == 'invalidate':
+        symbols = args.symbols or [None]
+        removed = sum(invalidate(s, args.time_frame) for s in symbols)
+        print(f'removed {removed} files')
+    elif args.command == 'rebuild':
+        if not args.symbols:
+            parser.error('rebuild requires --symbol')
+        rebuild(args.symbols, args.time_frame or '1d')
+        print(f'rebuilt {len(args.symbols)} symbols')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+基于 PostgreSQL COPY ... TO STDOUT 的批量读取
+
+COPY 输出的 CSV 通过管道直接交给 pandas 的 C 解析器，不经过逐行的 Python 元组，
+适合全市场扫描这类一次读取上百万行的场景。
+"""
+import os
+import threading
+
+import pandas as pd
+from psycopg2 import sql
+
+from database.db_pool import float_dtype, get_engine
+from database.fund_market_dao import MARKET_DTYPES
+
+
+def parse_copy_csv(stream, dtypes: dict, parse_dates: tuple = ('time',)) -> pd.DataFrame:
+    """解析 COPY (FORMAT csv, HEADER true) 的输出，stream 可以是管道或本地文件。"""
+    df = pd.read_csv(stream, dtype=dtypes, engine='c')
+    for col in parse_dates:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], utc=True, format='ISO8601')
+    return df
+
+
+def copy_frame(query: str, params: dict, dtypes: dict, parse_dates: tuple = ('time',)) -> pd.DataFrame:
+    """
+    以 COPY 方式执行查询，query（字符串或 psycopg2.sql.Composable）使用 psycopg2 的 %(name)s 占位符
+    数据库端写管道、pandas 同时读管道，内存中不保留完整的 CSV 文本
+    """
+    raw = get_engine().raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            sql_text = cursor.mogrify(query, params).decode()
+            copy_sql = f"COPY ({sql_text}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+
+            read_fd, write_fd = os.pipe()
+            errors = []
+
+            def produce():
+                with os.fdopen(write_fd, 'wb') as writer:
+                    try:
+                        cursor.copy_expert(copy_sql, writer)
+                    except Exception as e:
+                        errors.append(e)
+
+            producer = threading.Thread(target=produce, daemon=True)
+            producer.start()
+            try:
+                with os.fdopen(read_fd, 'rb') as reader:
+                    df = parse_copy_csv(reader, dtypes, parse_dates)
+            finally:
+                # 读端关闭后写端收到 EPIPE，线程随之结束；数据库端的错误优先于解析错误抛出
+                producer.join()
+                if errors:
+                    raise errors[0]
+            return df
+    finally:
+        raw.close()
+
+
+def read_market_columns(start_date, end_date, columns: tuple = ('close',), time_frame: str = '1d',
+                        pivot: bool = False) -> pd.DataFrame:
+    """
+    读取全市场在 [start_date, end_date] 区间的指定列，time_frame 为空时不过滤周期
+    pivot=True 时返回 time × symbol 的宽表（仅支持单列）
+    """
+    query = sql.SQL("""
+        SELECT {select}
+        FROM fund_market
+        WHERE time >= %(start_date)s AND time <= %(end_date)s
+    """).format(select=sql.SQL(', ').join(sql.Identifier(c) for c in ('time', 'symbol') + tuple(columns)))
+    params = {'start_date': start_date, 'end_date': end_date}
+    if time_frame:
+        query += sql.SQL(" AND time_frame = %(time_frame)s")
+        params['time_frame'] = time_frame
+    query += sql.SQL(" ORDER BY time ASC")
+    dtypes = {'symbol': str}
+    dtypes.update({c: MARKET_DTYPES.get(c, float_dtype()) for c in columns})
+    df = copy_frame(query, params, dtypes)
+    if not pivot:
+        return df
+    if len(columns) != 1:
+        raise ValueError("pivot requires exactly one value column")
+    return df.pivot(index='time', columns='symbol', values=columns[0])
@@ -1,10 +1,62 @@
-from sqlalchemy import create_engine
+import numpy as np
+import pandas as pd
+import psycopg2.extensions
+from sqlalchemy import create_engine, event, text
 from common import config
 
 engine = None
 
+# numeric 列直接解码为 float，避免 psycopg2 默认返回 decimal.Decimal
+DEC2FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'DEC2FLOAT',
+    lambda value, curs: float(value) if value is not None else None
+)
+
 def get_engine():
     global engine
     if engine is None:
-        engine = create_engine(config.DB_URL)
-    return engine
\ No newline at end of file
+        connect_args = {}
+        if config.DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args['options'] = f'-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}'
+        engine = create_engine(
+            config.DB_URL,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_pre_ping=config.DB_POOL_PRE_PING,
+            connect_args=connect_args
+        )
+        event.listen(engine, 'connect', _register_float_decoding)
+    return engine
+
+def _register_float_decoding(dbapi_connection, connection_record):
+    psycopg2.extensions.register_type(DEC2FLOAT, dbapi_connection)
+
+def float_dtype() -> np.dtype:
+    return np.dtype(config.DB_FLOAT_DTYPE)
+
+def read_frame(query: str, params: dict, dtypes: dict) -> pd.DataFrame:
+    """执行查询并按 dtypes 声明的类型逐列构造 DataFrame，未声明的列由 pandas 推断。"""
+    with get_engine().connect() as conn:
+        result = conn.execute(text(query), params)
+        columns = list(result.keys())
+        rows = result.fetchall()
+    return build_frame(columns, rows, dtypes)
+
+def iter_frames(query: str, params: dict, dtypes: dict, yield_per: int = 10000):
+    """使用服务端游标分批读取，每批 yield_per 行生成一个 DataFrame。"""
+    with get_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=yield_per).execute(text(query), params)
+        columns = list(result.keys())
+        for rows in result.partitions():
+            yield build_frame(columns, rows, dtypes)
+
+def build_frame(columns: list, rows: list, dtypes: dict) -> pd.DataFrame:
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {}
+    for col, col_values in zip(columns, values):
+        if col in dtypes:
+            data[col] = np.array(col_values, dtype=dtypes[col])
+        else:
+            data[col] = list(col_values)
+    return pd.DataFrame(data, columns=columns)
\ No newline at end of file
@@ -1,9 +1,10 @@
 import pandas as pd
-from sqlalchemy import create_engine, text
-from database.db_pool import get_engine
+from database.db_pool import float_dtype, read_frame
+
+# fund_adj 中 numeric 列的返回类型
+ADJ_DTYPES = {'adj_factor': float_dtype()}
 
 def list_fund_adj(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
-    engine = get_engine()
     query = """
         SELECT * FROM fund_adj
         WHERE symbol = :symbol
@@ -15,11 +16,10 @@ def list_fund_adj(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         'start_date': start_date,
         'end_date': end_date
     }
-    df = pd.read_sql(text(query), engine, params=params)
+    df = read_frame(query, params, ADJ_DTYPES)
     return df
 
 def list_by_limit(symbol: str, end_date: str, limit: int = 500) -> pd.DataFrame:
-    engine = get_engine()
     query = """
         SELECT * FROM fund_adj
         WHERE symbol = :symbol
@@ -32,19 +32,32 @@ def list_by_limit(symbol: str, end_date: str, limit: int = 500) -> pd.DataFrame:
         'end_date': end_date,
         'limit': limit
     }
-    df = pd.read_sql(text(query), engine, params=params)
+    df = read_frame(query, params, ADJ_DTYPES)
     return df
 
 def get_latest_adj(symbol: str) -> float:
-    engine = get_engine()
     query = """
         SELECT adj_factor FROM fund_adj
         WHERE symbol = :symbol
-        ORDER BY time ASC
+        ORDER BY time DESC
         LIMIT 1
     """
     params = {'symbol': symbol}
-    df = pd.read_sql(text(query), engine, params=params)
+    df = read_frame(query, params, ADJ_DTYPES)
     if df.empty:
         return 1.0
-    return float(df['adj_factor'].iloc[0])
\ No newline at end of file
+    return float(df['adj_factor'].iloc[0])
+
+def list_by_symbols(symbols: list, end_date: str) -> pd.DataFrame:
+    """批量查询多个基金截至 end_date 的全部复权因子。"""
+    query = """
+        SELECT * FROM fund_adj
+        WHERE symbol = ANY(:symbols)
+        AND time <= :end_date
+        ORDER BY symbol, time ASC
+    """
+    params = {
+        'symbols': list(symbols),
+        'end_date': end_date
+    }
+    return read_frame(query, params, ADJ_DTYPES)
@@ -1,11 +1,73 @@
 import pandas as pd
 from sqlalchemy import text
-from database.db_pool import get_engine
+from database.db_pool import float_dtype, get_engine, read_frame
+
+_FLOAT = float_dtype()
+# fund 中 numeric / float4 列的返回类型
+FUND_DTYPES = {
+    'issue_amount': _FLOAT,
+    'm_fee': _FLOAT,
+    'c_fee': _FLOAT,
+    'duration_year': _FLOAT,
+    'p_value': _FLOAT,
+    'min_amount': _FLOAT,
+    'exp_return': _FLOAT,
+}
 
 def list_fund(limit: int = 50) -> pd.DataFrame:
-    engine = get_engine()
     query = """
         SELECT * FROM fund order by found_date ASC limit :limit
     """
-    result = pd.read_sql(text(query), engine, params = {"limit": limit})
+    result = read_frame(query, {"limit": limit}, FUND_DTYPES)
     return result
+
+def list_eligible(start_date: str, end_date: str, min_bars: int, time_frame: str = '1d', limit: int = 10000) -> pd.DataFrame:
+    """
+    通过 fund_market_coverage 一次查询出有足够行情的基金
+    start_date 为空时要求截至 end_date 至少有 min_bars 根 K 线，否则要求 [start_date, end_date] 区间内至少有 min_bars 根。
+    """
+    query, params = eligible_query(start_date, end_date, min_bars, time_frame, limit)
+    return read_frame(query, params, FUND_DTYPES)
+
+def eligible_query(start_date: str, end_date: str, min_bars: int, time_frame: str = '1d', limit: int = 10000) -> tuple:
+    """
+    list_eligible 的 SQL 与参数。覆盖表的 bar_count 是全部历史的条数：
+    行情完全落在查询区间内时直接使用，否则回到 fund_market 数区间内的 K 线，最多数 min_bars 根
+    """
+    in_range = "c.last_time <= :end_date"
+    bar_filter = "m.time <= :end_date"
+    params = {
+        'time_frame': time_frame,
+        'min_bars': min_bars,
+        'end_date': end_date,
+        'limit': limit
+    }
+    if start_date:
+        in_range += " AND c.first_time >= :start_date"
+        bar_filter += " AND m.time >= :start_date"
+        params['start_date'] = start_date
+    query = f"""
+        SELECT f.* FROM fund f
+        JOIN fund_market_coverage c ON c.symbol = f.symbol AND c.time_frame = :time_frame
+        WHERE c.bar_count >= :min_bars
+        AND c.first_time <= :end_date
+        {"AND c.last_time >= :start_date" if start_date else ""}
+        AND (
+            ({in_range})
+            OR (
+                SELECT count(*) FROM (
+                    SELECT 1 FROM fund_market m
+                    WHERE m.symbol = c.symbol AND m.time_frame = c.time_frame
+                    AND {bar_filter}
+                    LIMIT :min_bars
+                ) bars
+            ) >= :min_bars
+        )
+        ORDER BY f.found_date ASC LIMIT :limit
+    """
+    return query, params
+
+def refresh_coverage() -> None:
+    """刷新 fund_market_coverage，在行情入库后调用。"""
+    with get_engine().begin() as conn:
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY fund_market_coverage"))
@@ -1,11 +1,48 @@
 import pandas as pd
-from sqlalchemy import text
-from database.db_pool import get_engine
+from common import config
+from database.db_pool import float_dtype, iter_frames, read_frame
+
+_FLOAT = float_dtype()
+# fund_market 中 numeric 列的返回类型
+MARKET_DTYPES = {
+    'open': _FLOAT,
+    'high': _FLOAT,
+    'low': _FLOAT,
+    'close': _FLOAT,
+    'pre_close': _FLOAT,
+    'change': _FLOAT,
+    'pct_chg': _FLOAT,
+    'vol': _FLOAT,
+    'volume': _FLOAT,
+    'amount': _FLOAT,
+}
+
+# 由日线连续聚合得到的周期，见 docs/fund_market_cagg.sql
+AGGREGATE_VIEWS = {
+    '1w': 'fund_market_1w',
+    '1M': 'fund_market_1mo',
+}
+
+def market_source(time_frame: str, alias: str = 'fund_market') -> str:
+    """
+    返回查询使用的行情来源。开启 USE_CONTINUOUS_AGGREGATES 时，周线、月线改为读取连续聚合，
+    并补齐 change、pct_chg、time_frame 列，使外层查询与读取 fund_market 时完全一致。
+    alias 为来源在外层查询中的别名，需要带别名的查询（如 JOIN）传入，不要在返回值之后再写别名
+    """
+    view = AGGREGATE_VIEWS.get(time_frame) if config.USE_CONTINUOUS_AGGREGATES else None
+    if view is None:
+        return "fund_market" if alias == 'fund_market' else f"fund_market AS {alias}"
+    return f"""(
+            SELECT *,
+                close - pre_close AS change,
+                (close / NULLIF(pre_close, 0) - 1) * 100 AS pct_chg,
+                CAST('{time_frame}' AS text) AS time_frame
+            FROM {view}
+        ) AS {alias}"""
 
 def list_fund_market(symbol: str, start_date: str, end_date: str, time_frame: str = '1d') -> pd.DataFrame:
-    engine = get_engine()
-    query = """
-        SELECT * FROM fund_market
+    query = f"""
+        SELECT * FROM {market_source(time_frame)}
         WHERE symbol = :symbol
         AND time >= :start_date
         AND time <= :end_date
@@ -18,13 +55,12 @@ def list_fund_market(symbol: str, start_date: str, end_date: str, time_frame: st
         'end_date': end_date,
         'time_frame': time_frame
     }
-    df = pd.read_sql(text(query), engine, params=params)
+    df = read_frame(query, params, MARKET_DTYPES)
     return df
 
 def list_by_limit(symbol: str, end_date: str, limit: int = 500, time_frame: str = '1d') -> pd.DataFrame:
-    engine = get_engine()
-    query = """
-        SELECT * FROM fund_market
+    query = f"""
+        SELECT * FROM {market_source(time_frame)}
         WHERE symbol = :symbol
         AND time <= :end_date
         AND time_frame = :time_frame
@@ -33,19 +69,183 @@ def list_by_limit(symbol: str, end_date: str, limit: int = 500, time_frame: str
     """
     params = {
         'symbol': symbol,
-        'start_date': start_date,
         'end_date': end_date,
         'time_frame': time_frame,
         'limit': limit
     }
-    df = pd.read_sql(text(query), engine, params=params)
+    df = read_frame(query, params, MARKET_DTYPES)
     return df
 
 def list_pct_chg(symbol:str, start_date: str, end_date: str, time_frame: str = '1d') -> pd.DataFrame:
-    engine = get_engine()
-    base = """
+    base = f"""
+        SELECT time, symbol, pct_chg
+        FROM {market_source(time_frame)}
+        WHERE symbol = :symbol
+        AND time >= :start_date AND time <= :end_date
+    """
+    if time_frame:
+        base += " AND time_frame = :time_frame"
+    base += " ORDER BY time ASC"
+    params = {'symbol': symbol, 'start_date': start_date, 'end_date': end_date}
+    if time_frame:
+        params['time_frame'] = time_frame
+    return read_frame(base, params, MARKET_DTYPES)
+
+
+def list_by_symbols(symbols: list, start_date: str, end_date: str, time_frame: str = '1d', chunk_size: int = 500) -> pd.DataFrame:
+    """按时间区间批量查询多个基金的行情，每 chunk_size 个 symbol 一次查询。"""
+    query = f"""
+        SELECT * FROM {market_source(time_frame)}
+        WHERE symbol = ANY(:symbols)
+        AND time >= :start_date
+        AND time <= :end_date
+        AND time_frame = :time_frame
+        ORDER BY symbol, time ASC
+    """
+    frames = []
+    for chunk in _chunks(symbols, chunk_size):
+        params = {
+            'symbols': chunk,
+            'start_date': start_date,
+            'end_date': end_date,
+            'time_frame': time_frame
+        }
+        frames.append(read_frame(query, params, MARKET_DTYPES))
+    return _concat(frames)
+
+def list_by_symbols_limit(symbols: list, end_date: str, limit: int = 500, time_frame: str = '1d', chunk_size: int = 500) -> pd.DataFrame:
+    """批量查询多个基金截至 end_date 的最近 limit 根 K 线（按时间升序返回）。"""
+    query = f"""
+        SELECT m.* FROM unnest(CAST(:symbols AS text[])) AS s(symbol)
+        CROSS JOIN LATERAL (
+            SELECT * FROM {market_source(time_frame)}
+            WHERE symbol = s.symbol
+            AND time <= :end_date
+            AND time_frame = :time_frame
+            ORDER BY time DESC
+            LIMIT :limit
+        ) m
+        ORDER BY m.symbol, m.time ASC
+    """
+    frames = []
+    for chunk in _chunks(symbols, chunk_size):
+        params = {
+            'symbols': chunk,
+            'end_date': end_date,
+            'time_frame': time_frame,
+            'limit': limit
+        }
+        frames.append(read_frame(query, params, MARKET_DTYPES))
+    return _concat(frames)
+
+def list_new_bars(symbols: list, since, time_frame: str = '1d') -> pd.DataFrame:
+    """
+    实时轮询：一次查询多个基金 time >= since 的 K 线，按时间、symbol 升序返回
+    包含 since 本身：同一时刻的行分两次入库时，第二次轮询仍能取到，调用方按 symbol 去掉已收到的行
+    """
+    query = f"""
+        SELECT * FROM {market_source(time_frame)}
+        WHERE symbol = ANY(:symbols)
+        AND time >= :since
+        AND time_frame = :time_frame
+        ORDER BY time, symbol ASC
+    """
+    params = {
+        'symbols': list(symbols),
+        'since': since,
+        'time_frame': time_frame
+    }
+    return read_frame(query, params, MARKET_DTYPES)
+
+def list_bars(symbols: list, times: list, time_frame: str = '1d') -> pd.DataFrame:
+    """按 (symbol, time) 精确查询若干根 K 线（推送模式收到通知后只取通知的行），按时间、symbol 升序返回。"""
+    query = f"""
+        SELECT m.* FROM {market_source(time_frame, alias='m')}
+        JOIN unnest(CAST(:symbols AS text[]), CAST(:times AS timestamptz[])) AS k(symbol, time)
+        ON m.symbol = k.symbol AND m.time = k.time
+        WHERE m.time_frame = :time_frame
+        ORDER BY m.time, m.symbol ASC
+    """
+    params = {
+        'symbols': list(symbols),
+        'times': list(times),
+        'time_frame': time_frame
+    }
+    return read_frame(query, params, MARKET_DTYPES)
+
+def split_by_symbol(df: pd.DataFrame) -> dict:
+    """把批量查询结果按 symbol 拆分为 {symbol: DataFrame}。"""
+    if df.empty:
+        return {}
+    return {symbol: group for symbol, group in df.groupby('symbol', sort=False)}
+
+def _chunks(symbols: list, chunk_size: int):
+    symbols = list(symbols)
+    for i in range(0, len(symbols), chunk_size):
+        yield symbols[i:i + chunk_size]
+
+def _concat(frames: list) -> pd.DataFrame:
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def list_since(symbol: str, since=None, time_frame: str = '1d') -> pd.DataFrame:
+    """查询 time >= since 的全部行情，since 为空时返回全部历史。"""
+    query = f"""
+        SELECT * FROM {market_source(time_frame)}
+        WHERE symbol = :symbol
+        AND time_frame = :time_frame
+    """
+    params = {'symbol': symbol, 'time_frame': time_frame}
+    if since is not None:
+        query += " AND time >= :since"
+        params['since'] = since
+    query += " ORDER BY time ASC"
+    return read_frame(query, params, MARKET_DTYPES)
+
+def list_since_by_symbols(symbols: list, since=None, time_frame: str = '1d', chunk_size: int = 500) -> pd.DataFrame:
+    """list_since 的批量版本，每 chunk_size 个 symbol 一次查询，按 symbol、时间升序返回。"""
+    query = f"""
+        SELECT * FROM {market_source(time_frame)}
+        WHERE symbol = ANY(:symbols)
+        AND time_frame = :time_frame
+    """
+    if since is not None:
+        query += " AND time >= :since"
+    query += " ORDER BY symbol, time ASC"
+    frames = []
+    for chunk in _chunks(symbols, chunk_size):
+        params = {'symbols': chunk, 'time_frame': time_frame}
+        if since is not None:
+            params['since'] = since
+        frames.append(read_frame(query, params, MARKET_DTYPES))
+    return _concat(frames)
+
+
+def iter_fund_market(symbol: str, start_date: str, end_date: str, time_frame: str = '1d', yield_per: int = 10000):
+    """list_fund_market 的生成器版本，通过服务端游标每次返回 yield_per 行。"""
+    query = f"""
+        SELECT * FROM {market_source(time_frame)}
+        WHERE symbol = :symbol
+        AND time >= :start_date
+        AND time <= :end_date
+        AND time_frame = :time_frame
+        ORDER BY time ASC
+    """
+    params = {
+        'symbol': symbol,
+        'start_date': start_date,
+        'end_date': end_date,
+        'time_frame': time_frame
+    }
+    return iter_frames(query, params, MARKET_DTYPES, yield_per)
+
+def iter_pct_chg(symbol: str, start_date: str, end_date: str, time_frame: str = '1d', yield_per: int = 10000):
+    """list_pct_chg 的生成器版本，通过服务端游标每次返回 yield_per 行。"""
+    base = f"""
         SELECT time, symbol, pct_chg
-        FROM fund_market
+        FROM {market_source(time_frame)}
         WHERE symbol = :symbol
         AND time >= :start_date AND time <= :end_date
     """
@@ -55,4 +255,4 @@ def list_pct_chg(symbol:str, start_date: str, end_date: str, time_frame: str = '
     params = {'symbol': symbol, 'start_date': start_date, 'end_date': end_date}
     if time_frame:
         params['time_frame'] = time_frame
-    return pd.read_sql(text(base), engine, params=params)
+    return iter_frames(base, params, MARKET_DTYPES, yield_per)
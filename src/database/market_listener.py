@@ -0,0 +1,65 @@
+"""
+fund_market 写入通知的监听（见 docs/fund_market_notify.sql）
+
+LISTEN 需要一条长期占用、自动提交的连接，因此不从连接池取，而是按 DB_URL 单独建立 psycopg2 连接。
+连接断开时 wait 抛出 psycopg2.Error，由调用方关闭后重连或退回轮询。
+"""
+import json
+import select
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy.engine import make_url
+
+from common import config
+
+CHANNEL = 'fund_market_insert'
+
+
+def dsn_from_url(url: str) -> str:
+    """SQLAlchemy 的 URL（如 postgresql+psycopg2://...）转换为 psycopg2 可用的 DSN。"""
+    return make_url(url).set(drivername='postgresql').render_as_string(hide_password=False)
+
+
+class MarketListener:
+
+    def __init__(self, channel: str = CHANNEL, dsn: str = None):
+        self.channel = channel
+        self.dsn = dsn
+        self.conn = None
+
+    def connect(self) -> None:
+        # TCP keepalive 让静默断开的连接也能在几十秒内被发现
+        dsn = self.dsn or dsn_from_url(config.DB_URL)
+        conn = psycopg2.connect(dsn, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f'LISTEN "{self.channel}"')
+        self.conn = conn
+
+    def wait(self, timeout: float) -> list:
+        """等待最多 timeout 秒，返回收到的通知 payload（dict）列表，超时返回空列表。"""
+        if self.conn is None:
+            self.connect()
+        readable, _, _ = select.select([self.conn], [], [], timeout)
+        if not readable:
+            # 超时也检查一次连接，服务端断开时 poll 会抛出异常
+            self.conn.poll()
+            return []
+        self.conn.poll()
+        payloads = []
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            try:
+                payloads.append(json.loads(notify.payload))
+            except ValueError:
+                print(f"Ignore notify payload: {notify.payload!r}")
+        return payloads
+
+    def close(self) -> None:
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except psycopg2.Error:
+                pass
+            self.conn = None
@@ -1,3 +1,5 @@
+from .array_feed import FundArrayData
+from .chunked_feed import FundChunkedData
 from .feeddata_demo import FundDataFeed
 
-__all__ = ['FundDataFeed']
\ No newline at end of file
+__all__ = ['FundArrayData', 'FundChunkedData', 'FundDataFeed']
\ No newline at end of file
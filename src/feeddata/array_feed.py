@@ -0,0 +1,103 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+# datetime.toordinal() of 1970-01-01，backtrader 的日期数值以 0001-01-01 为第 1 天
+_EPOCH_ORDINAL = 719163.0
+_NS_PER_DAY = 86400 * 10**9
+
+
+def ns_to_num(time_ns: np.ndarray) -> np.ndarray:
+    """把 UTC 纳秒时间戳批量转换为 backtrader 的日期数值（等价于 bt.date2num）。"""
+    return _EPOCH_ORDINAL + np.asarray(time_ns, dtype='i8') / _NS_PER_DAY
+
+
+def columns_from_frame(fund_markets: pd.DataFrame, extra: tuple = ()) -> dict:
+    """
+    把 fund_market 查询结果转换为连续的 NumPy 列，time 为 int64 UTC 纳秒
+    缺少 volume 或 pct_chg 时以 NaN 填充；extra 为额外带上的列，如预先算好的 atr
+    """
+    if 'time' in fund_markets.columns:
+        fund_markets = fund_markets.sort_values('time')
+        times = fund_markets['time']
+    else:
+        times = fund_markets.index.to_series()
+    volume = fund_markets['volume'] if 'volume' in fund_markets.columns else fund_markets.get('vol', np.nan)
+    columns = {
+        'time': pd.to_datetime(times, utc=True).astype('int64').to_numpy(),
+        'open': fund_markets['open'],
+        'high': fund_markets['high'],
+        'low': fund_markets['low'],
+        'close': fund_markets['close'],
+        'volume': volume,
+        'pct_chg': fund_markets['pct_chg'] if 'pct_chg' in fund_markets.columns else np.nan,
+    }
+    columns.update((name, fund_markets[name]) for name in extra)
+    n = len(fund_markets)
+    return {
+        k: np.ascontiguousarray(np.broadcast_to(v, n), dtype='i8' if k == 'time' else 'f8')
+        for k, v in columns.items()
+    }
+
+
+class FundArrayData(bt.feed.DataBase):
+    """
+    以 NumPy 列为数据源的 feed
+    _load 只移动下标；preload 时直接把整列拷贝到 line buffer，不再逐根 K 线调用 _load
+    """
+    lines = ('pct_chg',)
+
+    _price_fields = ('open', 'high', 'low', 'close', 'volume', 'pct_chg')
+
+    def __init__(self):
+        super().__init__()
+        self._columns = None
+        self._idx = 0
+
+    def set_columns(self, columns: dict):
+        """columns 需包含 time(int64 UTC 纳秒) 以及 open/high/low/close/volume/pct_chg。"""
+        self._columns = columns
+        self._dtnum = ns_to_num(columns['time'])
+        self._idx = 0
+
+    def start(self):
+        super().start()
+        self._idx = 0
+
+    def _load(self):
+        i = self._idx
+        if self._columns is None or i >= len(self._dtnum):
+            return False
+        self._idx = i + 1
+
+        self.lines.datetime[0] = self._dtnum[i]
+        for field in self._price_fields:
+            getattr(self.lines, field)[0] = self._columns[field][i]
+        self.lines.openinterest[0] = 0.0
+        return True
+
+    def preload(self):
+        # 有过滤器、时区转换或缓冲区受限时，走 backtrader 的逐根加载流程
+        if (self._columns is None or self._filters or self._ffilters or self._tzinput
+                or self.lines.datetime.mode != self.lines.datetime.UnBounded):
+            return super().preload()
+
+        dtnum = self._dtnum[self._idx:]
+        keep = (dtnum >= self.fromdate) & (dtnum <= self.todate)
+        values = {'datetime': dtnum[keep], 'openinterest': np.zeros(int(keep.sum()))}
+        for field in self._price_fields:
+            values[field] = self._columns[field][self._idx:][keep]
+
+        for alias in self.getlinealiases():
+            line = getattr(self.lines, alias)
+            line.array.frombytes(np.ascontiguousarray(values[alias], dtype='f8').tobytes())
+        self._idx = len(self._dtnum)
+        self.home()
+
+
+
+class FundArrayIndicatorData(FundArrayData):
+    """带预先算好的 atr line 的数组 feed，columns 需额外包含 atr。"""
+    lines = ('atr',)
+
+    _price_fields = FundArrayData._price_fields + ('atr',)
@@ -0,0 +1,63 @@
+import backtrader as bt
+from database import fund_market_dao
+from feeddata.array_feed import FundArrayData, columns_from_frame
+
+
+class FundChunkedData(FundArrayData):
+    """
+    按块读取的 feed：cerebro.run() 过程中才通过服务端游标逐块拉取数据，
+    内存中只保留当前块。需配合 bt.Cerebro(preload=False, exactbars=1) 使用，
+    否则 line buffer 仍会保存全部历史。
+    """
+    params = (
+        ('symbol', None),
+        ('start', None),
+        ('end', None),
+        ('time_frame', '1d'),
+        ('yield_per', 10000),
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = None
+
+    def start(self):
+        super().start()
+        if not self.p.symbol or not self.p.start or not self.p.end:
+            raise ValueError("symbol, start and end are required parameters")
+        self._chunks = fund_market_dao.iter_fund_market(
+            symbol=self.p.symbol,
+            start_date=self.p.start,
+            end_date=self.p.end,
+            time_frame=self.p.time_frame,
+            yield_per=self.p.yield_per
+        )
+        self._columns = None
+
+    def stop(self):
+        super().stop()
+        if self._chunks is not None:
+            # 关闭生成器以释放服务端游标
+            self._chunks.close()
+            self._chunks = None
+
+    def _load(self):
+        if self._columns is None or self._idx >= len(self._dtnum):
+            if not self._next_chunk():
+                return False
+        return super()._load()
+
+    def preload(self):
+        # 块数据不能整体拷贝，走 backtrader 的逐根加载流程
+        return bt.feed.DataBase.preload(self)
+
+    def _next_chunk(self) -> bool:
+        if self._chunks is None:
+            return False
+        for chunk in self._chunks:
+            if chunk.empty:
+                continue
+            self.set_columns(columns_from_frame(chunk))
+            return True
+        self._columns = None
+        return False
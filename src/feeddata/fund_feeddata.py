@@ -1,63 +1,148 @@
 from collections import deque
 import backtrader as bt
 import pandas as pd
+from database import bar_cache
 from database import fund_adj_dao
 from database import fund_market_dao
+from feeddata.array_feed import FundArrayData, FundArrayIndicatorData, columns_from_frame
+from feeddata import price_adjust
+from feeddata.prefetch import prefetch
+from indicator import panel_indicators
 
 class FundPandasData(bt.feeds.PandasData):
-    lines = ('pct_chg')
+    lines = ('pct_chg',)
     params = (
-        ('pct_chg', 'pct_chg')
+        ('pct_chg', -1),
     )
 
     def __init__(self):
         super().__init__()
-        self.datalength = 0
+        self.datalength = len(self.p.dataname)
 
-    def load_data(self, symbol: str, end: str, bars:int, time_frame:str) -> pd.DateFrame:
-        fund_markets = fund_market_dao.list_by_limit(
-            symbol=symbol,
-            end_date=end,
-            limit=bars,
-            time_frame=time_frame
-        )
-        fund_markets = fund_markets.sort_values('time').set_index('time')
-        fund_markets['open'] = fund_markets['open']
-        fund_markets['high'] = fund_markets['high']
-        fund_markets['low'] = fund_markets['low']
-        fund_markets['close'] = fund_markets['close']
-        fund_markets['volume'] = fund_markets['volume']
-        fund_markets['pct_chg'] = fund_markets['pct_chg']
-        fund_markets['openinterest'] = fund_markets['interest']
-        self.dataname = fund_markets
-        self.datalength = len(fund_markets)
-
-    def load_data_with_adj(self, symbol: str, end: str, bars: int, time_frame: str, adjust_type: str = 'forward') -> pd.DataFrame:
-        fund_markets = fund_market_dao.list_by_limit(
-            symbol=symbol,
+class FundIndicatorData(FundPandasData):
+    """带预先批量算好的指标列的 feed，见 indicator.panel_indicators。"""
+    lines = ('atr', 'sma')
+    params = (
+        ('atr', -1),
+        ('sma', -1),
+    )
+
+
+def to_feed_frame(fund_markets: pd.DataFrame) -> pd.DataFrame:
+    """把 fund_market 查询结果整理成 FundPandasData 需要的格式（时间索引、volume 列）。"""
+    frame = fund_markets.sort_values('time').set_index('time')
+    if 'volume' not in frame.columns and 'vol' in frame.columns:
+        frame = frame.rename(columns={'vol': 'volume'})
+    return frame
+
+
+def load_data(symbol: str, end: str, bars: int, time_frame: str = '1d') -> FundPandasData:
+    """加载单个基金截至 end 的最近 bars 根 K 线，返回 FundPandasData，没有行情时返回 None。"""
+    return _load_one(symbol, end, bars, time_frame)
+
+
+def load_data_with_adj(symbol: str, end: str, bars: int, time_frame: str = '1d',
+                       adjust_type: str = 'forward') -> FundPandasData:
+    """与 load_data 相同，K 线按 fund_adj 复权（adjust_type 为 'forward' 或 'backward'）。"""
+    return _load_one(symbol, end, bars, time_frame, adjust_type)
+
+
+def _load_one(symbol: str, end: str, bars: int, time_frame: str, adjust_type: str = None) -> FundPandasData:
+    fund_markets = bar_cache.market_dao().list_by_symbols_limit(
+        symbols=[symbol],
+        end_date=end,
+        limit=bars,
+        time_frame=time_frame
+    )
+    adjs = {symbol: fund_adj_dao.list_by_symbols([symbol], end)} if adjust_type else None
+    return _build_feeds([symbol], fund_markets, 0, adjs, adjust_type).get(symbol)
+
+
+def load_feeds(symbols: list, end: str, bars: int, time_frame: str = '1d', min_bars: int = 0,
+               indicators: dict = None) -> dict:
+    """
+    批量加载每个基金截至 end 的最近 bars 根 K 线，返回 {symbol: FundPandasData}
+    indicators 如 {'atr': 10}，非空时整批计算指标并返回 FundIndicatorData
+    """
+    fund_markets = bar_cache.market_dao().list_by_symbols_limit(
+        symbols=symbols,
+        end_date=end,
+        limit=bars,
+        time_frame=time_frame
+    )
+    return _build_feeds(symbols, fund_markets, min_bars, indicators=indicators)
+
+
+def load_range_feeds(symbols: list, start: str, end: str, time_frame: str = '1d', min_bars: int = 0,
+                     indicators: dict = None) -> dict:
+    """批量加载每个基金 [start, end] 区间的 K 线，返回 {symbol: FundPandasData}。"""
+    fund_markets = bar_cache.market_dao().list_by_symbols(
+        symbols=symbols,
+        start_date=start,
+        end_date=end,
+        time_frame=time_frame
+    )
+    return _build_feeds(symbols, fund_markets, min_bars, indicators=indicators)
+
+
+def prefetch_feeds(symbols: list, end: str, bars: int, time_frame: str = '1d', min_bars: int = 0,
+                   adjust_type: str = None, batch_size: int = 200, workers: int = None, max_pending: int = None,
+                   indicators: dict = None, columns: tuple = None, array: bool = False):
+    """
+    分批并发加载行情与复权因子，按 symbols 顺序逐个产出 (symbol, FundPandasData)
+    调用方向 cerebro.adddata 时，后面的批次仍在后台线程中加载
+    columns 非空时 feed 只保留这些列（含指标列），其余 line 不再填充，用于省内存
+    array 为 True 时产出 FundArrayData（指标只支持 atr），每批的 DataFrame 转成 NumPy 列后即释放
+    """
+    if array and set(indicators or ()) - {'atr'}:
+        raise ValueError(f"array feeds only carry a precomputed atr, got indicators {sorted(indicators)}")
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+    def load_batch(batch):
+        fund_markets = bar_cache.market_dao().list_by_symbols_limit(
+            symbols=batch,
             end_date=end,
             limit=bars,
-            time_frame=time_frame
+            time_frame=time_frame,
+            chunk_size=len(batch)
         )
-        fund_adjs = fund_adj_dao.list_by_limit(
-            symbol=symbol,
-            end_date=end,
-            limit=bars
-        )
-        latest_adj = 1.0
-        fund_adj_map = fund_adjs.set_index('time')['adj_factor'].to_dict()
-        # 保证按时间排序并以时间为索引
-        fund_markets = fund_markets.sort_values('time').set_index('time')
-        fund_adj_map = {}
-        factor = None
-        adj_series = pd.Series(index=fund_markets.index, data=[fund_adj_map.get(ts) for ts in fund_markets.index]).ffill().infer_objects(copy=False)
-        if adjust_type == 'forward':
-            factor = adj_series.astype(float).fillna(1.0) / latest_adj
-        elif adjust_type == 'backward':
-            factor = adj_series.astype(float).fillna(1.0)
-        fund_markets['open'] = fund_markets['open'] * factor
-        fund_markets['high'] = fund_markets['high'] * factor
-        fund_markets['low'] = fund_markets['low'] * factor
-        fund_markets['close'] = fund_markets['close'] * factor
-        self.dataname = fund_markets
-        self.datalength = len(fund_markets)
\ No newline at end of file
+        fund_adjs = fund_adj_dao.list_by_symbols(batch, end) if adjust_type else None
+        return fund_markets, fund_adjs
+
+    for batch, (fund_markets, fund_adjs) in prefetch(batches, load_batch, workers, max_pending):
+        adjs = fund_market_dao.split_by_symbol(fund_adjs) if fund_adjs is not None else {}
+        feeds = _build_feeds(batch, fund_markets, min_bars, adjs, adjust_type, indicators, columns, array)
+        yield from feeds.items()
+
+
+def _build_feeds(symbols: list, fund_markets: pd.DataFrame, min_bars: int,
+                 adjs: dict = None, adjust_type: str = None, indicators: dict = None, columns: tuple = None,
+                 array: bool = False) -> dict:
+    groups = fund_market_dao.split_by_symbol(fund_markets)
+    frames = {}
+    # 按传入的 symbols 顺序返回，保证 cerebro.adddata 的顺序稳定
+    for symbol in symbols:
+        group = groups.get(symbol)
+        if group is None or len(group) < min_bars:
+            continue
+        if adjust_type:
+            group = price_adjust.adjust_frame(symbol, group, adjs.get(symbol), adjust_type)
+        frames[symbol] = to_feed_frame(group)
+    if indicators:
+        # 指标在复权之后、按整批标的一次计算
+        frames = panel_indicators.add_indicator_columns(frames, indicators)
+    if columns:
+        frames = {symbol: frame[[c for c in columns if c in frame.columns]] for symbol, frame in frames.items()}
+    if array:
+        return {symbol: _array_feed(symbol, frame) for symbol, frame in frames.items()}
+    if indicators:
+        return {symbol: FundIndicatorData(dataname=frame, name=symbol) for symbol, frame in frames.items()}
+    return {symbol: FundPandasData(dataname=frame, name=symbol) for symbol, frame in frames.items()}
+
+
+def _array_feed(symbol: str, frame: pd.DataFrame) -> FundArrayData:
+    """feed 只引用 NumPy 列，不持有 frame。"""
+    has_atr = 'atr' in frame.columns
+    feed = FundArrayIndicatorData(name=symbol) if has_atr else FundArrayData(name=symbol)
+    feed.set_columns(columns_from_frame(frame, extra=('atr',) if has_atr else ()))
+    return feed
@@ -0,0 +1,220 @@
+"""
+多标的实时行情中心
+
+所有订阅的标的共用一个轮询线程：每个 check_interval 只对 fund_market 发一次
+`symbol = ANY(:symbols) AND time >= :watermark` 查询，新 K 线按 symbol 分发到各自的队列。
+FundLiveData 的 _load 只从队列取数据，没有新 K 线时返回 None（不阻塞 Cerebro），
+500 个标的的实时组合每次轮询也只有一次查询。
+
+watermark 为已收到的最新 K 线时间，查询包含 watermark 本身，再按每个标的已分发的最新时间去重：
+同一时刻的 K 线分两次入库（如 A 在轮询之前、B 在轮询之后）时 B 不会丢失。
+晚于 watermark 之后才写入、但时间更早的 K 线不会再被拉取，适用于各标的按时间顺序入库的行情。
+
+push=True 时改为监听 fund_market 的写入通知（docs/fund_market_notify.sql）：收到通知立即按
+(symbol, time) 只查询通知的行，延迟不再受 check_interval 限制；监听连接断开时退回轮询，
+每个 check_interval 重连一次，重连成功后先轮询一次补齐断开期间的 K 线。
+推送模式下 watermark 推进到各标的已分发时间的最小值，重连后的补齐轮询只取这之后的 K 线。
+只有新写入的行会通知，已分发 K 线的修改（UPDATE）不会再分发。
+"""
+import threading
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from common import config
+from database import fund_market_dao
+from database.market_listener import MarketListener
+
+# 推送模式下每次等待通知的最长时间，决定 stop 的响应速度
+_LISTEN_TIMEOUT = 1.0
+
+
+class LiveDataHub:
+    """
+    hub = LiveDataHub(time_frame='1d', check_interval=60, lookback=100)
+    data = FundLiveData(symbol='510300', hub=hub)
+    feed 在构造时订阅，第一个 feed start 时一次批量加载所有订阅标的的历史并启动轮询线程，
+    最后一个 feed stop 时停止线程
+    """
+
+    def __init__(self, time_frame: str = '1d', check_interval: float = 60, lookback: int = 100,
+                 live_start_date: str = None, push: bool = False, listener: MarketListener = None):
+        self.time_frame = time_frame
+        self.check_interval = check_interval
+        self.lookback = lookback
+        self.live_start_date = live_start_date
+        self.push = push
+        self.listener = listener
+        self.watermark = None
+        self.polls = 0
+        self.listening = False
+        self._queues = {}
+        # 每个标的已分发的最新 K 线时间，推送与补齐轮询可能取到同一行
+        self._last = {}
+        # 从快照恢复的标的及其 last_dt
+        self._resume = {}
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = 0
+
+    @property
+    def symbols(self) -> list:
+        return list(self._queues)
+
+    def subscribe(self, symbol: str, since=None) -> None:
+        """since 为快照中的 last_dt 时，该标的不加载 lookback 历史，只补取 since 之后的 K 线。"""
+        with self._cond:
+            self._queues.setdefault(symbol, deque())
+            if since is not None:
+                since = pd.Timestamp(since)
+                self._resume[symbol] = since
+                self._last[symbol] = since
+
+    def start(self, background: bool = True) -> None:
+        """加载历史并启动轮询线程，多个 feed 调用时只执行一次；background=False 时需自行调用 poll。"""
+        with self._cond:
+            self._started += 1
+            if self._started > 1:
+                return
+        self.load_history()
+        if background:
+            self._stop.clear()
+            target = self._run_push if self.push else self._run
+            self._thread = threading.Thread(target=target, name='live-data-hub', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._started = max(self._started - 1, 0)
+            if self._started:
+                return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def load_history(self) -> None:
+        """
+        所有订阅标的截至 live_start_date 的最近 lookback 根 K 线，一次批量查询；
+        从快照恢复的标的只查询一次 last_dt 之后的 K 线
+        """
+        end_date = self.live_start_date or datetime.now().strftime('%Y-%m-%d')
+        fresh = [s for s in self.symbols if s not in self._resume]
+        frames = []
+        if self.lookback and fresh:
+            frames.append(fund_market_dao.list_by_symbols_limit(
+                symbols=fresh,
+                end_date=end_date,
+                limit=self.lookback,
+                time_frame=self.time_frame
+            ))
+        if self._resume:
+            since = min(self._resume.values())
+            self.watermark = since
+            frames.append(fund_market_dao.list_new_bars(list(self._resume), since, self.time_frame))
+        frames = [f for f in frames if not f.empty]
+        if frames:
+            history = pd.concat(frames, ignore_index=True)
+            self._dispatch(history.sort_values(['time', 'symbol'], kind='stable'))
+        elif self.watermark is None:
+            # 不带时区的日期按数据库会话时区解释
+            self.watermark = pd.Timestamp(end_date).tz_localize(config.DB_TIMEZONE)
+
+    def poll(self) -> int:
+        """查询一次 watermark 及之后的 K 线，分发其中未收到的，返回新 K 线数。"""
+        self.polls += 1
+        try:
+            bars = fund_market_dao.list_new_bars(self.symbols, self.watermark, self.time_frame)
+        except Exception as e:
+            print(f"Error fetching data: {e}")
+            return 0
+        if bars.empty:
+            return 0
+        return self._dispatch(bars)
+
+    def fetch(self, payloads: list) -> int:
+        """按通知的 (symbol, time) 只查询这些行并分发，返回新 K 线数；其它标的与周期的通知被忽略。"""
+        keys = {(p['symbol'], p['time']) for p in payloads
+                if p.get('symbol') in self._queues and p.get('time_frame') in (None, self.time_frame)}
+        if not keys:
+            return 0
+        symbols, times = zip(*sorted(keys))
+        try:
+            bars = fund_market_dao.list_bars(symbols, times, self.time_frame)
+        except Exception as e:
+            print(f"Error fetching data: {e}")
+            return 0
+        if bars.empty:
+            return 0
+        # 通知可能漏掉某些标的，watermark 只推进到各标的已分发时间的最小值，补齐轮询从这里开始
+        return self._dispatch(bars, advance=False)
+
+    def get(self, symbol: str, timeout: float = 0.0):
+        """取出 symbol 的下一根 K 线（dict），队列为空时最多等待 timeout 秒，仍没有则返回 None。"""
+        with self._cond:
+            queue = self._queues[symbol]
+            if not queue and timeout > 0:
+                self._cond.wait(timeout)
+            return queue.popleft() if queue else None
+
+    def pending(self, symbol: str) -> int:
+        return len(self._queues[symbol])
+
+    def _dispatch(self, bars: pd.DataFrame, advance: bool = True) -> int:
+        count = 0
+        with self._cond:
+            for row in bars.to_dict('records'):
+                symbol = row['symbol']
+                queue = self._queues.get(symbol)
+                last = self._last.get(symbol)
+                if queue is None or (last is not None and row['time'] <= last):
+                    continue
+                queue.append(row)
+                self._last[symbol] = row['time']
+                count += 1
+            latest = bars['time'].max() if advance else self._contiguous()
+            if latest is not None and (self.watermark is None or latest > self.watermark):
+                self.watermark = latest
+            if count:
+                # 查询包含 watermark 本身，只有已收到的行时不唤醒等待的 feed
+                self._cond.notify_all()
+        return count
+
+    def _contiguous(self):
+        """所有订阅标的都已分发过 K 线时，返回其中最早的最新时间，否则返回 None。"""
+        if len(self._last) < len(self._queues):
+            return None
+        return min(self._last[s] for s in self._queues)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.poll()
+
+    def _run_push(self) -> None:
+        listener = self.listener or MarketListener()
+        while not self._stop.is_set():
+            if not self.listening:
+                try:
+                    listener.connect()
+                    self.listening = True
+                except Exception as e:
+                    print(f"Listen failed, polling every {self.check_interval}s: {e}")
+                    if self._stop.wait(self.check_interval):
+                        break
+                    self.poll()
+                    continue
+                # 连接建立之前写入的 K 线收不到通知，轮询一次补齐
+                self.poll()
+            try:
+                payloads = listener.wait(_LISTEN_TIMEOUT)
+            except Exception as e:
+                print(f"Listen connection lost, fall back to polling: {e}")
+                listener.close()
+                self.listening = False
+                continue
+            if payloads:
+                self.fetch(payloads)
+        listener.close()
+        self.listening = False
@@ -0,0 +1,36 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from common import config
+
+_END = object()
+
+
+def prefetch(items, loader, workers: int = None, max_pending: int = None):
+    """
+    按 items 的顺序产出 (item, loader(item))，后续 item 在线程池中并发加载
+    同时在途（已提交未被消费）的任务最多 max_pending 个，消费慢时加载随之暂停，内存有界
+    """
+    workers = workers or config.PREFETCH_WORKERS
+    max_pending = max(max_pending or config.PREFETCH_MAX_PENDING, 1)
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def submit_next():
+            item = next(items, _END)
+            if item is not _END:
+                pending.append((item, pool.submit(loader, item)))
+
+        for _ in range(max_pending):
+            submit_next()
+        try:
+            while pending:
+                item, future = pending.popleft()
+                result = future.result()
+                # 先补充任务再交出结果，消费者处理时下一批仍在加载
+                submit_next()
+                yield item, result
+        finally:
+            for _, future in pending:
+                future.cancel()
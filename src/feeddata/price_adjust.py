@@ -0,0 +1,88 @@
+"""
+复权计算
+
+fund_adj 的复权因子按时间 as-of 对齐到每根 K 线（取不晚于该 K 线的最近一个因子），
+一次计算同时得到前复权与后复权价格，并按 (symbol, 因子内容, K 线内容) 的哈希缓存结果。
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+ADJUST_TYPES = ('forward', 'backward')
+
+_cache = OrderedDict()
+_cache_size = 4096
+
+
+def align_factors(times: pd.Series, fund_adjs: pd.DataFrame) -> np.ndarray:
+    """把复权因子 as-of 对齐到 times（需升序），首个因子之前的 K 线使用首个因子。"""
+    if fund_adjs is None or fund_adjs.empty:
+        return np.ones(len(times))
+    adjs = fund_adjs[['time', 'adj_factor']].sort_values('time')
+    adj_times = pd.to_datetime(adjs['time'], utc=True).to_numpy()
+    bar_times = pd.to_datetime(times, utc=True).to_numpy()
+    pos = np.searchsorted(adj_times, bar_times, side='right') - 1
+    return adjs['adj_factor'].to_numpy(dtype=float)[np.clip(pos, 0, None)]
+
+
+def adjust_prices(fund_markets: pd.DataFrame, fund_adjs: pd.DataFrame) -> dict:
+    """一次计算前复权与后复权价格，返回 {'forward': DataFrame, 'backward': DataFrame}。"""
+    fund_markets = fund_markets.sort_values('time')
+    factors = align_factors(fund_markets['time'], fund_adjs)
+    prices = fund_markets[list(PRICE_COLUMNS)].to_numpy(dtype=float)
+    backward = prices * factors[:, None]
+    latest = factors[-1] if len(factors) else 1.0
+    forward = backward / latest
+
+    result = {}
+    for adjust_type, values in (('forward', forward), ('backward', backward)):
+        frame = fund_markets.copy()
+        frame[list(PRICE_COLUMNS)] = values
+        result[adjust_type] = frame
+    return result
+
+
+def adjust_frame(symbol: str, fund_markets: pd.DataFrame, fund_adjs: pd.DataFrame, adjust_type: str) -> pd.DataFrame:
+    """返回指定复权方式的行情，adjust_type 为空时原样返回；结果按因子与 K 线内容缓存，返回缓存的副本。"""
+    if not adjust_type:
+        return fund_markets
+    if adjust_type not in ADJUST_TYPES:
+        raise ValueError(f"adjust_type must be one of {ADJUST_TYPES}, got {adjust_type!r}")
+    if fund_markets.empty:
+        return fund_markets
+
+    key = (symbol, factor_version(fund_adjs), _bars_version(fund_markets))
+    adjusted = _cache.get(key)
+    if adjusted is None:
+        adjusted = adjust_prices(fund_markets, fund_adjs)
+        _cache[key] = adjusted
+        if len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    # 调用方修改返回值不影响缓存
+    return adjusted[adjust_type].copy()
+
+
+def factor_version(fund_adjs: pd.DataFrame) -> tuple:
+    """因子的版本标识：条数与 time、adj_factor 的内容哈希，新增或修改任意一个因子都会使缓存失效。"""
+    if fund_adjs is None or fund_adjs.empty:
+        return (0, None)
+    return (len(fund_adjs), _content_hash(fund_adjs, ('time', 'adj_factor')))
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def _bars_version(fund_markets: pd.DataFrame) -> tuple:
+    """K 线的版本标识：条数与 time、close 的内容哈希，原地修正的 K 线也会使缓存失效。"""
+    return (len(fund_markets), _content_hash(fund_markets, ('time', 'close')))
+
+
+def _content_hash(frame: pd.DataFrame, columns: tuple) -> str:
+    hashes = pd.util.hash_pandas_object(frame[list(columns)], index=False).to_numpy()
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
@@ -0,0 +1,142 @@
+"""
+共享内存行情面板
+
+把整个标的池的 K 线按列拼接后放进一块 multiprocessing.shared_memory，
+子进程只凭 spec（块名、标的与偏移）挂接，拿到的是指向共享内存的只读 NumPy 视图，
+不再把每个 feed pickle 给每个进程。
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from feeddata.array_feed import FundArrayData, FundArrayIndicatorData, columns_from_frame
+
+BASE_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume', 'pct_chg')
+
+
+class SharedPanel:
+    """
+    owner 进程：panel = SharedPanel.create(frames)，用完 panel.close(); panel.unlink()
+    子进程：panel = SharedPanel.attach(spec)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, spec: dict, owner: bool = False):
+        self._shm = shm
+        self.spec = spec
+        self.owner = owner
+        self.symbols = spec['symbols']
+        self._offsets = np.asarray(spec['offsets'], dtype=np.int64)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        rows = spec['rows']
+        self._columns = {}
+        for k, column in enumerate(spec['columns']):
+            dtype = 'i8' if column == 'time' else 'f8'
+            view = np.ndarray((rows,), dtype=dtype, buffer=shm.buf, offset=k * rows * 8)
+            if not owner:
+                view.flags.writeable = False
+            self._columns[column] = view
+
+    @classmethod
+    def create(cls, frames: dict, extra_columns=()) -> 'SharedPanel':
+        """frames: {symbol: 行情 DataFrame}；extra_columns 为 frames 中额外放入面板的列（如预先算好的指标）。"""
+        symbols = list(frames)
+        columns = BASE_COLUMNS + tuple(extra_columns)
+        parts = {column: [] for column in columns}
+        lengths = []
+        for symbol in symbols:
+            frame = frames[symbol]
+            base = columns_from_frame(frame)
+            # columns_from_frame 按时间排序，额外的列按同样的顺序取
+            if 'time' in frame.columns:
+                frame = frame.sort_values('time')
+            for column in columns:
+                values = base[column] if column in base else frame[column].to_numpy(dtype='f8')
+                parts[column].append(values)
+            lengths.append(len(base['time']))
+
+        rows = int(sum(lengths))
+        offsets = np.r_[0, np.cumsum(lengths)].astype(np.int64)
+        shm = shared_memory.SharedMemory(create=True, size=max(len(columns) * rows * 8, 1))
+        spec = {
+            'name': shm.name,
+            'symbols': symbols,
+            'offsets': offsets.tolist(),
+            'rows': rows,
+            'columns': columns,
+        }
+        panel = cls(shm, spec, owner=True)
+        for column in columns:
+            if rows:
+                panel._columns[column][:] = np.concatenate(parts[column])
+        return panel
+
+    @classmethod
+    def attach(cls, spec: dict) -> 'SharedPanel':
+        try:
+            # Python 3.13+ 可以不交给 resource_tracker，避免子进程退出时误删共享内存
+            shm = shared_memory.SharedMemory(name=spec['name'], track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=spec['name'])
+        return cls(shm, spec)
+
+    @property
+    def columns(self) -> tuple:
+        return self.spec['columns']
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def column(self, symbol: str, column: str) -> np.ndarray:
+        i = self._index[symbol]
+        return self._columns[column][self._offsets[i]:self._offsets[i + 1]]
+
+    def symbol_columns(self, symbol: str, **renames) -> dict:
+        """
+        symbol 的各列视图，格式同 columns_from_frame，可直接交给 FundArrayData.set_columns
+        renames 把面板中的列映射为 feed 的列名，如 atr='atr_10'
+        """
+        i = self._index[symbol]
+        start, end = self._offsets[i], self._offsets[i + 1]
+        columns = {column: self._columns[column][start:end] for column in BASE_COLUMNS}
+        for name, column in renames.items():
+            columns[name] = self._columns[column][start:end]
+        return columns
+
+    def feeds(self, fromdate=None, todate=None, atr_column: str = None) -> list:
+        """按面板中的顺序为每个标的创建 feed；atr_column 非空时带上预先算好的 atr line。"""
+        feeds = []
+        kwargs = {k: v for k, v in (('fromdate', fromdate), ('todate', todate)) if v is not None}
+        for symbol in self.symbols:
+            if atr_column:
+                feed = FundArrayIndicatorData(name=symbol, **kwargs)
+                feed.set_columns(self.symbol_columns(symbol, atr=atr_column))
+            else:
+                feed = FundArrayData(name=symbol, **kwargs)
+                feed.set_columns(self.symbol_columns(symbol))
+            feeds.append(feed)
+        return feeds
+
+    def calendar(self) -> pd.DatetimeIndex:
+        """所有标的的并集交易日历（UTC）。"""
+        times = np.unique(self._columns['time'])
+        return pd.DatetimeIndex(times.astype('datetime64[ns]')).tz_localize('UTC')
+
+    def close(self) -> None:
+        self._columns = {}
+        try:
+            self._shm.close()
+        except BufferError:
+            # 仍有 feed 持有视图，进程退出时释放
+            pass
+
+    def unlink(self) -> None:
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
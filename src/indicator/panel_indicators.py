@@ -0,0 +1,106 @@
+"""
+批量指标
+
+加载行情时对整个标的池一次算好 ATR、SMA 等指标，作为额外的列写回各标的的行情，
+由 FundIndicatorData 作为 line 读入。策略直接读取 data.atr / data.sma，
+不再为每个标的创建 backtrader 指标对象。
+
+面板按标的左对齐（每行从各自的第一根 K 线开始，末尾以 NaN 补齐），
+这样递推类指标可以沿时间轴对所有标的同时计算；结果与 backtrader 同名指标一致。
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sma(close: np.ndarray, period: int) -> np.ndarray:
+    """简单移动平均，对应 bt.indicators.SMA；前 period - 1 根为 NaN。"""
+    close = np.asarray(close, dtype=float)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] < period:
+        return out
+    # 按窗口求均值而不是累加和相减，缺失值只影响所在的窗口
+    out[..., period - 1:] = sliding_window_view(close, period, axis=-1).mean(axis=-1)
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅，对应 bt.indicators.TrueRange；第一根没有前收盘价，为 NaN。"""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    prev = np.full(close.shape, np.nan)
+    prev[..., 1:] = close[..., :-1]
+    return np.maximum(high, prev) - np.minimum(low, prev)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """
+    平均真实波幅，对应 bt.indicators.ATR（Wilder 平滑）
+    以前 period 个真实波幅的均值为初值，之后 atr = atr[-1] * (1 - 1/period) + tr / period；前 period 根为 NaN
+    """
+    tr = true_range(high, low, close)
+    out = np.full(tr.shape, np.nan)
+    length = tr.shape[-1]
+    if length <= period:
+        return out
+    alpha = 1.0 / period
+    prev = tr[..., 1:period + 1].mean(axis=-1)
+    out[..., period] = prev
+    # 沿时间递推，每一步对所有标的做向量运算
+    for t in range(period + 1, length):
+        prev = prev * (1.0 - alpha) + tr[..., t] * alpha
+        out[..., t] = prev
+    return out
+
+
+# 支持的指标：名称 -> (以面板计算的函数, 用到的列)
+INDICATORS = {
+    'sma': (lambda panel, period: sma(panel['close'], period), ('close',)),
+    'atr': (lambda panel, period: atr(panel['high'], panel['low'], panel['close'], period), ('high', 'low', 'close')),
+}
+
+
+def left_aligned_panel(frames: list, columns) -> tuple:
+    """
+    把多个标的的行情拼成 {列名: symbols × 最大长度} 的左对齐面板，不足处为 NaN
+    同时返回每根 K 线在面板中的 (rows, cols)，用于把结果取回成拼接后的一维数组
+    """
+    lengths = np.array([len(f) for f in frames], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    # 每个元素在面板中的位置：第几行、行内第几列
+    rows = np.repeat(np.arange(len(frames)), lengths)
+    cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    panel = {}
+    for column in columns:
+        values = np.full((len(frames), width), np.nan)
+        if len(rows):
+            values[rows, cols] = np.concatenate([f[column].to_numpy(dtype=float) for f in frames])
+        panel[column] = values
+    return panel, rows, cols
+
+
+def add_indicator_columns(frames: dict, indicators: dict) -> dict:
+    """
+    frames: {symbol: 按时间升序的行情 DataFrame}
+    indicators: {指标名: 周期}，如 {'atr': 10, 'sma': 20}
+    返回新的 {symbol: DataFrame}，每个 DataFrame 增加以指标名命名的列
+    """
+    unknown = set(indicators) - set(INDICATORS)
+    if unknown:
+        raise ValueError(f"unknown indicators {sorted(unknown)}, supported: {sorted(INDICATORS)}")
+    if not frames or not indicators:
+        return frames
+    symbols = list(frames)
+    columns = sorted({c for name in indicators for c in INDICATORS[name][1]})
+    panel, rows, cols = left_aligned_panel([frames[s] for s in symbols], columns)
+
+    bounds = np.cumsum([len(frames[s]) for s in symbols])[:-1]
+    values = {
+        name: np.split(INDICATORS[name][0](panel, period)[rows, cols], bounds)
+        for name, period in indicators.items()
+    }
+    result = {}
+    for k, symbol in enumerate(symbols):
+        frame = frames[symbol].copy()
+        for name, parts in values.items():
+            frame[name] = parts[k]
+        result[symbol] = frame
+    return result
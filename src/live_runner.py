@@ -9,44 +9,48 @@ import time
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from feeddata.fund_live_feed import FundLiveData
+from feeddata.live_hub import LiveDataHub
+from broker.order_journal import OrderJournal
 from broker.sim_broker import SimBroker
+from broker import snapshot
+from strategy.live_test_strategy import TestStrategy
 
-class TestStrategy(bt.Strategy):
-    def next(self):
-        print(f'{self.data.datetime.datetime(0)} - Close: {self.data.close[0]}')
-        
-        # Simple Logic: Buy if close > open, Sell if close < open
-        if not self.position:
-            if self.data.close[0] > self.data.open[0]:
-                self.buy(size=100)
-        else:
-            if self.data.close[0] < self.data.open[0]:
-                self.sell(size=100)
-
-    def notify_order(self, order):
-        if order.status in [order.Completed]:
-            print(f'Order Completed: {order.executed.price}')
+# Broker/strategy/feed state is saved here; a restart resumes from it
+SNAPSHOT_PATH = 'live_snapshot.json'
+# Minimum seconds between snapshots (each save is an fsync); the last state is always saved on stop
+SNAPSHOT_INTERVAL = 60
+JOURNAL_PATH = 'live_orders.jsonl'
 
 def run_live():
     cerebro = bt.Cerebro()
     
-    # Use SimBroker
-    cerebro.broker = SimBroker()
+    # Use SimBroker; orders and fills are appended to a journal by a background writer
+    cerebro.broker = SimBroker(journal=OrderJournal(JOURNAL_PATH))
     
     # Add Strategy
     cerebro.addstrategy(TestStrategy)
+
+    # Restores cash, positions and open orders on start, saves them at most every SNAPSHOT_INTERVAL seconds
+    state = snapshot.load_snapshot(SNAPSHOT_PATH)
+    cerebro.addanalyzer(snapshot.LiveSnapshot, path=SNAPSHOT_PATH, interval=SNAPSHOT_INTERVAL)
+    if state:
+        print(f"Resuming from snapshot saved at {state['saved_at']}")
     
-    # Create Live Data
-    # Example symbol: '510300' (assuming it exists in DB)
-    data = FundLiveData(
-        symbol='510300',
+    # One hub polls the DB once per interval for every subscribed symbol
+    hub = LiveDataHub(
         time_frame='1d',
         lookback=50,
         check_interval=10, # Check every 10s for demo
-        live_start_date=None # Auto detect
+        live_start_date=None, # Auto detect
+        push=False # True: wake on NOTIFY (docs/fund_market_notify.sql), polling only as fallback
     )
-    
-    cerebro.adddata(data)
+
+    # Create Live Data
+    # Example symbol: '510300' (assuming it exists in DB)
+    for symbol in ['510300']:
+        # With a snapshot only bars after its last_dt are replayed
+        data = FundLiveData(symbol=symbol, hub=hub, resume=snapshot.feed_resume(state, symbol))
+        cerebro.adddata(data, name=symbol)
     
     print("Starting Live Simulation...")
     # live=True makes cerebro wait for new data
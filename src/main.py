@@ -12,21 +12,19 @@ from strategy.relative_strength_strategy import RelativeStrengthStrategy
 def run_backtest():
     # 创建Cerebro引擎
     cerebro = bt.Cerebro()
-    funds = fund_dao.list_fund(1000)
-    for index,fund in funds.iterrows():
-        code = fund['symbol']
-        data = fund_feeddata.load_data(
-                symbol=code,
-                start='2024-05-01',
-                end='2025-12-31',
-                time_frame='1d'
-            )
-        rows = len(data)
-        if (rows<30):
-            continue
+    # 先通过覆盖表筛掉行情不足的基金，再加载行情
+    funds = fund_dao.list_eligible('2024-05-01', '2025-12-31', min_bars=30, time_frame='1d', limit=1000)
+    feeds = fund_feeddata.load_range_feeds(
+        symbols=funds['symbol'].tolist(),
+        start='2024-05-01',
+        end='2025-12-31',
+        time_frame='1d',
+        min_bars=30
+    )
+    for code, data in feeds.items():
         # 添加数据到Cerebro
-        print(f"load {rows} rows for {code}")
-        cerebro.adddata(data = fund_feeddata.FundPandasData(dataname=data), name=code)
+        print(f"load {data.datalength} rows for {code}")
+        cerebro.adddata(data = data, name=code)
     cerebro.addstrategy(RelativeStrengthStrategy)
     
     cerebro.broker.setcash(100000.0)
@@ -0,0 +1,97 @@
+"""
+runner 共用的进程池：子进程挂接同一块共享内存面板（feeddata.shared_panel）执行任务
+
+任务函数的第一个参数为面板，如 optimize_runner.run_backtest(panel, params, ...)：
+workers=1 时在当前进程中直接以传入的面板执行，否则子进程在启动时挂接面板，
+任务只传递参数，不再 pickle 行情。
+"""
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+
+from feeddata.shared_panel import SharedPanel
+
+# 子进程挂接的共享面板，由 init_worker 设置
+_panel = None
+
+
+def init_worker(spec: dict) -> None:
+    global _panel
+    _panel = SharedPanel.attach(spec)
+
+
+def release_worker() -> None:
+    global _panel
+    if _panel is not None:
+        _panel.close()
+        _panel = None
+
+
+def call(fn, *args):
+    """在子进程中以挂接的面板执行 fn(panel, *args)。"""
+    return fn(_panel, *args)
+
+
+def safe(fn, *args):
+    """执行 fn，异常作为返回值，单个任务失败不中断整批任务。"""
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+
+def executor(panel: SharedPanel, workers: int = None):
+    """返回挂接了面板的执行器，提交 call(fn, *args)；workers=1 时为当前进程中的串行执行器。"""
+    if workers == 1:
+        return SerialExecutor(panel.spec)
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(panel.spec,))
+
+
+def run_tasks(panel: SharedPanel, fn, tasks, workers: int = None):
+    """
+    tasks 为 (key, args) 序列，逐个产出 (key, fn(panel, *args) 或异常)
+    进程池中按提交顺序开始执行、按完成顺序产出；workers=1 时按 tasks 顺序串行执行
+    """
+    if workers == 1:
+        for key, args in tasks:
+            yield key, safe(fn, panel, *args)
+        return
+    with executor(panel, workers) as pool:
+        futures = {pool.submit(call, fn, *args): key for key, args in tasks}
+        for future in as_completed(futures):
+            yield futures[future], safe(future.result)
+
+
+def collect(results, total: int, done: int = 0, describe=None):
+    """打印每个任务的进度，失败的任务只打印错误，产出成功的 (key, result)。"""
+    started = time.perf_counter()
+    for key, result in results:
+        done += 1
+        elapsed = time.perf_counter() - started
+        if isinstance(result, Exception):
+            print(f'[{done}/{total}] {key} failed: {result!r}')
+            continue
+        detail = f' {describe(result)}' if describe else ''
+        print(f'[{done}/{total}] {key}{detail} ({elapsed:.0f}s)')
+        yield key, result
+
+
+class SerialExecutor:
+    """与进程池相同接口的串行执行器，在当前进程中挂接共享内存执行，便于调试。"""
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+
+    def __enter__(self):
+        init_worker(self.spec)
+        return self
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __exit__(self, *exc):
+        release_worker()
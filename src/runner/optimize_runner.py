@@ -0,0 +1,214 @@
+"""
+参数寻优
+
+行情只加载一次放进共享内存（feeddata.shared_panel），参数网格分发给进程池，
+子进程挂接共享内存创建 feed，不再像 optstrategy 那样把所有 feed pickle 给每个进程。
+每组参数跑完立即追加到结果 CSV，中途崩溃后重新运行会跳过已完成的参数。
+
+    python -m runner.optimize_runner --bars 500 --workers 8 --output optimize_results.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+
+import backtrader as bt
+import pandas as pd
+
+from commission.fund_commission import FundCommission
+from database import bar_cache
+from database import fund_dao
+from database import fund_market_dao
+from feeddata.fund_feeddata import to_feed_frame
+from feeddata.shared_panel import SharedPanel
+from indicator import panel_indicators
+from runner import _pool
+from strategy.relative_strength_strategy import RelativeStrengthStrategy
+
+PARAM_GRID = {
+    'rebalance_period': [5, 10, 20],
+    'num_top': [3, 5, 10],
+    'corr_threshold': [0.7, 0.8, 0.9],
+    'stop_loss_pct': [1, 2, 3],
+}
+METRICS = ('sharpe', 'total_return', 'max_drawdown', 'final_value')
+
+
+def param_grid(grid: dict) -> list:
+    """网格展开为参数字典列表，顺序固定。"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def atr_column(period: int) -> str:
+    return f'atr_{period}'
+
+
+def load_universe(end: str, bars: int, time_frame: str = '1d', atr_periods=()) -> dict:
+    """加载行情不少于 bars 根的基金，并为每个 ATR 周期预先算好 atr_{period} 列。"""
+    funds = fund_dao.list_eligible(None, end, min_bars=bars, time_frame=time_frame, limit=10000)
+    fund_markets = bar_cache.market_dao().list_by_symbols_limit(
+        symbols=funds['symbol'].tolist(),
+        end_date=end,
+        limit=bars,
+        time_frame=time_frame
+    )
+    groups = fund_market_dao.split_by_symbol(fund_markets)
+    frames = {s: to_feed_frame(g) for s, g in groups.items() if len(g) >= bars}
+    return add_atr_columns(frames, atr_periods)
+
+
+def add_atr_columns(frames: dict, atr_periods) -> dict:
+    for period in sorted(set(atr_periods)):
+        frames = panel_indicators.add_indicator_columns(frames, {'atr': period})
+        for frame in frames.values():
+            frame.rename(columns={'atr': atr_column(period)}, inplace=True)
+    return frames
+
+
+def create_panel(frames: dict, atr_periods=()) -> SharedPanel:
+    return SharedPanel.create(frames, extra_columns=[atr_column(p) for p in sorted(set(atr_periods))])
+
+
+def run_backtest(panel: SharedPanel, params: dict, cash: float = 1000000.0,
+                 fromdate=None, todate=None, timereturn: bool = False) -> dict:
+    """
+    用面板中的全部标的跑一次 RelativeStrengthStrategy，返回指标
+    timereturn 为 True 时额外返回逐日收益 {'returns': pd.Series}
+    """
+    period = params.get('rebalance_period', RelativeStrengthStrategy.params.rebalance_period)
+    use_atr = atr_column(period) in panel.columns
+    cerebro = bt.Cerebro(stdstats=False)
+    for feed in panel.feeds(fromdate=fromdate, todate=todate, atr_column=atr_column(period) if use_atr else None):
+        cerebro.adddata(feed, name=feed._name)
+    cerebro.addstrategy(RelativeStrengthStrategy, printlog=False, precomputed_atr=use_atr, **params)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.set_checksubmit(True)
+    cerebro.broker.set_shortcash(False)
+    cerebro.broker.addcommissioninfo(FundCommission())
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+    cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    if timereturn:
+        cerebro.addanalyzer(bt.analyzers.TimeReturn, _name='timereturn', timeframe=bt.TimeFrame.Days)
+
+    strat = cerebro.run()[0]
+    sharpe = strat.analyzers.sharpe.get_analysis().get('sharperatio')
+    result = {
+        'sharpe': float('nan') if sharpe is None else sharpe,
+        'total_return': strat.analyzers.returns.get_analysis().get('rtot', 0.0),
+        'max_drawdown': strat.analyzers.drawdown.get_analysis().get('max', {}).get('drawdown', 0.0),
+        'final_value': cerebro.broker.getvalue(),
+    }
+    if timereturn:
+        result['returns'] = pd.Series(strat.analyzers.timereturn.get_analysis(), dtype=float)
+    return result
+
+
+def optimize(panel: SharedPanel, grid: dict, output: str, workers: int = None, cash: float = 1000000.0) -> pd.DataFrame:
+    """
+    在进程池中跑完 grid 的所有参数组合，结果逐行追加到 output（CSV）
+    output 中已有的参数组合会被跳过；返回按 sharpe 降序的完整结果表
+    """
+    names = list(grid)
+    combos = param_grid(grid)
+    done = _completed(output, names)
+    todo = [p for p in combos if _key(p, names) not in done]
+    total = len(combos)
+    print(f'{total} parameter sets, {total - len(todo)} already in {output}, {len(todo)} to run')
+
+    results = _pool.run_tasks(panel, run_backtest, ((params, (params, cash)) for params in todo), workers)
+    with _ResultWriter(output, names) as writer:
+        # 失败的参数不写入结果，重新运行时会再试
+        for params, result in _pool.collect(results, total, total - len(todo), describe=_describe):
+            writer.write(params, result)
+
+    table = pd.read_csv(output, float_precision='round_trip') if os.path.exists(output) else pd.DataFrame(columns=names + list(METRICS))
+    return table.sort_values('sharpe', ascending=False, na_position='last').reset_index(drop=True)
+
+
+def _describe(result: dict) -> str:
+    return (f"sharpe={result['sharpe']:.3f} return={result['total_return']:.2%} "
+            f"drawdown={result['max_drawdown']:.2f}%")
+
+
+def _key(params: dict, names: list) -> tuple:
+    """参数组合的键：每个值按写入 CSV 的文本比较，字符串参数（如 rebalance_rule）同样适用。"""
+    return tuple(_canonical(params[n]) for n in names)
+
+
+def _canonical(value) -> str:
+    # 与 csv 模块写入的文本一致
+    return '' if value is None else str(value)
+
+
+def _truncate_partial_line(output: str) -> None:
+    """崩溃时可能留下写了一半的最后一行，截掉它再继续追加。"""
+    if not os.path.exists(output):
+        return
+    with open(output, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def _completed(output: str, names: list) -> set:
+    _truncate_partial_line(output)
+    if not os.path.exists(output) or os.path.getsize(output) == 0:
+        return set()
+    # 按文本读取，避免 5 与 5.0、'weekly' 与数值之间的类型转换
+    table = pd.read_csv(output, dtype=str, keep_default_na=False)
+    if table.empty:
+        return set()
+    return {tuple(row) for row in table[names].itertuples(index=False)}
+
+
+class _ResultWriter:
+    """逐行追加结果并刷盘，进程崩溃时已完成的行不会丢失。"""
+
+    def __init__(self, output: str, names: list):
+        self.output = output
+        self.fields = names + list(METRICS)
+
+    def __enter__(self):
+        _truncate_partial_line(self.output)
+        new = not os.path.exists(self.output) or os.path.getsize(self.output) == 0
+        self._file = open(self.output, 'a', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields)
+        if new:
+            self._writer.writeheader()
+        return self
+
+    def write(self, params: dict, result: dict) -> None:
+        row = dict(params)
+        row.update({m: result[m] for m in METRICS})
+        self._writer.writerow(row)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RelativeStrengthStrategy 参数寻优')
+    parser.add_argument('--end', default=pd.Timestamp.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--bars', type=int, default=500)
+    parser.add_argument('--time-frame', dest='time_frame', default='1d')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cash', type=float, default=1000000.0)
+    parser.add_argument('--output', default='optimize_results.csv')
+    args = parser.parse_args()
+
+    atr_periods = PARAM_GRID['rebalance_period']
+    frames = load_universe(args.end, args.bars, args.time_frame, atr_periods)
+    print(f'load {len(frames)} funds with {args.bars} bars')
+    with create_panel(frames, atr_periods) as panel:
+        del frames
+        table = optimize(panel, PARAM_GRID, args.output, workers=args.workers, cash=args.cash)
+    print('\n=== top 10 by sharpe ===')
+    print(table.head(10).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
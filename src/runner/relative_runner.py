@@ -1,3 +1,7 @@
+import argparse
+import resource
+import sys
+
 import backtrader as bt
 from feeddata import fund_feeddata
 from database import fund_dao
@@ -6,28 +10,53 @@ from commission.fund_commission import FundCommission
 import pandas as pd
 from strategy.relative_strength_strategy import RelativeStrengthStrategy
 
-def run_backtest():
+# 省内存模式下 feed 只保留的列：撮合用到开高低收，策略用到 pct_chg 与预先算好的 atr
+LOW_MEMORY_COLUMNS = ('open', 'high', 'low', 'close', 'pct_chg', 'atr')
+
+
+def peak_rss_mb() -> float:
+    """进程的峰值常驻内存（MB），Linux 上 ru_maxrss 单位为 KB，macOS 上为字节。"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_backtest(low_memory: bool = False):
+    """
+    low_memory 为 True 时：exactbars=1 只保留指标与策略声明的最小历史（不预加载），
+    feed 只保留 LOW_MEMORY_COLUMNS 并转为 NumPy 列（FundArrayData），不持有 DataFrame，
+    不添加 observer、不画图；相关性引擎默认关闭，调仓时只对候选计算 np.corrcoef
+    """
     bars=500
     cash = 1000000.0
     end = pd.Timestamp.now()
-    funds = fund_dao.list_fund(10000)
-    cerebro = bt.Cerebro()
-    
-    for _,fund in funds.iterrows():
-        code = fund['symbol']
-        data = fund_feeddata.FundPandasData(name = code)
-        data.load_data(symbol=code, end=end.strftime('%Y-%m-%d'), bars=bars, time_frame='1d')
-        rows = data.datalength
-        if (rows<bars):
-            continue
-        print(f"load {rows} rows for {code}")
+    # 先通过覆盖表筛掉行情不足 bars 根的基金，再加载行情
+    funds = fund_dao.list_eligible(None, end.strftime('%Y-%m-%d'), min_bars=bars, time_frame='1d', limit=10000)
+    # exactbars=1 时 line 只保留最小历史，画图需要完整历史，因此同时关闭默认 observer
+    cerebro = bt.Cerebro(exactbars=1, stdstats=False) if low_memory else bt.Cerebro()
+
+    feeds = fund_feeddata.prefetch_feeds(
+        symbols=funds['symbol'].tolist(),
+        end=end.strftime('%Y-%m-%d'),
+        bars=bars,
+        time_frame='1d',
+        min_bars=bars,
+        # ATR 在加载时整批计算，策略不再为每个标的创建指标对象
+        indicators={'atr': RelativeStrengthStrategy.params.rebalance_period},
+        columns=LOW_MEMORY_COLUMNS if low_memory else None,
+        array=low_memory
+    )
+    loaded = 0
+    for code, data in feeds:
         cerebro.adddata(data = data, name=code)
-    cerebro.addstrategy(RelativeStrengthStrategy)
+        loaded += 1
+    print(f"load {loaded} funds with {bars} bars")
+    cerebro.addstrategy(RelativeStrengthStrategy, precomputed_atr=True)
     cerebro.broker.setcash(cash)
     cerebro.broker.set_checksubmit(True)
     cerebro.broker.set_shortcash(False)
     cerebro.broker.addcommissioninfo(FundCommission())
-    cerebro.addobserver(EquityObserver)
+    if not low_memory:
+        cerebro.addobserver(EquityObserver)
 
 
     cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
@@ -48,6 +77,10 @@ def run_backtest():
     # Backtrader DrawDown 返回的是百分比点值（0-100），不需要再乘以 100
     print(f'max drawdown: {strat.analyzers.drawdown.get_analysis().get("max", {}).get("drawdown", 0):.2f}%')
     
+    print(f'peak rss: {peak_rss_mb():.1f} MB')
+    if low_memory:
+        return
+
     for data in cerebro.datas:
         data.plotinfo.plot = False
     
@@ -61,4 +94,8 @@ def run_backtest():
 
 
 if __name__ == '__main__':
-    run_backtest()
+    parser = argparse.ArgumentParser(description='RelativeStrengthStrategy 回测')
+    parser.add_argument('--low-memory', dest='low_memory', action='store_true',
+                        help='exactbars=1、精简的 NumPy 列 feed、不画图，用于很大的标的池')
+    args = parser.parse_args()
+    run_backtest(low_memory=args.low_memory)
@@ -0,0 +1,138 @@
+"""
+按标的分片的批量回测
+
+单标的策略（SimpleMovingAverageStrategy、strategy.live_test_strategy.TestStrategy）在每个标的上相互独立，
+把 fund_dao.list_fund 的标的池拆给进程池：行情只加载一次放进共享内存（feeddata.shared_panel），
+每个标的是一个小任务，子进程用自己的 Cerebro 只跑这一个标的，结果合并成一张表。
+任务按 K 线数从多到少提交，空闲的进程从同一个队列取下一个任务，
+历史长短不一时不会出现某个进程分到一大片长历史、其它进程早早空闲的情况。
+
+    python -m runner.sharded_runner --limit 1000 --bars 500 --workers 8 --output sharded_results.csv
+"""
+import argparse
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from commission.fund_commission import FundCommission
+from database import bar_cache
+from database import fund_dao
+from database import fund_market_dao
+from feeddata.array_feed import FundArrayData
+from feeddata.fund_feeddata import to_feed_frame
+from feeddata.shared_panel import SharedPanel
+from runner import _pool
+from strategy.live_test_strategy import TestStrategy
+from strategy.simple_ma_strategy import SimpleMovingAverageStrategy
+
+STRATEGIES = {
+    'sma': SimpleMovingAverageStrategy,
+    'live_test': TestStrategy,
+}
+COLUMNS = ('symbol', 'bars', 'final_value', 'total_return', 'sharpe', 'max_drawdown', 'trades', 'won', 'elapsed')
+
+
+def load_universe(limit: int, end: str, bars: int, time_frame: str = '1d', min_bars: int = 1) -> dict:
+    """fund_dao.list_fund 的前 limit 个基金，截至 end 的最近 bars 根 K 线，一次批量查询。"""
+    funds = fund_dao.list_fund(limit=limit)
+    fund_markets = bar_cache.market_dao().list_by_symbols_limit(
+        symbols=funds['symbol'].tolist(),
+        end_date=end,
+        limit=bars,
+        time_frame=time_frame
+    )
+    groups = fund_market_dao.split_by_symbol(fund_markets)
+    return {s: to_feed_frame(g) for s, g in groups.items() if len(g) >= min_bars}
+
+
+def run_symbol(panel: SharedPanel, symbol: str, strategy: str = 'sma', params: dict = None,
+               cash: float = 100000.0) -> dict:
+    """用独立的 Cerebro 在单个标的上跑一次策略，返回一行结果。"""
+    started = time.perf_counter()
+    feed = FundArrayData(name=symbol)
+    feed.set_columns(panel.symbol_columns(symbol))
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed, name=symbol)
+    strategy_class = STRATEGIES[strategy]
+    params = dict(params or {})
+    if 'printlog' in strategy_class.params._getkeys():
+        params.setdefault('printlog', False)
+    cerebro.addstrategy(strategy_class, **params)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.set_checksubmit(True)
+    cerebro.broker.set_shortcash(False)
+    cerebro.broker.addcommissioninfo(FundCommission())
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+    cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
+
+    strat = cerebro.run()[0]
+    sharpe = strat.analyzers.sharpe.get_analysis().get('sharperatio')
+    trades = strat.analyzers.trades.get_analysis()
+    return {
+        'symbol': symbol,
+        'bars': len(feed),
+        'final_value': cerebro.broker.getvalue(),
+        'total_return': strat.analyzers.returns.get_analysis().get('rtot', 0.0),
+        'sharpe': float('nan') if sharpe is None else sharpe,
+        'max_drawdown': strat.analyzers.drawdown.get_analysis().get('max', {}).get('drawdown', 0.0),
+        'trades': trades.get('total', {}).get('closed', 0),
+        'won': trades.get('won', {}).get('total', 0),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def run_shards(panel: SharedPanel, strategy: str = 'sma', params: dict = None, workers: int = None,
+               cash: float = 100000.0) -> pd.DataFrame:
+    """
+    面板中的每个标的各跑一次，返回按面板顺序排列的结果表（列见 COLUMNS）
+    失败的标的打印错误后跳过；workers=1 时在当前进程中串行执行
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r}, supported: {sorted(STRATEGIES)}")
+    symbols = longest_first(panel)
+    # 进程池按提交顺序出队，最长的任务最先开始，最后剩下的都是短任务
+    tasks = ((s, (s, strategy, params, cash)) for s in symbols)
+    results = _pool.run_tasks(panel, run_symbol, tasks, workers)
+    rows = dict(_pool.collect(results, len(symbols), describe=_describe))
+    return pd.DataFrame([rows[s] for s in panel.symbols if s in rows], columns=list(COLUMNS))
+
+
+def longest_first(panel: SharedPanel) -> list:
+    """按 K 线数从多到少排列的标的，数量相同时保持面板顺序。"""
+    lengths = np.diff(np.asarray(panel.spec['offsets'], dtype=np.int64))
+    return [panel.symbols[i] for i in np.argsort(-lengths, kind='stable')]
+
+
+def _describe(result: dict) -> str:
+    return f"bars={result['bars']} return={result['total_return']:.2%} trades={result['trades']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='单标的策略按标的分片批量回测')
+    parser.add_argument('--strategy', default='sma', choices=sorted(STRATEGIES))
+    parser.add_argument('--limit', type=int, default=1000, help='fund_dao.list_fund 取前多少个基金')
+    parser.add_argument('--end', default=pd.Timestamp.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--bars', type=int, default=500)
+    parser.add_argument('--min-bars', dest='min_bars', type=int, default=30)
+    parser.add_argument('--time-frame', dest='time_frame', default='1d')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cash', type=float, default=100000.0)
+    parser.add_argument('--output', default='sharded_results.csv')
+    args = parser.parse_args()
+
+    frames = load_universe(args.limit, args.end, args.bars, args.time_frame, args.min_bars)
+    print(f'load {len(frames)} funds with up to {args.bars} bars')
+    with SharedPanel.create(frames) as panel:
+        del frames
+        table = run_shards(panel, args.strategy, workers=args.workers, cash=args.cash)
+    table.to_csv(args.output, index=False)
+    print('\n=== top 10 by total return ===')
+    print(table.sort_values('total_return', ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+滚动前推（walk-forward）分析
+
+把历史按交易日历切成滚动的 训练/测试 窗口：每个训练窗口上做参数寻优，
+取最优参数在紧随其后的测试窗口上回测，得到每一折与拼接后的样本外资金曲线。
+行情只加载一次放进共享内存，所有折的训练与测试任务在同一个进程池中并行，
+某一折的训练全部完成后立即提交它的测试。
+
+    python -m runner.walkforward_runner --bars 1000 --train-bars 250 --test-bars 60 --workers 8
+"""
+import argparse
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+from runner import _pool, optimize_runner
+from runner.optimize_runner import PARAM_GRID, param_grid
+from strategy.relative_strength_strategy import RelativeStrengthStrategy
+
+# 浮点日期数值的误差，窗口边界向外放宽 1 秒，保证边界 K 线被包含
+_EDGE = pd.Timedelta(seconds=1)
+
+
+def make_folds(calendar: pd.DatetimeIndex, train_bars: int, test_bars: int, step: int = None) -> list:
+    """按交易日历切分滚动窗口，每折为 {'train': (起, 止), 'test': (起, 止)} 的日历下标，只保留完整的折。"""
+    step = step or test_bars
+    folds = []
+    for start in range(0, len(calendar) - train_bars - test_bars + 1, step):
+        train_end = start + train_bars - 1
+        folds.append({
+            'train': (start, train_end),
+            'test': (train_end + 1, train_end + test_bars),
+        })
+    return folds
+
+
+def warmup_bars(params: dict) -> int:
+    """策略开始交易前需要的 K 线数：相关性窗口与 ATR 预热。"""
+    defaults = RelativeStrengthStrategy.params
+    return (params.get('correlation_period', defaults.correlation_period)
+            + params.get('rebalance_period', defaults.rebalance_period) + 1)
+
+
+def walk_forward(panel, grid: dict, train_bars: int, test_bars: int, step: int = None,
+                 workers: int = None, cash: float = 1000000.0, metric: str = 'sharpe') -> dict:
+    """
+    返回 {'folds': 每折结果 DataFrame, 'returns': 拼接的样本外逐日收益, 'equity': 样本外资金曲线}
+    训练与测试窗口都向前多取 warmup_bars 根 K 线预热，测试收益只统计测试窗口内的部分
+    失败的回测只打印错误：训练时跳过该组参数，某折的参数全部失败或测试失败时该折只记录 error，不参与拼接
+    """
+    calendar = panel.calendar().tz_localize(None)
+    folds = make_folds(calendar, train_bars, test_bars, step)
+    if not folds:
+        raise ValueError(f"calendar has {len(calendar)} bars, need at least {train_bars + test_bars}")
+    combos = param_grid(grid)
+    total = len(folds) * (len(combos) + 1)
+    print(f'{len(folds)} folds x {len(combos)} parameter sets, {total} backtests')
+
+    train_results = {i: [] for i in range(len(folds))}
+    fold_rows = [{
+        'fold': i,
+        'train_start': calendar[fold['train'][0]], 'train_end': calendar[fold['train'][1]],
+        'test_start': calendar[fold['test'][0]], 'test_end': calendar[fold['test'][1]],
+    } for i, fold in enumerate(folds)]
+    fold_returns = [None] * len(folds)
+
+    with _pool.executor(panel, workers) as pool:
+        pending = {}
+        for i, fold in enumerate(folds):
+            for k, params in enumerate(combos):
+                start = max(fold['train'][0] - warmup_bars(params), 0)
+                fromdate, todate = _window(calendar, start, fold['train'][1])
+                future = pool.submit(_pool.call, optimize_runner.run_backtest, params, cash, fromdate, todate)
+                pending[future] = ('train', i, (k, params))
+
+        done_count = 0
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, i, params = pending.pop(future)
+                result = _pool.safe(future.result)
+                done_count += 1
+                fold = folds[i]
+                if isinstance(result, Exception):
+                    print(f'[{done_count}/{total}] fold {i} {kind} {params} failed: {result!r}')
+                    if kind == 'test':
+                        fold_rows[i]['error'] = repr(result)
+                if kind == 'train':
+                    train_results[i].append((params, result))
+                    if len(train_results[i]) < len(combos):
+                        continue
+                    # 这一折训练完成，提交样本外测试
+                    succeeded = [r for r in train_results[i] if not isinstance(r[1], Exception)]
+                    if not succeeded:
+                        fold_rows[i]['error'] = f'all {len(combos)} parameter sets failed'
+                        continue
+                    best, best_result = _best(sorted(succeeded, key=lambda r: r[0][0]), metric)
+                    start = max(fold['test'][0] - warmup_bars(best), 0)
+                    fromdate, todate = _window(calendar, start, fold['test'][1])
+                    test = pool.submit(_pool.call, optimize_runner.run_backtest, best, cash, fromdate, todate, True)
+                    pending[test] = ('test', i, best)
+                    fold_rows[i].update({'params': best, f'train_{metric}': best_result[metric]})
+                    print(f"[{done_count}/{total}] fold {i} trained, best {best} {metric}={best_result[metric]:.3f}")
+                elif not isinstance(result, Exception):
+                    test_start, test_end = calendar[fold['test'][0]], calendar[fold['test'][1]]
+                    returns = result['returns']
+                    # TimeReturn 的日收益以当天 23:59:59 为键，按日期比较
+                    days = returns.index.normalize()
+                    returns = returns[(days >= test_start.normalize()) & (days <= test_end.normalize())]
+                    fold_returns[i] = returns
+                    fold_rows[i].update(_summary(returns))
+                    print(f"[{done_count}/{total}] fold {i} {test_start.date()}~{test_end.date()} "
+                          f"{params} return={fold_rows[i]['test_return']:.2%} "
+                          f"drawdown={fold_rows[i]['test_max_drawdown']:.2f}%")
+
+    fold_returns = [r for r in fold_returns if r is not None]
+    returns = pd.concat(fold_returns).sort_index() if fold_returns else pd.Series(dtype=float)
+    # 相邻测试窗口不重叠（step >= test_bars）时每天只有一个收益；重叠时保留较早一折的结果
+    returns = returns[~returns.index.duplicated(keep='first')]
+    table = pd.DataFrame(fold_rows, columns=[
+        'fold', 'train_start', 'train_end', 'test_start', 'test_end', 'params',
+        f'train_{metric}', 'test_return', 'test_max_drawdown', 'error',
+    ])
+    return {'folds': table, 'returns': returns, 'equity': cash * (1 + returns).cumprod()}
+
+
+def _window(calendar: pd.DatetimeIndex, start: int, end: int) -> tuple:
+    return calendar[start] - _EDGE, calendar[end] + _EDGE
+
+
+def _best(results: list, metric: str) -> tuple:
+    """results 为按网格顺序排列的 ((序号, 参数), 结果)，按 metric 取最优，NaN 视为最差；并列时取网格中靠前的。"""
+    def score(item):
+        value = item[1][metric]
+        return -np.inf if value is None or np.isnan(value) else value
+    (_, params), result = max(results, key=score)
+    return params, result
+
+
+def _summary(returns: pd.Series) -> dict:
+    equity = (1 + returns).cumprod()
+    drawdown = 1 - equity / equity.cummax() if len(equity) else pd.Series(dtype=float)
+    return {
+        'test_return': float(equity.iloc[-1] - 1) if len(equity) else 0.0,
+        # 与 backtrader DrawDown 一致，用百分比点值
+        'test_max_drawdown': float(drawdown.max() * 100) if len(drawdown) else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RelativeStrengthStrategy 滚动前推分析')
+    parser.add_argument('--end', default=pd.Timestamp.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--bars', type=int, default=1000)
+    parser.add_argument('--time-frame', dest='time_frame', default='1d')
+    parser.add_argument('--train-bars', dest='train_bars', type=int, default=250)
+    parser.add_argument('--test-bars', dest='test_bars', type=int, default=60)
+    parser.add_argument('--step', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cash', type=float, default=1000000.0)
+    parser.add_argument('--metric', default='sharpe', choices=['sharpe', 'total_return', 'final_value'])
+    parser.add_argument('--output', default='walkforward')
+    args = parser.parse_args()
+
+    atr_periods = PARAM_GRID['rebalance_period']
+    frames = optimize_runner.load_universe(args.end, args.bars, args.time_frame, atr_periods)
+    print(f'load {len(frames)} funds with {args.bars} bars')
+    with optimize_runner.create_panel(frames, atr_periods) as panel:
+        del frames
+        result = walk_forward(panel, PARAM_GRID, args.train_bars, args.test_bars, args.step,
+                              workers=args.workers, cash=args.cash, metric=args.metric)
+
+    folds = result['folds']
+    folds.to_csv(f'{args.output}_folds.csv', index=False)
+    result['equity'].rename('equity').to_csv(f'{args.output}_equity.csv', index_label='time')
+    print('\n=== folds ===')
+    print(folds.to_string(index=False))
+    summary = _summary(result['returns'])
+    print(f"\nout-of-sample return: {summary['test_return']:.2%}, max drawdown: {summary['test_max_drawdown']:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import backtrader as bt
+
+
+class TestStrategy(bt.Strategy):
+    """
+    实盘演示策略（live_runner）
+    收盘价高于开盘价且空仓时买入 100 份，持仓时收盘价低于开盘价卖出 100 份
+    """
+
+    def next(self):
+        print(f'{self.data.datetime.datetime(0)} - Close: {self.data.close[0]}')
+
+        # Simple Logic: Buy if close > open, Sell if close < open
+        if not self.position:
+            if self.data.close[0] > self.data.open[0]:
+                self.buy(size=100)
+        else:
+            if self.data.close[0] < self.data.open[0]:
+                self.sell(size=100)
+
+    def notify_order(self, order):
+        if order.status in [order.Completed]:
+            print(f'Order Completed: {order.executed.price}')
@@ -0,0 +1,153 @@
+"""
+调仓日程
+
+按所有标的的并集交易日历预先算出调仓的 K 线时间，存成集合，每根 K 线只需 O(1) 查表。
+交易日按 tz 所在时区的日期划分（feed 的时间是 UTC，A 股的日线落在前一天 16:00 UTC）。
+支持的规则：
+- 'days'：每 period 个交易日调仓一次（从日历第一天开始）
+- 'weekly'：每周 weekday（0=周一）调仓，当天休市则顺延到之后的第一个交易日
+- 'month_end'：每月最后一个交易日调仓
+
+行情未预加载（如 exactbars 省内存模式）时没有完整日历，改为逐根 K 线增量判断：
+'days' 与 'weekly' 结果不变，'month_end' 以当月最后一个工作日为准，错过时在次月第一个交易日补调。
+"""
+import numpy as np
+import pandas as pd
+
+RULES = ('days', 'weekly', 'month_end')
+
+# backtrader date2num 的 1970-01-01
+_EPOCH_NUM = 719163
+
+
+def day_numbers(values, tz: str = None) -> np.ndarray:
+    """backtrader 的浮点时间（UTC）转为 tz 时区下的整数日，tz 为空时按 UTC 日期。"""
+    values = np.asarray(values, dtype=float)
+    if tz is None:
+        return np.floor(values).astype(np.int64)
+    # 浮点日期数值在当前量级只有约 10 微秒精度，先取整到毫秒，避免 0 点前后被划到前一天
+    ms = np.round((values - _EPOCH_NUM) * 86400e3).astype(np.int64)
+    local = pd.DatetimeIndex(ms.astype('datetime64[ms]')).tz_localize('UTC').tz_convert(tz).tz_localize(None)
+    return local.to_numpy().astype('datetime64[D]').astype(np.int64) + _EPOCH_NUM
+
+
+def schedule(days: np.ndarray, rule: str = 'days', period: int = 10, weekday: int = 4) -> np.ndarray:
+    """days 为升序、去重的整数日，返回同长度的布尔数组，True 为调仓日。"""
+    days = np.asarray(days, dtype=np.int64)
+    if len(days) == 0:
+        return np.zeros(0, dtype=bool)
+    if rule == 'days':
+        return np.arange(len(days)) % period == 0
+    if rule == 'weekly':
+        # 不晚于当天的最近一个 weekday，晚于上一个交易日即调仓
+        anchors = _weekly_anchor(days, weekday)
+        previous = np.r_[days[0] - 1, days[:-1]]
+        return anchors > previous
+    if rule == 'month_end':
+        months = _months(days)
+        due = np.r_[months[1:] != months[:-1], False]
+        # 日历最后一天后面没有数据，按是否已到当月最后一个工作日判断
+        due[-1] = days[-1] >= _last_busday(months[-1:])[0]
+        return due
+    raise ValueError(f"rule must be one of {RULES}, got {rule!r}")
+
+
+class RebalanceScheduler:
+    """
+    scheduler = RebalanceScheduler('weekly', weekday=4, tz='Asia/Shanghai')
+    scheduler.build_from_datas(self.datas)
+    ...
+    if scheduler.advance(self.datetime[0]): 调仓
+    """
+
+    def __init__(self, rule: str = 'days', period: int = 10, weekday: int = 4, tz: str = None):
+        if rule not in RULES:
+            raise ValueError(f"rule must be one of {RULES}, got {rule!r}")
+        if period < 1:
+            raise ValueError(f"period must be >= 1, got {period}")
+        if not 0 <= weekday <= 6:
+            raise ValueError(f"weekday must be in 0..6, got {weekday}")
+        self.rule = rule
+        self.period = period
+        self.weekday = weekday
+        self.tz = tz
+        self._due_times = None
+        self._last_day = None
+        self._count = 0
+        self._month = None
+        self._month_done = True
+        self._due = False
+
+    def build(self, times) -> None:
+        """用交易日历（backtrader 浮点时间，可重复、无序）预先算出调仓的 K 线时间。"""
+        times = np.unique(np.asarray(times, dtype=float))
+        days = day_numbers(times, self.tz)
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        due = schedule(unique_days, self.rule, self.period, self.weekday)
+        self._due_times = set(times[due[inverse]].tolist())
+
+    def build_from_datas(self, datas) -> bool:
+        """用所有已预加载行情的并集日历建表；有行情未预加载时返回 False，改为增量判断。"""
+        arrays = [d.datetime.array for d in datas]
+        if not arrays or any(len(a) == 0 for a in arrays):
+            return False
+        self.build(np.concatenate([np.asarray(a, dtype=float) for a in arrays]))
+        return True
+
+    @property
+    def precomputed(self) -> bool:
+        return self._due_times is not None
+
+    def advance(self, dt: float) -> bool:
+        """
+        推进到时间 dt（backtrader 浮点时间），返回是否调仓。
+        同一天多次调用结果相同；增量模式下需在 prenext 中也调用，以便计数交易日。
+        """
+        if self._due_times is not None:
+            return dt in self._due_times
+        day = self._local_day(dt)
+        if day == self._last_day:
+            return self._due
+        self._due = self._advance_incremental(day)
+        self._last_day = day
+        return self._due
+
+    def _local_day(self, dt: float) -> int:
+        return int(day_numbers(np.array([dt]), self.tz)[0])
+
+    def _advance_incremental(self, day: int) -> bool:
+        if self.rule == 'days':
+            due = self._count % self.period == 0
+            self._count += 1
+            return due
+        if self.rule == 'weekly':
+            previous = day - 1 if self._last_day is None else self._last_day
+            return _weekly_anchor(np.array([day]), self.weekday)[0] > previous
+        month = _months(np.array([day]))[0]
+        if month != self._month:
+            # 上个月没赶上月末调仓，本月第一个交易日补调
+            missed = not self._month_done
+            self._month = month
+            self._month_done = False
+            if missed:
+                return True
+        if not self._month_done and day >= _last_busday(np.array([month]))[0]:
+            self._month_done = True
+            return True
+        return False
+
+
+def _weekly_anchor(days: np.ndarray, weekday: int) -> np.ndarray:
+    # 1970-01-01 是周四
+    weekdays = (days - _EPOCH_NUM + 3) % 7
+    return days - (weekdays - weekday) % 7
+
+
+def _months(days: np.ndarray) -> np.ndarray:
+    return (days - _EPOCH_NUM).astype('datetime64[D]').astype('datetime64[M]')
+
+
+def _last_busday(months: np.ndarray) -> np.ndarray:
+    last = (months + 1).astype('datetime64[D]') - 1
+    busday = np.busday_offset(last, 0, roll='backward')
+    return busday.astype(np.int64) + _EPOCH_NUM
@@ -1,30 +1,93 @@
 import backtrader as bt
 import numpy as np
+from common import config
+from analysis.returns_panel import ReturnsPanel
+from analysis import clustering
+from analysis.rolling_corr import RollingCorrelation
+from strategy.rebalance_scheduler import RebalanceScheduler
+
+
+class AtrWarmup(bt.Indicator):
+    """
+    不做计算的指标，只为所在的 data 声明与 bt.indicators.ATR(period) 相同的最小周期（period + 1），
+    使用 feed 中预先算好的 atr line 时，策略按每个 data 的预热状态在 prenext / next 之间切换
+    """
+    lines = ('warmup',)
+    params = (('period', 10),)
+
+    def __init__(self):
+        self.addminperiod(self.p.period + 1)
+
+    def next(self):
+        pass
+
+    def once(self, start, end):
+        pass
 
 
 class RelativeStrengthStrategy(bt.Strategy):
     params = (
         ('rebalance_period', 10),
+        ('rebalance_rule', 'days'),  # 'days' 每 rebalance_period 个交易日，'weekly' 每周，'month_end' 每月末
+        ('rebalance_weekday', 4),  # weekly 规则的调仓日，0=周一
+        ('rebalance_tz', config.DB_TIMEZONE),  # 按该时区的日期划分交易日
         ('num_top', 5),
         ('correlation_period', 60),
         ('vol_threshold', 2.0),
         ('corr_threshold', 0.8),
         ('printlog', True),
         ('stop_loss_pct', 2),
+        ('rolling_corr', False),  # 每根 K 线增量维护全体标的的 n×n 相关矩阵，内存与每根 K 线的开销均为 O(n²)，只适合标的较少时
+        ('corr_dtype', 'float64'),  # 滚动相关矩阵的精度（rolling_corr 开启时），标的很多时可用 float32
+        ('precomputed_atr', False),  # 使用 feed 中预先算好的 atr line（周期需为 rebalance_period），不创建 ATR 指标
     )
 
+    # 策略直接读取的 data 历史长度（止损用到 close[-1]），其余历史由收益率面板保存
+    lookback = 2
+
     def __init__(self):
         self.holding_stocks = []
         self.for_buy = []
         self.for_sell = []
-        self.rebalance_dates = self.data.datetime[::self.p.rebalance_period]
+        # 按所有标的的并集日历预先算出调仓日，不依赖 self.data 的历史长度
+        self.scheduler = RebalanceScheduler(
+            self.p.rebalance_rule, self.p.rebalance_period, self.p.rebalance_weekday, self.p.rebalance_tz
+        )
+        self.scheduler.build_from_datas(self.datas)
         self.data_map = {}
         self.atr = {}
         for data in self.datas:
-            self.atr[data] = bt.indicators.ATR(data, period=self.p.rebalance_period)
+            if self.p.precomputed_atr:
+                self.atr[data] = data.lines.atr
+                # 每个 data 各自需要与 ATR 指标相同的预热期，上市晚的标的预热完之前策略停在 prenext
+                AtrWarmup(data, period=self.p.rebalance_period)
+            else:
+                self.atr[data] = bt.indicators.ATR(data, period=self.p.rebalance_period)
             self.data_map[data._name] = data
+        # 所有标的共享的收益率面板，每根 K 线更新一次
+        self.panel = ReturnsPanel(len(self.datas), self.p.correlation_period)
+        # 默认只在调仓时对候选计算 np.corrcoef
+        self.corr_engine = None
+        if self.p.rolling_corr:
+            self.corr_engine = RollingCorrelation(len(self.datas), self.p.correlation_period, dtype=self.p.corr_dtype)
+        self._data_index = {data._name: i for i, data in enumerate(self.datas)}
+        self._data_lens = np.zeros(len(self.datas), dtype=np.int64)
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super().qbuffer(savemem, replaying)
+        if savemem > 0:
+            # exactbars 模式下 data 只按指标的需求保留历史，没有 ATR 指标时需保证 lookback
+            for data in self.datas:
+                for line in data.lines:
+                    line.minbuffer(self.lookback)
+
+    def prenext(self):
+        self.update_panel()
+        self.scheduler.advance(self.datetime[0])
 
     def next(self):
+        self.update_panel()
+        rebalance = self.scheduler.advance(self.datetime[0])
         # 执行订单
         if len(self.for_sell) > 0:
             self.sell_stocks()
@@ -33,8 +96,7 @@ class RelativeStrengthStrategy(bt.Strategy):
         # 止损
         self.stop_loss()
         # 调仓
-        current_date = self.data.datetime[0]
-        if current_date in self.rebalance_dates or len(self.holding_stocks) == 0:
+        if rebalance or len(self.holding_stocks) == 0:
             top_stocks = self.top_stocks()
             self.for_buy = [x for x in top_stocks if x not in self.holding_stocks]
             self.for_sell = [x for x in self.holding_stocks if x not in top_stocks]
@@ -66,55 +128,49 @@ class RelativeStrengthStrategy(bt.Strategy):
                 self.close(data=stock)
 
     def correlation_groups(self, names, returns_map):
+        """按相关性阈值把候选分组，返回每个候选所在组的标签。"""
         if not names:
-            return []
-        matrix = np.vstack([returns_map[n] for n in names])
-        corr = np.corrcoef(matrix)
-        n = len(names)
-        adj = {names[i]: set() for i in range(n)}
-        for i in range(n):
-            for j in range(i + 1, n):
-                if corr[i, j] > self.p.corr_threshold:
-                    adj[names[i]].add(names[j])
-                    adj[names[j]].add(names[i])
-        visited = set()
-        groups = []
-        for name in names:
-            if name in visited:
-                continue
-            stack = [name]
-            comp = set()
-            while stack:
-                s = stack.pop()
-                if s in visited:
-                    continue
-                visited.add(s)
-                comp.add(s)
-                for nei in adj[s]:
-                    if nei not in visited:
-                        stack.append(nei)
-            groups.append(comp)
-        return groups
+            return np.empty(0, dtype=np.int64)
+        corr = np.atleast_2d(self.correlation_matrix(names, returns_map))
+        return clustering.correlation_labels(corr, self.p.corr_threshold)
+
+    def correlation_matrix(self, names, returns_map):
+        if self.corr_engine is not None:
+            idx = np.array([self._data_index[n] for n in names])
+            if self.corr_engine.valid()[idx].all():
+                return self.corr_engine.corr(idx)
+        # 未开启 rolling_corr，或有标的在窗口内缺数据（日历不一致）时，按各自的窗口计算
+        return np.corrcoef(np.vstack([returns_map[n] for n in names]))
+
+    def update_panel(self):
+        lens = np.fromiter((len(d) for d in self.datas), dtype=np.int64, count=len(self.datas))
+        idx = np.flatnonzero(lens > self._data_lens)
+        self._data_lens = lens
+        if idx.size == 0:
+            return
+        closes = np.fromiter((self.datas[i].close[0] for i in idx), dtype=float, count=idx.size)
+        rets = np.fromiter((self.datas[i].pct_chg[0] for i in idx), dtype=float, count=idx.size)
+        self.panel.update(idx, closes, rets)
+        if self.corr_engine is None:
+            return
+        latest = np.full(len(self.datas), np.nan)
+        latest[idx] = rets
+        self.corr_engine.update(latest)
 
     def filter_candidates(self):
+        vols = np.fromiter((self.atr[d][0] for d in self.datas), dtype=float, count=len(self.datas))
+        idx = np.flatnonzero(self.panel.valid() & (vols <= self.p.vol_threshold))
+        if idx.size == 0:
+            return [], {}
+        window = self.panel.window_returns(idx)
+        total = np.nan_to_num(self.panel.total_return(idx), nan=0.0)
+
         eligible = []
         returns_map = {}
-        for d in self.datas:
-            if len(d) < self.p.correlation_period:
-                continue
-
-            rets = list(d.pct_chg.get(ago=0, size=self.p.correlation_period))
-            if len(rets) < self.p.correlation_period:
-                continue
-
-            vol = float(self.atr[d][0])
-            if vol <= self.p.vol_threshold:
-                start_close = d.close[-self.p.correlation_period + 1]
-                end_close = d.close[0]
-                total_return = (end_close/start_close - 1.0) * 100.0 if start_close != 0 else 0.0
-                
-                eligible.append((d, vol, total_return))
-                returns_map[d._name] = np.array(rets, dtype=float)
+        for k, i in enumerate(idx):
+            d = self.datas[i]
+            eligible.append((d, float(vols[i]), float(total[k])))
+            returns_map[d._name] = window[k]
         return eligible, returns_map
 
     def top_stocks(self):
@@ -122,16 +178,15 @@ class RelativeStrengthStrategy(bt.Strategy):
         if not eligible:
             return []
         names = [d._name for d, _, _ in eligible]
-        groups = self.correlation_groups(names, returns_map)
-        by_name = {d._name: (d, vol, ret) for d, vol, ret in eligible}
-        winners = []
-        for comp in groups:
-            cand = sorted([by_name[n] for n in comp], key=lambda x: x[1])
-            if cand:
-                winners.append(cand[0])
-        winners_sorted = sorted(winners, key=lambda x: x[2], reverse=True)
-        top = winners_sorted[:self.p.num_top]
-        return [d for d, _, _ in top]
+        labels = self.correlation_groups(names, returns_map)
+        vols = np.array([vol for _, vol, _ in eligible])
+        rets = np.array([ret for _, _, ret in eligible])
+        # 每组取波动最小的一个，再按区间涨幅从高到低排序
+        order = np.lexsort((vols, labels))
+        first = np.r_[True, labels[order][1:] != labels[order][:-1]]
+        winners = order[first]
+        winners = winners[np.argsort(-rets[winners], kind='stable')]
+        return [names[i] for i in winners[:self.p.num_top]]
 
     def log(self, txt, dt=None):
         if self.p.printlog:
@@ -142,23 +197,30 @@ class RelativeStrengthStrategy(bt.Strategy):
         if order.status in [order.Submitted, order.Accepted]:
             return
 
+        name = order.data._name
         if order.status in [order.Completed]:
             if order.isbuy():
-                self.for_buy.remove(order.data._name)
-                self.holding_stocks.append(order.data._name)
-                self.log(f'buy: {order.data._name}, price {order.executed.price:.2f}, '
+                self._discard(self.for_buy, name)
+                self.holding_stocks.append(name)
+                self.log(f'buy: {name}, price {order.executed.price:.2f}, '
                          f'size {order.executed.size}, comm {order.executed.comm:.2f}')
             elif order.issell():
-                self.for_sell.remove(order.data._name)
-                self.holding_stocks.remove(order.data._name)
-                self.log(f'sell: {order.data._name}, price {order.executed.price:.2f}, '
+                # 止损平仓的卖单不在 for_sell 中
+                self._discard(self.for_sell, name)
+                self._discard(self.holding_stocks, name)
+                self.log(f'sell: {name}, price {order.executed.price:.2f}, '
                          f'size {order.executed.size}, comm {order.executed.comm:.2f}')
         elif order.status in [order.Canceled, order.Margin, order.Rejected]:
             if order.isbuy():
-                self.for_buy.remove(order.data._name)
+                self._discard(self.for_buy, name)
             elif order.issell():
-                self.for_sell.remove(order.data._name)
-            self.log(f'order problem: {order.p.data._name}, isBuy:{order.isbuy()}')
+                self._discard(self.for_sell, name)
+            self.log(f'order problem: {name}, isBuy:{order.isbuy()}')
+
+    @staticmethod
+    def _discard(names, name):
+        if name in names:
+            names.remove(name)
 
     def notify_trade(self, trade):
         if not trade.isclosed:
@@ -83,4 +83,4 @@ class SimpleMovingAverageStrategy(bt.Strategy):
             if self.crossover[0] < 0:  # 短期均线下穿长期均线
                 self.log(f'卖出信号: 价格 {self.data.close[0]:.2f}')
                 # 卖出所有持仓
-                self.order = self.sell()
+                self.order = self.close()
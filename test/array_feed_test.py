@@ -0,0 +1,51 @@
+import datetime
+
+import backtrader as bt
+import numpy as np
+from feeddata.array_feed import FundArrayData, columns_from_frame, ns_to_num
+from feeddata.fund_feeddata import FundPandasData
+from test.helpers import market_frame, run
+
+
+def array_feed(frame, **params):
+    feed = FundArrayData(**params)
+    feed.set_columns(columns_from_frame(frame))
+    return feed
+
+
+def test_columns_from_frame():
+    frame = market_frame(5).drop(columns='pct_chg').iloc[::-1]
+    columns = columns_from_frame(frame)
+    assert columns['time'].dtype == np.int64 and np.all(np.diff(columns['time']) > 0)
+    assert columns['volume'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert np.isnan(columns['pct_chg']).all()
+    assert all(c.flags['C_CONTIGUOUS'] and c.dtype == np.float64 for k, c in columns.items() if k != 'time')
+    assert ns_to_num(columns['time'][:1])[0] == bt.date2num(datetime.datetime(2024, 1, 1))
+
+
+def test_preload_matches_pandas_feed():
+    frame = market_frame()
+    pandas_frame = frame.drop(columns='symbol').set_index('time').tz_localize(None).rename(columns={'vol': 'volume'})
+    expected = run(FundPandasData(dataname=pandas_frame))
+    assert run(array_feed(frame)) == expected
+    # runonce=False 与 preload=False 仍得到同样的结果
+    assert run(array_feed(frame), runonce=False) == expected
+    assert run(array_feed(frame), preload=False) == expected
+
+
+def test_fromdate_todate_mask():
+    rows = run(array_feed(market_frame(), fromdate=datetime.datetime(2024, 1, 5),
+                          todate=datetime.datetime(2024, 1, 20)))
+    # SMA(5) 需要 4 根预热
+    assert rows[0][0] == datetime.datetime(2024, 1, 9)
+    assert rows[-1][0] == datetime.datetime(2024, 1, 20)
+
+
+def test_bounded_buffer_falls_back_to_per_bar_load():
+    frame = market_frame()
+    expected = run(array_feed(frame))
+    assert run(array_feed(frame), exactbars=1) == expected
+    # 有过滤器时同样走逐根加载
+    feed = array_feed(frame)
+    feed.addfilter(lambda data: False)
+    assert run(feed) == expected
@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+import pytest
+from common import config
+from database import bar_cache, fund_market_dao
+from test.helpers import FakeMarket
+
+
+@pytest.fixture
+def market(monkeypatch, tmp_path):
+    market = FakeMarket(tz='Asia/Shanghai')
+    market.patch(monkeypatch)
+    monkeypatch.setattr(config, 'BAR_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'BAR_CACHE_TTL', 3600)
+    bar_cache.reset_stats()
+    yield market
+    bar_cache.reset_stats()
+
+
+def expire(symbol):
+    path = bar_cache._path(symbol, '1d')
+    old = os.path.getmtime(path) - config.BAR_CACHE_TTL - 1
+    os.utime(path, (old, old))
+
+
+def test_miss_then_hit(market):
+    df = bar_cache.list_fund_market('a', '2024-01-02', '2024-01-04')
+    assert df['close'].tolist() == [12.0, 14.0, 16.0]
+    assert list(df.columns[:2]) == ['time', 'symbol'] and (df['time_frame'] == '1d').all()
+    assert bar_cache.list_by_limit('a', '2024-01-05', limit=2)['close'].tolist() == [10.0, 12.0]
+    assert len(market.queries) == 1
+    assert bar_cache.stats() == {'hit': 1, 'refresh': 0, 'miss': 1, 'hit_rate': 0.5}
+    # 写入使用独立的临时文件，替换后不留下残余
+    assert os.listdir(os.path.join(config.BAR_CACHE_DIR, '1d')) == ['a.npy']
+
+
+def test_ttl_expiry_refreshes_from_watermark(market):
+    bar_cache.list_fund_market('a', '2024-01-01', '2024-01-10')
+    watermark = pd.Timestamp('2024-01-05', tz='Asia/Shanghai')
+    # 水位线那根 K 线被修正，并新增一根
+    market.add(['a'], watermark, close=99.0)
+    market.add(['a'], '2024-01-06 00:00+08:00', close=100.0)
+    # TTL 内不查询数据库
+    assert bar_cache.list_fund_market('a', '2024-01-01', '2024-01-10')['close'].iloc[-1] == 18.0
+    assert len(market.queries) == 1
+
+    expire('a')
+    df = bar_cache.list_fund_market('a', '2024-01-01', '2024-01-10')
+    assert market.queries[-1] == ('since', ('a',), watermark)
+    assert df['close'].tolist() == [10.0, 12.0, 14.0, 16.0, 99.0, 100.0]
+    assert bar_cache.stats()['refresh'] == 1
+
+
+def test_bulk_load_batches_misses_and_refreshes(market):
+    df = bar_cache.list_by_symbols_limit(['a', 'b', 'x'], '2024-01-04', limit=2)
+    assert market.queries == [('since', ('a', 'b', 'x'), None)]
+    assert df.groupby('symbol')['close'].apply(list).to_dict() == {'a': [14.0, 16.0], 'b': [16.0, 18.0]}
+
+    market.add(['a', 'b'], '2024-01-06 00:00+08:00')
+    expire('a')
+    expire('b')
+    df = bar_cache.list_by_symbols(['a', 'b'], '2024-01-05', '2024-01-06')
+    assert market.queries[-1] == ('since', ('a', 'b'), pd.Timestamp('2024-01-05', tz='Asia/Shanghai'))
+    assert df.groupby('symbol')['close'].apply(list).to_dict() == {'a': [18.0, 20.0], 'b': [20.0, 22.0]}
+    assert bar_cache.stats()['miss'] == 3 and bar_cache.stats()['refresh'] == 2
+
+
+def test_market_dao_flag_and_saved_stats(market, monkeypatch):
+    monkeypatch.setattr(config, 'USE_BAR_CACHE', False)
+    assert bar_cache.market_dao() is fund_market_dao
+    monkeypatch.setattr(config, 'USE_BAR_CACHE', True)
+    assert bar_cache.market_dao() is bar_cache
+
+    bar_cache.list_fund_market('a', '2024-01-01', '2024-01-05')
+    bar_cache.list_fund_market('a', '2024-01-01', '2024-01-05')
+    bar_cache.save_stats()
+    bar_cache.list_fund_market('a', '2024-01-01', '2024-01-05')
+    bar_cache.save_stats()
+    assert bar_cache.stats()['hit'] == 0
+    assert bar_cache.saved_stats() == {'hit': 2, 'refresh': 0, 'miss': 1, 'hit_rate': 2 / 3}
+    assert bar_cache._time_frames() == ['1d']
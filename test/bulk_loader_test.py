@@ -0,0 +1,92 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+from database import fund_adj_dao, fund_market_dao
+from feeddata import fund_feeddata
+from feeddata.fund_feeddata import FundIndicatorData, FundPandasData
+from test.helpers import market_frame
+
+SYMBOLS = ('a', 'b', 'c')
+
+
+def close(k, days):
+    """market_frame 中第 k 个标的在 days 这些交易日的收盘价。"""
+    return (10 + k + np.sin(np.asarray(days))).tolist()
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """用内存中的行情代替 read_frame，记录每次查询的参数。"""
+    market = market_frame(6, SYMBOLS)
+    calls = []
+
+    def read_frame(query, params, dtypes):
+        calls.append(params)
+        df = market[market['symbol'].isin(params['symbols'])
+                    & (market['time'] <= pd.Timestamp(params['end_date'], tz='UTC'))]
+        return df.groupby('symbol').tail(params['limit']).sort_values(['symbol', 'time']).reset_index(drop=True)
+
+    monkeypatch.setattr(fund_market_dao, 'read_frame', read_frame)
+    return calls
+
+
+def test_list_by_symbols_limit_chunks(queries):
+    df = fund_market_dao.list_by_symbols_limit(['a', 'b', 'c'], '2024-01-05', limit=3, chunk_size=2)
+    assert [q['symbols'] for q in queries] == [['a', 'b'], ['c']]
+    assert len(df) == 9
+    assert df.groupby('symbol')['time'].max().eq(pd.Timestamp('2024-01-05', tz='UTC')).all()
+    assert fund_market_dao.list_by_symbols_limit(['x'], '2024-01-05').empty
+
+
+def test_split_by_symbol():
+    groups = fund_market_dao.split_by_symbol(market_frame(2, SYMBOLS))
+    assert list(groups) == ['a', 'b', 'c']
+    assert all(len(g) == 2 and (g['symbol'] == s).all() for s, g in groups.items())
+    assert fund_market_dao.split_by_symbol(pd.DataFrame()) == {}
+
+
+def test_load_feeds_keeps_order_and_drops_short(queries):
+    feeds = fund_feeddata.load_feeds(['c', 'missing', 'a'], '2024-01-06', bars=4, min_bars=4)
+    assert list(feeds) == ['c', 'a']
+    feed = feeds['c']
+    assert isinstance(feed, FundPandasData) and feed._name == 'c'
+    frame = feed.p.dataname
+    assert frame.index.name == 'time' and frame.index.is_monotonic_increasing
+    assert frame['volume'].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert frame['close'].tolist() == close(2, range(2, 6))
+    # 只有 3 根 K 线时被 min_bars 过滤
+    assert fund_feeddata.load_feeds(['a'], '2024-01-03', bars=4, min_bars=4) == {}
+
+
+def test_build_feeds_with_indicators_and_columns():
+    feeds = fund_feeddata._build_feeds(['a', 'b'], market_frame(6, SYMBOLS), 0, indicators={'sma': 3},
+                                       columns=('open', 'high', 'low', 'close', 'volume', 'sma'))
+    assert all(isinstance(feed, FundIndicatorData) for feed in feeds.values())
+    frame = feeds['a'].p.dataname
+    assert list(frame.columns) == ['open', 'high', 'low', 'close', 'volume', 'sma']
+    assert frame['sma'].iloc[-1] == pytest.approx(np.mean(close(0, range(3, 6))))
+
+
+def test_load_data_returns_working_feed(queries):
+    feed = fund_feeddata.load_data('b', '2024-01-05', bars=3)
+    assert isinstance(feed, FundPandasData) and feed._name == 'b'
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(bt.Strategy)
+    cerebro.run()
+    assert len(feed) == 3
+    assert feed.close.get(size=3).tolist() == pytest.approx(close(1, range(2, 5)))
+    assert feed.volume[0] == 4.0 and feed.pct_chg[0] == 0.5
+    assert fund_feeddata.load_data('missing', '2024-01-05', bars=3) is None
+
+
+def test_load_data_with_adj(queries, monkeypatch):
+    adjs = pd.DataFrame({'time': pd.to_datetime(['2024-01-01', '2024-01-03']).tz_localize('UTC'),
+                         'symbol': 'a', 'adj_factor': [1.0, 2.0]})
+    monkeypatch.setattr(fund_adj_dao, 'list_by_symbols', lambda symbols, end: adjs[adjs['symbol'].isin(symbols)])
+    feed = fund_feeddata.load_data_with_adj('a', '2024-01-04', bars=4)
+    factors = np.array([1.0, 1.0, 2.0, 2.0])
+    assert feed.p.dataname['close'].tolist() == pytest.approx(np.array(close(0, range(4))) * factors / 2)
+    backward = fund_feeddata.load_data_with_adj('a', '2024-01-04', bars=4, adjust_type='backward')
+    assert backward.p.dataname['close'].tolist() == pytest.approx(np.array(close(0, range(4))) * factors)
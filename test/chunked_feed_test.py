@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from database import db_pool
+from feeddata import chunked_feed
+from feeddata.array_feed import FundArrayData, columns_from_frame
+from feeddata.chunked_feed import FundChunkedData
+from test.helpers import market_frame, run
+
+
+class FakeResult:
+    def __init__(self, columns, rows, yield_per):
+        self._columns = columns
+        self._rows = rows
+        self._yield_per = yield_per
+
+    def keys(self):
+        return self._columns
+
+    def partitions(self):
+        for i in range(0, len(self._rows), self._yield_per):
+            yield self._rows[i:i + self._yield_per]
+
+
+class FakeConnection:
+    def __init__(self, frame, options):
+        self.frame = frame
+        self.options = options
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execution_options(self, **options):
+        self.options.update(options)
+        return self
+
+    def execute(self, query, params):
+        rows = list(self.frame.itertuples(index=False, name=None))
+        return FakeResult(list(self.frame.columns), rows, self.options['yield_per'])
+
+
+def test_iter_frames_uses_server_side_cursor(monkeypatch):
+    options = {}
+
+    class Engine:
+        def connect(self):
+            return FakeConnection(market_frame(25), options)
+
+    monkeypatch.setattr(db_pool, 'get_engine', Engine)
+    frames = list(db_pool.iter_frames('SELECT 1', {}, {'close': np.float32}, yield_per=10))
+    assert options == {'stream_results': True, 'yield_per': 10}
+    assert [len(f) for f in frames] == [10, 10, 5]
+    assert all(f['close'].dtype == np.float32 for f in frames)
+    assert pd.concat(frames)['close'].tolist() == pytest.approx(market_frame(25)['close'].tolist())
+
+
+def test_chunked_feed_matches_array_feed(monkeypatch):
+    frame = market_frame()
+    closed = []
+
+    def iter_fund_market(symbol, start_date, end_date, time_frame='1d', yield_per=10000):
+        try:
+            for i in range(0, len(frame), yield_per):
+                yield frame.iloc[i:i + yield_per]
+            # 空块被跳过
+            yield frame.iloc[:0]
+        finally:
+            closed.append(symbol)
+
+    monkeypatch.setattr(chunked_feed.fund_market_dao, 'iter_fund_market', iter_fund_market)
+    whole = FundArrayData()
+    whole.set_columns(columns_from_frame(frame))
+    expected = run(whole)
+
+    feed = FundChunkedData(symbol='A', start='2024-01-01', end='2024-02-01', yield_per=7)
+    assert run(feed, preload=False, exactbars=1) == expected
+    assert closed == ['A']
+    # 缓冲区只保留 SMA 需要的几根
+    assert feed.buflen() < len(frame)
+
+
+def test_chunked_feed_requires_range():
+    with pytest.raises(ValueError):
+        run(FundChunkedData(symbol='A'), preload=False)
@@ -0,0 +1,57 @@
+"""
+向量化相关性聚类与逐对循环 + DFS 的耗时对比
+
+    python test/clustering_bench.py
+"""
+import time
+
+import numpy as np
+from analysis import clustering
+
+
+def loop_groups(corr, threshold):
+    n = len(corr)
+    adjacency = {i: set() for i in range(n)}
+    for i in range(n):
+        for j in range(i + 1, n):
+            if corr[i, j] > threshold:
+                adjacency[i].add(j)
+                adjacency[j].add(i)
+    visited, groups = set(), []
+    for s in range(n):
+        if s in visited:
+            continue
+        stack, comp = [s], []
+        visited.add(s)
+        while stack:
+            u = stack.pop()
+            comp.append(u)
+            for v in adjacency[u]:
+                if v not in visited:
+                    visited.add(v)
+                    stack.append(v)
+        groups.append(comp)
+    return groups
+
+
+def bench(n, threshold=0.8, dtype=np.float32, loop=True):
+    rng = np.random.default_rng(0)
+    factors = rng.normal(0, 1, (120, n // 20 + 1))
+    data = factors[:, rng.integers(0, factors.shape[1], n)] + rng.normal(0, 0.5, (120, n))
+    corr = np.corrcoef(data.T).astype(dtype)
+
+    t0 = time.perf_counter()
+    labels = clustering.correlation_labels(corr, threshold)
+    vectorized = time.perf_counter() - t0
+    line = f"n={n:6d} {np.dtype(dtype).name}: vectorized {vectorized * 1000:9.1f} ms, groups {labels.max() + 1}"
+    if loop:
+        t0 = time.perf_counter()
+        loop_groups(corr, threshold)
+        line += f", loop {(time.perf_counter() - t0) * 1000:9.1f} ms"
+    print(line)
+
+
+if __name__ == '__main__':
+    for n in (500, 2000):
+        bench(n)
+    bench(10000, loop=False)
@@ -0,0 +1,70 @@
+import numpy as np
+from analysis import clustering
+
+
+def naive_labels(adj):
+    n = len(adj)
+    labels = np.full(n, -1)
+    current = 0
+    for s in range(n):
+        if labels[s] >= 0:
+            continue
+        labels[s] = current
+        stack = [s]
+        while stack:
+            u = stack.pop()
+            for v in np.flatnonzero(adj[u]):
+                if labels[v] < 0:
+                    labels[v] = current
+                    stack.append(v)
+        current += 1
+    return labels
+
+
+def random_corr(rng, n, groups):
+    factors = rng.normal(0, 1, (120, groups))
+    members = rng.integers(0, groups, n)
+    data = factors[:, members] + rng.normal(0, rng.uniform(0.3, 2.0, n), (120, n))
+    return np.corrcoef(data.T)
+
+
+def test_matches_naive_search_on_random_graphs():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        n = int(rng.integers(1, 80))
+        corr = random_corr(rng, n, int(rng.integers(1, 6)))
+        threshold = float(rng.uniform(0.2, 0.9))
+        adj = corr > threshold
+        np.fill_diagonal(adj, False)
+        labels = clustering.correlation_labels(corr, threshold)
+        assert labels.tolist() == naive_labels(adj).tolist()
+
+
+def test_chain_needs_several_rounds():
+    # 0-9-1-8-2-7... 的长链，根节点挂接需要多轮才收敛
+    n = 10
+    order = [0, 9, 1, 8, 2, 7, 3, 6, 4, 5]
+    rows, cols = np.array(order[:-1]), np.array(order[1:])
+    assert clustering.connected_components(n, rows, cols).tolist() == [0] * n
+
+
+def test_mask_blocks_and_nan():
+    corr = np.array([
+        [1.0, 0.9, 0.1, np.nan],
+        [0.9, 1.0, 0.95, 0.9],
+        [0.1, 0.95, 1.0, 0.2],
+        [np.nan, 0.9, 0.2, 1.0],
+    ])
+    mask = np.ones_like(corr, dtype=bool)
+    mask[1, 2] = mask[2, 1] = False
+    rows, cols = clustering.threshold_edges(corr, 0.8, mask=mask, block_size=3)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 3)]
+    labels = clustering.correlation_labels(corr, 0.8, mask=mask)
+    assert labels.tolist() == [0, 0, 1, 0]
+    groups = clustering.groups_from_labels(labels)
+    assert [g.tolist() for g in groups] == [[0, 1, 3], [2]]
+
+
+def test_empty():
+    assert clustering.correlation_labels(np.empty((0, 0)), 0.5).tolist() == []
+    assert clustering.groups_from_labels(np.empty(0, dtype=np.int64)) == []
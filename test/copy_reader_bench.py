@@ -0,0 +1,73 @@
+"""
+COPY 读取与 pd.read_sql 的对比
+
+    python test/copy_reader_bench.py          # 使用 .env 中配置的数据库，读取近一年 close
+    python test/copy_reader_bench.py --file   # 不连接数据库，用本地 CSV 模拟 COPY 输出
+"""
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from database import copy_reader
+
+
+def bench_db():
+    from sqlalchemy import text
+    from database import db_pool
+
+    end_date = pd.Timestamp.today().normalize()
+    start_date = end_date - pd.DateOffset(years=1)
+
+    t0 = time.perf_counter()
+    df = pd.read_sql(
+        text("""
+            SELECT time, symbol, close
+            FROM fund_market
+            WHERE time >= :start_date AND time <= :end_date
+            ORDER BY time ASC
+        """),
+        db_pool.get_engine(),
+        params={"start_date": start_date, "end_date": end_date},
+    )
+    df.pivot(index='time', columns='symbol', values='close')
+    t1 = time.perf_counter()
+    pivot = copy_reader.read_market_columns(start_date, end_date, time_frame=None, pivot=True)
+    t2 = time.perf_counter()
+    print(f"rows: {len(df)}, symbols: {pivot.shape[1]}")
+    print(f"read_sql + pivot: {t1 - t0:.2f}s")
+    print(f"copy + pivot:     {t2 - t1:.2f}s")
+
+
+def bench_file(n_symbols=2000, n_days=250):
+    times = pd.date_range('2024-01-01', periods=n_days, tz='Asia/Shanghai')
+    symbols = [f'{i:06d}.SZ' for i in range(n_symbols)]
+    df = pd.DataFrame({
+        'time': np.repeat(times, n_symbols),
+        'symbol': np.tile(symbols, n_days),
+        'close': np.random.rand(n_days * n_symbols).round(4),
+    })
+    csv = df.to_csv(index=False).encode()
+    # read_sql 的代价主要在逐行元组与 object 列
+    records = list(df.itertuples(index=False, name=None))
+
+    t0 = time.perf_counter()
+    slow = pd.DataFrame.from_records(records, columns=['time', 'symbol', 'close'])
+    slow['close'] = slow['close'].astype(object)
+    slow['close'] = pd.to_numeric(slow['close'])
+    slow.pivot(index='time', columns='symbol', values='close')
+    t1 = time.perf_counter()
+    fast = copy_reader.parse_copy_csv(io.BytesIO(csv), {'symbol': str, 'close': np.float64})
+    fast.pivot(index='time', columns='symbol', values='close')
+    t2 = time.perf_counter()
+    print(f"rows: {len(df)}")
+    print(f"tuples + pivot: {t1 - t0:.2f}s")
+    print(f"csv + pivot:    {t2 - t1:.2f}s")
+
+
+if __name__ == '__main__':
+    if '--file' in sys.argv:
+        bench_file()
+    else:
+        bench_db()
@@ -0,0 +1,121 @@
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from database import copy_reader
+from psycopg2 import sql
+
+# COPY (...) TO STDOUT WITH (FORMAT csv, HEADER true) 的输出样例
+COPY_OUTPUT = """time,symbol,close
+2024-01-02 00:00:00+08,510300.SH,3.5120
+2024-01-02 00:00:00+08,159915.SZ,1.8300
+2024-01-03 00:00:00+08,510300.SH,3.5400
+2024-01-03 00:00:00+08,159915.SZ,
+"""
+
+
+def test_parse_copy_csv_dtypes():
+    df = copy_reader.parse_copy_csv(io.StringIO(COPY_OUTPUT), {'symbol': str, 'close': np.float64})
+    assert df['close'].dtype == np.float64
+    assert np.isnan(df['close'].iloc[3])
+    assert str(df['time'].dt.tz) == 'UTC'
+    assert df['time'].iloc[0] == pd.Timestamp('2024-01-01 16:00:00', tz='UTC')
+
+
+def test_parse_copy_csv_from_file(tmp_path):
+    path = tmp_path / 'fund_market.csv'
+    path.write_text(COPY_OUTPUT)
+    with open(path, 'rb') as f:
+        df = copy_reader.parse_copy_csv(f, {'symbol': str, 'close': np.float32})
+    pivot = df.pivot(index='time', columns='symbol', values='close')
+    assert pivot.shape == (2, 2)
+    assert pivot['510300.SH'].dtype == np.float32
+
+
+class FakeCursor:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.closed = False
+        self.copy_sql = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    def mogrify(self, query, params):
+        return (query % {k: repr(v) for k, v in params.items()}).encode()
+
+    def copy_expert(self, copy_sql, writer):
+        self.copy_sql = copy_sql
+        writer.write(COPY_OUTPUT.encode()[:40])
+        if self.fail:
+            raise RuntimeError('connection lost')
+        writer.write(COPY_OUTPUT.encode()[40:])
+
+
+class FakeRaw:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.closed = False
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        self.closed = True
+
+
+def fake_engine(monkeypatch, cursor):
+    raw = FakeRaw(cursor)
+
+    class Engine:
+        def raw_connection(self):
+            return raw
+
+    monkeypatch.setattr(copy_reader, 'get_engine', Engine)
+    return raw
+
+
+def test_copy_frame_streams_through_pipe(monkeypatch):
+    cursor = FakeCursor()
+    raw = fake_engine(monkeypatch, cursor)
+    df = copy_reader.copy_frame("SELECT * FROM fund_market WHERE time >= %(start)s", {'start': '2024-01-01'},
+                                {'symbol': str, 'close': np.float64})
+    assert len(df) == 4
+    assert cursor.copy_sql.startswith("COPY (SELECT * FROM fund_market WHERE time >= '2024-01-01') TO STDOUT")
+    assert cursor.closed and raw.closed
+
+
+def test_copy_frame_error_closes_cursor_and_joins_producer(monkeypatch):
+    cursor = FakeCursor(fail=True)
+    raw = fake_engine(monkeypatch, cursor)
+    threads = threading.active_count()
+    with pytest.raises(RuntimeError, match='connection lost'):
+        copy_reader.copy_frame("SELECT 1", {}, {'symbol': str, 'close': np.float64})
+    assert cursor.closed and raw.closed
+    assert threading.active_count() == threads
+
+
+def test_read_market_columns_quotes_identifiers(monkeypatch):
+    captured = {}
+
+    def copy_frame(query, params, dtypes, parse_dates=('time',)):
+        captured['query'] = query
+        return pd.DataFrame({'time': [], 'symbol': [], 'close': []})
+
+    monkeypatch.setattr(copy_reader, 'copy_frame', copy_frame)
+    copy_reader.read_market_columns('2024-01-01', '2024-02-01', columns=('close', 'x"; DROP TABLE fund_market; --'))
+
+    def flatten(composable):
+        if isinstance(composable, sql.Composed):
+            return [part for item in composable.seq for part in flatten(item)]
+        return [composable]
+
+    parts = flatten(captured['query'])
+    assert sql.Identifier('close') in parts
+    assert sql.Identifier('x"; DROP TABLE fund_market; --') in parts
+    assert not any(isinstance(p, sql.SQL) and 'DROP' in p.string for p in parts)
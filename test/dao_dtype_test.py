@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from common import config
+from database import db_pool, fund_adj_dao, fund_dao, fund_market_dao
+from database.db_pool import build_frame, float_dtype
+
+requires_db = pytest.mark.skipif(not config.DB_URL, reason='DB is not configured')
+
+END = '2025-10-31'
+START = '2025-01-01'
+
+
+def assert_float_columns(df: pd.DataFrame, dtypes: dict):
+    for col in df.columns:
+        if col in dtypes:
+            assert df[col].dtype == float_dtype(), f'{col}: {df[col].dtype}'
+
+
+def test_build_frame_float32(monkeypatch):
+    monkeypatch.setattr(config, 'DB_FLOAT_DTYPE', 'float32')
+    dtypes = {col: float_dtype() for col in fund_market_dao.MARKET_DTYPES}
+    columns = ['time', 'symbol', 'close', 'vol']
+    rows = [
+        (pd.Timestamp('2024-01-01', tz='UTC'), 'A', 1.5, 100.0),
+        (pd.Timestamp('2024-01-02', tz='UTC'), 'A', None, 200.0),
+    ]
+    df = build_frame(columns, rows, dtypes)
+    assert list(df.columns) == columns
+    assert df['close'].dtype == df['vol'].dtype == np.float32
+    assert np.isnan(df['close'].iloc[1])
+    assert pd.api.types.is_datetime64_any_dtype(df['time'])
+    assert df['symbol'].dtype == object
+
+    empty = build_frame(columns, [], dtypes)
+    assert empty.empty and list(empty.columns) == columns
+    assert empty['close'].dtype == np.float32
+
+
+def test_market_dtypes_follow_config():
+    assert set(fund_market_dao.MARKET_DTYPES.values()) == {db_pool.float_dtype()}
+
+
+@pytest.fixture(scope='module')
+def symbols():
+    funds = fund_dao.list_fund(3)
+    assert_float_columns(funds, fund_dao.FUND_DTYPES)
+    assert_float_columns(fund_dao.list_eligible(START, END, 1, limit=3), fund_dao.FUND_DTYPES)
+    return funds['symbol'].tolist()
+
+
+@requires_db
+def test_fund_market_dao_dtypes(symbols):
+    symbol = symbols[0]
+    frames = [
+        fund_market_dao.list_fund_market(symbol, START, END),
+        fund_market_dao.list_by_limit(symbol, END, 50),
+        fund_market_dao.list_pct_chg(symbol, START, END),
+        fund_market_dao.list_since(symbol, START),
+        fund_market_dao.list_by_symbols(symbols, START, END),
+        fund_market_dao.list_by_symbols_limit(symbols, END, 50),
+    ]
+    for df in frames:
+        assert_float_columns(df, fund_market_dao.MARKET_DTYPES)
+        assert df.empty or pd.api.types.is_datetime64_any_dtype(df['time'])
+
+
+@requires_db
+def test_fund_adj_dao_dtypes(symbols):
+    symbol = symbols[0]
+    assert_float_columns(fund_adj_dao.list_fund_adj(symbol, START, END), fund_adj_dao.ADJ_DTYPES)
+    assert_float_columns(fund_adj_dao.list_by_limit(symbol, END, 50), fund_adj_dao.ADJ_DTYPES)
+    assert isinstance(fund_adj_dao.get_latest_adj(symbol), float)
@@ -1,34 +1,21 @@
 import pandas as pd
 import numpy as np
-from sqlalchemy import text
-from database import db_pool
+from analysis import clustering
+from database import copy_reader
 def date():
     print(pd.Timestamp.now())
 
 def main():
-    engine = db_pool.get_engine()
     # 直接使用近一年行情数据，不查询 fund 表代码
-    # 2) 查询近一年 fund_market 的行情（仅取 close）
+    # 2) 查询近一年 fund_market 的行情（仅取 close），通过 COPY 批量读取
     end_date = pd.Timestamp.today().normalize()
     start_date = end_date - pd.DateOffset(years=1)
 
-    market_df = pd.read_sql(
-        text(
-            """
-            SELECT time, symbol, close
-            FROM fund_market
-            WHERE time >= :start_date AND time <= :end_date
-            ORDER BY time ASC
-            """
-        ),
-        engine,
-        params={"start_date": start_date, "end_date": end_date},
-    )
     # 不过滤 symbol，保留所有标的
-
     # 3) 以时间为索引，按 symbol 透视为列，值为 close
-    market_df['time'] = pd.to_datetime(market_df['time'])
-    pivot_close = market_df.pivot(index='time', columns='symbol', values='close')
+    pivot_close = copy_reader.read_market_columns(
+        start_date, end_date, columns=('close',), time_frame=None, pivot=True
+    )
 
     # 去掉完全为空的行，避免相关性计算时全 NaN 行干扰
     pivot_close = pivot_close.dropna(how='all')
@@ -53,64 +40,34 @@ def main():
     threshold = 0.8
     min_overlap = 60
 
-    # 5) 列出满足阈值的基金对（仅取上三角，去除自相关）
-    upper_mask = np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
-    corr_pairs = (
-        corr_matrix.where(upper_mask)
-        .stack()
-        .reset_index(name='corr')
-    )
-    count_pairs = (
-        overlap_counts.where(upper_mask)
-        .stack()
-        .reset_index(name='n')
-    )
-    # 对齐新的轴名称
-    pairs_df = corr_pairs.merge(count_pairs, on=['fund_i', 'fund_j'])
-    strong_pairs = pairs_df[
-        (pairs_df['corr'] > threshold) & (pairs_df['n'] >= min_overlap)
-    ].sort_values('corr', ascending=False)
+    # 5) 列出满足阈值的基金对（仅取上三角，去除自相关），NaN 相关系数不会成边
+    symbols = corr_matrix.columns.tolist()
+    corr_values = corr_matrix.to_numpy()
+    overlap_mask = overlap_counts.to_numpy() >= min_overlap
+    rows, cols = clustering.threshold_edges(corr_values, threshold, mask=overlap_mask)
+    pair_corr = corr_values[rows, cols]
+    order = np.argsort(-pair_corr, kind='stable')
 
-    if strong_pairs.empty:
+    if len(rows) == 0:
         print(f'无相关性大于 {threshold} 且重叠样本 >= {min_overlap} 的基金对')
     else:
         print(f'\n相关性 > {threshold} 且重叠样本 >= {min_overlap} 的基金对（按相关性降序）：')
-        for _, row in strong_pairs.iterrows():
-            print(f"{row['fund_i']} - {row['fund_j']}: corr={row['corr']:.3f}, n={int(row['n'])}")
+        counts = overlap_counts.to_numpy()
+        for k in order:
+            i, j = rows[k], cols[k]
+            print(f"{symbols[i]} - {symbols[j]}: corr={pair_corr[k]:.3f}, n={int(counts[i, j])}")
 
     # 6) 根据强相关关系进行分组（连通分量），把互相关的基金放在同一组
-    threshold = 0.8
-    symbols = corr_matrix.columns.tolist()
-    adjacency = {s: set() for s in symbols}
-
-    for _, row in strong_pairs.iterrows():
-        a = row['fund_i']
-        b = row['fund_j']
-        adjacency.setdefault(a, set()).add(b)
-        adjacency.setdefault(b, set()).add(a)
-
-    visited = set()
-    groups = []
-    for s in symbols:
-        if s in visited:
-            continue
-        # 仅分组有边的节点（与至少一个基金强相关）
-        if len(adjacency.get(s, set())) == 0:
-            continue
-        stack = [s]
-        comp = []
-        visited.add(s)
-        while stack:
-            u = stack.pop()
-            comp.append(u)
-            for v in adjacency.get(u, set()):
-                if v not in visited:
-                    visited.add(v)
-                    stack.append(v)
-        groups.append(sorted(comp))
+    labels = clustering.connected_components(len(symbols), rows, cols)
+    # 仅分组有边的节点（与至少一个基金强相关）
+    groups = [
+        sorted(symbols[i] for i in members)
+        for members in clustering.groups_from_labels(labels)
+        if len(members) > 1
+    ]
 
     if not groups:
-        print('\n无强相关基金组（阈值 > 0.8）')
+        print(f'\n无强相关基金组（阈值 > {threshold}）')
     else:
         print(f"\n按相关性分组（阈值 > {threshold}）：")
         for i, comp in enumerate(groups, start=1):
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from database import fund_dao
+
+
+@pytest.fixture
+def engine():
+    """SQLite 中的 fund / fund_market / fund_market_coverage，时间按 ISO 字符串比较。"""
+    engine = create_engine('sqlite://')
+    bars = {
+        # 10 根 K 线，截至 2024-01-05 只有 5 根
+        'A': pd.date_range('2024-01-01', periods=10),
+        # 全部在 2024-01-05 之前
+        'B': pd.date_range('2023-12-27', periods=8),
+        'C': pd.date_range('2024-01-03', periods=2),
+    }
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE fund (symbol TEXT, found_date TEXT)"))
+        conn.execute(text("CREATE TABLE fund_market (symbol TEXT, time_frame TEXT, time TEXT)"))
+        conn.execute(text("CREATE TABLE fund_market_coverage (symbol TEXT, time_frame TEXT, first_time TEXT, "
+                          "last_time TEXT, bar_count INTEGER)"))
+        for k, (symbol, times) in enumerate(bars.items()):
+            conn.execute(text("INSERT INTO fund VALUES (:s, :d)"), {'s': symbol, 'd': f'2000-01-0{k + 1}'})
+            for t in times:
+                conn.execute(text("INSERT INTO fund_market VALUES (:s, '1d', :t)"), {'s': symbol, 't': t.isoformat()})
+            conn.execute(text("INSERT INTO fund_market_coverage VALUES (:s, '1d', :first, :last, :n)"),
+                         {'s': symbol, 'first': times[0].isoformat(), 'last': times[-1].isoformat(), 'n': len(times)})
+    return engine
+
+
+def eligible(engine, start_date, end_date, min_bars):
+    query, params = fund_dao.eligible_query(start_date, end_date, min_bars)
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text(query), params)]
+
+
+def test_end_only_counts_bars_up_to_end(engine):
+    end = '2024-01-05T23:59:59'
+    # A 的全部历史有 10 根，但截至 end 只有 5 根
+    assert eligible(engine, None, end, 6) == ['B']
+    assert eligible(engine, None, end, 5) == ['A', 'B']
+    assert eligible(engine, None, '2024-12-31', 10) == ['A']
+
+
+def test_range_counts_bars_inside_range(engine):
+    assert eligible(engine, '2024-01-02', '2024-01-06T00:00:00', 5) == ['A']
+    assert eligible(engine, '2024-01-01', '2024-01-03T00:00:00', 3) == ['A', 'B']
+    assert eligible(engine, '2024-01-01', '2024-01-03T00:00:00', 4) == []
+
+
+def test_query_params():
+    query, params = fund_dao.eligible_query(None, '2024-01-05', 30, time_frame='1w', limit=5)
+    assert params == {'time_frame': '1w', 'min_bars': 30, 'end_date': '2024-01-05', 'limit': 5}
+    assert ':start_date' not in query
+    _, params = fund_dao.eligible_query('2024-01-01', '2024-01-05', 30)
+    assert params['start_date'] == '2024-01-01'
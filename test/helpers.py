@@ -0,0 +1,152 @@
+"""测试共用的行情构造、内存中的 fund_market、记录 K 线的策略与 RelativeStrengthStrategy 运行方法。"""
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from commission.fund_commission import FundCommission
+from database import fund_market_dao
+from strategy.relative_strength_strategy import RelativeStrengthStrategy
+
+
+def market_frame(length=30, symbols=('A',)):
+    """
+    fund_market 查询结果格式的日线（time、symbol 列，按时间、symbol 排序）
+    第 k 个标的收盘价为 10 + k + sin(i)，vol 为 0..length-1，pct_chg 为 0.5
+    """
+    times = pd.date_range('2024-01-01', periods=length, tz='UTC')
+    frames = []
+    for k, symbol in enumerate(symbols):
+        close = 10 + k + np.sin(np.arange(length))
+        frames.append(pd.DataFrame({
+            'time': times, 'symbol': symbol, 'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+            'vol': np.arange(length, dtype=float), 'pct_chg': 0.5,
+        }))
+    return pd.concat(frames).sort_values(['time', 'symbol'], kind='stable').reset_index(drop=True)
+
+
+class FakeMarket:
+    """
+    内存中的 fund_market，查询方法与 fund_market_dao 中的同名函数一致，queries 按调用顺序记录查询
+    从 2024-01-01 起 days 个交易日（tz 非空时为该时区的零点），第 k 个标的新增时收盘价为 10 + k + 已有行数
+    """
+    COLUMNS = ['time', 'symbol', 'time_frame', 'open', 'high', 'low', 'close', 'vol', 'pct_chg']
+
+    def __init__(self, symbols=('a', 'b'), days=5, tz=None):
+        self.tz = tz
+        self.rows = []
+        self.queries = []
+        for day in pd.bdate_range('2024-01-01', periods=days, tz=tz):
+            self.add(symbols, day)
+
+    def patch(self, monkeypatch):
+        """用本对象的查询方法替换 fund_market_dao 中的同名函数。"""
+        for name in ('list_since', 'list_since_by_symbols', 'list_by_symbols_limit', 'list_new_bars', 'list_bars'):
+            monkeypatch.setattr(fund_market_dao, name, getattr(self, name))
+
+    def add(self, symbols, time, close=None):
+        """写入（或修正）symbols 在 time 的 K 线，close 为空时按行数生成。"""
+        time = self._time(time)
+        for k, symbol in enumerate(symbols):
+            value = close if close is not None else 10.0 + k + len(self.rows)
+            self.rows = [r for r in self.rows if not (r['symbol'] == symbol and r['time'] == time)]
+            self.rows.append({'time': time, 'symbol': symbol, 'time_frame': '1d', 'open': value, 'high': value,
+                              'low': value, 'close': value, 'vol': 100.0, 'pct_chg': 0.1})
+
+    def frame(self, symbols=None):
+        df = pd.DataFrame(self.rows, columns=self.COLUMNS)
+        return df if symbols is None else df[df['symbol'].isin(symbols)]
+
+    def list_since(self, symbol, since=None, time_frame='1d'):
+        self.queries.append(('since', (symbol,), since))
+        return self._since([symbol], since).sort_values('time').reset_index(drop=True)
+
+    def list_since_by_symbols(self, symbols, since=None, time_frame='1d', chunk_size=500):
+        self.queries.append(('since', tuple(symbols), since))
+        return self._since(symbols, since).sort_values(['symbol', 'time']).reset_index(drop=True)
+
+    def list_by_symbols_limit(self, symbols, end_date, limit=500, time_frame='1d', chunk_size=500):
+        self.queries.append(('history', tuple(symbols)))
+        df = self.frame(symbols)
+        df = df[df['time'] <= self._time(end_date)]
+        return df.sort_values('time').groupby('symbol').tail(limit).sort_values(['symbol', 'time'])
+
+    def list_new_bars(self, symbols, since, time_frame='1d'):
+        self.queries.append(('poll', tuple(symbols)))
+        return self._since(symbols, since).sort_values(['time', 'symbol'])
+
+    def list_bars(self, symbols, times, time_frame='1d'):
+        self.queries.append(('fetch', tuple(zip(symbols, times))))
+        df = self.frame()
+        keys = set(zip(symbols, (self._time(t) for t in times)))
+        return df[[k in keys for k in zip(df['symbol'], df['time'])]].sort_values(['time', 'symbol'])
+
+    def _since(self, symbols, since):
+        df = self.frame(symbols)
+        return df if since is None else df[df['time'] >= self._time(since)]
+
+    def _time(self, value):
+        value = pd.Timestamp(value)
+        return value.tz_localize(self.tz) if self.tz is not None and value.tzinfo is None else value
+
+
+class Record(bt.Strategy):
+    """记录单个 data 每根 K 线的 (时间, close, volume, pct_chg, SMA(5))。"""
+
+    def __init__(self):
+        self.sma = bt.ind.SMA(self.data.close, period=5)
+        self.rows = []
+
+    def next(self):
+        self.rows.append((self.data.datetime.datetime(0), self.data.close[0], self.data.volume[0],
+                          self.data.pct_chg[0], self.sma[0]))
+
+
+def run(feed, **kwargs):
+    """只加载 feed 运行 Record，返回记录的行；kwargs 传给 bt.Cerebro。"""
+    cerebro = bt.Cerebro(stdstats=False, **kwargs)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(Record)
+    return cerebro.run()[0].rows
+
+
+def random_frames(n=12, length=200, seed=0, late_every=4, late_bars=30, suspend=False, stagger=0):
+    """
+    n 个带共同因子的随机游走行情，索引为交易日（名为 time）
+    i % late_every == 1 的标的晚 late_bars 根上市；suspend 时 i % late_every == 2 的标的中途停牌 5 天；
+    stagger 非零时第 i 个标的晚 stagger * i 根上市
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 1, length)
+    frames = {}
+    for i in range(n):
+        close = 10 * np.exp(np.cumsum((0.5 * base + rng.normal(0, 1, length)) / 100))
+        frame = pd.DataFrame({
+            'open': close * (1 + rng.normal(0, 0.002, length)), 'high': close * 1.01, 'low': close * 0.99,
+            'close': close, 'volume': 1000.0, 'pct_chg': np.r_[0, np.diff(close) / close[:-1] * 100],
+        }, index=pd.bdate_range('2024-01-01', periods=length, name='time'))
+        if stagger:
+            frame = frame.iloc[stagger * i:]
+        elif i % late_every == 1:
+            frame = frame.iloc[late_bars:]
+        elif suspend and i % late_every == 2:
+            frame = frame.drop(frame.index[50:55])
+        frames[f's{i}'] = frame
+    return frames
+
+
+def run_relative(feeds: dict, cerebro: bt.Cerebro = None, **params):
+    """
+    用 RelativeStrengthStrategy（预先算好的 ATR）跑一次回测，返回 (最终市值, 策略)
+    cerebro 为空时创建不带 observer 的 Cerebro，params 覆盖默认的策略参数
+    """
+    cerebro = cerebro or bt.Cerebro(stdstats=False)
+    for name, feed in feeds.items():
+        cerebro.adddata(feed, name=name)
+    strategy_params = {'printlog': False, 'precomputed_atr': True, 'vol_threshold': 5.0, 'correlation_period': 30}
+    strategy_params.update(params)
+    cerebro.addstrategy(RelativeStrengthStrategy, **strategy_params)
+    cerebro.broker.setcash(1000000.0)
+    cerebro.broker.set_checksubmit(True)
+    cerebro.broker.set_shortcash(False)
+    cerebro.broker.addcommissioninfo(FundCommission())
+    strat = cerebro.run()[0]
+    return cerebro.broker.getvalue(), strat
@@ -0,0 +1,177 @@
+import time
+
+import backtrader as bt
+import pandas as pd
+import pytest
+from feeddata.fund_live_feed import FundLiveData
+from feeddata.live_hub import LiveDataHub
+from test.helpers import FakeMarket
+
+
+@pytest.fixture
+def market(monkeypatch):
+    market = FakeMarket(['a', 'b', 'c'])
+    market.patch(monkeypatch)
+    return market
+
+
+def test_one_query_per_poll(market):
+    hub = LiveDataHub(lookback=3, live_start_date='2024-01-05')
+    for symbol in ('a', 'b'):
+        hub.subscribe(symbol)
+    hub.start(background=False)
+    assert market.queries == [('history', ('a', 'b'))]
+    assert hub.pending('a') == hub.pending('b') == 3
+    assert hub.watermark == pd.Timestamp('2024-01-05')
+
+    assert hub.poll() == 0
+    market.add(['a', 'b', 'c'], '2024-01-08')
+    assert hub.poll() == 2
+    assert market.queries[1:] == [('poll', ('a', 'b'))] * 2
+    assert hub.watermark == pd.Timestamp('2024-01-08')
+
+    times = [hub.get('a')['time'] for _ in range(4)]
+    assert times == list(pd.to_datetime(['2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08']))
+    assert hub.get('a') is None
+    assert hub.get('a', timeout=0.01) is None
+    hub.stop()
+
+
+def test_same_time_split_across_polls(market):
+    hub = LiveDataHub(lookback=1, live_start_date='2024-01-05')
+    hub.subscribe('a')
+    hub.subscribe('b')
+    hub.start(background=False)
+    # a 在轮询之前入库，同一时刻的 b 在轮询之后才入库
+    market.add(['a'], '2024-01-08')
+    assert hub.poll() == 1
+    assert hub.watermark == pd.Timestamp('2024-01-08')
+    market.add(['b'], '2024-01-08')
+    assert hub.poll() == 1
+    assert hub.poll() == 0
+    assert [hub.get('a')['time'] for _ in range(hub.pending('a'))] == list(pd.to_datetime(['2024-01-05', '2024-01-08']))
+    assert [hub.get('b')['time'] for _ in range(hub.pending('b'))] == list(pd.to_datetime(['2024-01-05', '2024-01-08']))
+    hub.stop()
+
+
+def test_feeds_do_not_block(market):
+    hub = LiveDataHub(lookback=2, live_start_date='2024-01-05', check_interval=0.05)
+    seen = []
+
+    class Record(bt.Strategy):
+        def next(self):
+            seen.append((self.datetime.date(0), tuple(d.close[0] for d in self.datas)))
+            if len(seen) == 2:
+                market.add(['a', 'b', 'c'], '2024-01-08')
+            if len(seen) == 3:
+                self.env.runstop()
+
+    cerebro = bt.Cerebro(stdstats=False)
+    for symbol in ('a', 'b', 'c'):
+        cerebro.adddata(FundLiveData(symbol=symbol, hub=hub, qcheck=0.01), name=symbol)
+    cerebro.addstrategy(Record)
+    cerebro.run()
+
+    assert [day.isoformat() for day, _ in seen] == ['2024-01-04', '2024-01-05', '2024-01-08']
+    assert seen[-1][1] == (25.0, 27.0, 29.0)
+    assert market.queries[0] == ('history', ('a', 'b', 'c'))
+    assert all(q == ('poll', ('a', 'b', 'c')) for q in market.queries[1:])
+    assert hub._thread is None
+
+
+class FakeListener:
+    """第一次连接失败、收到一批通知后断开一次的监听连接。"""
+
+    def __init__(self, market):
+        self.market = market
+        self.connects = 0
+        self.notifies = []
+        self.drop = False
+
+    def connect(self):
+        self.connects += 1
+        if self.connects == 1:
+            raise ConnectionError('refused')
+
+    def wait(self, timeout):
+        if self.drop:
+            self.drop = False
+            raise ConnectionError('lost')
+        if not self.notifies:
+            time.sleep(0.001)
+            return []
+        payloads, self.notifies = self.notifies, []
+        return payloads
+
+    def close(self):
+        pass
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_push_fetches_notified_rows(market):
+    listener = FakeListener(market)
+    hub = LiveDataHub(lookback=1, live_start_date='2024-01-05', check_interval=0.01, push=True, listener=listener)
+    hub.subscribe('a')
+    hub.subscribe('b')
+    hub.start()
+    # 第一次连接失败时退回轮询，重连成功后补齐轮询一次
+    wait_until(lambda: hub.listening)
+    assert listener.connects == 2
+    assert hub.get('a')['time'] == hub.get('b')['time'] == pd.Timestamp('2024-01-05')
+
+    market.add(['a', 'b', 'c'], '2024-01-08')
+    listener.notifies = [{'symbol': 'a', 'time': '2024-01-08', 'time_frame': '1d'},
+                         {'symbol': 'c', 'time': '2024-01-08', 'time_frame': '1d'},
+                         {'symbol': 'b', 'time': '2024-01-08', 'time_frame': '1w'}]
+    row = hub.get('a', timeout=5.0)
+    assert row['time'] == pd.Timestamp('2024-01-08')
+    # 只查询订阅标的、相同周期的通知行
+    assert [q for q in market.queries if q[0] == 'fetch'] == [('fetch', (('a', '2024-01-08'),))]
+    assert hub.watermark == pd.Timestamp('2024-01-05')
+
+    # 断开后重连，补齐轮询取到 b 的新 K 线，a 不会重复
+    polls = hub.polls
+    listener.drop = True
+    wait_until(lambda: hub.polls > polls and hub.listening)
+    assert hub.pending('a') == 0
+    assert hub.get('b', timeout=5.0)['time'] == pd.Timestamp('2024-01-08')
+    hub.stop()
+    assert not hub.listening
+
+
+def test_push_advances_watermark_when_contiguous(market):
+    hub = LiveDataHub(lookback=1, live_start_date='2024-01-05', push=True)
+    hub.subscribe('a')
+    hub.subscribe('b')
+    hub.start(background=False)
+    market.add(['a', 'b'], '2024-01-08')
+    market.add(['a', 'b'], '2024-01-09')
+    # 只有 a 收到通知，b 可能漏了通知，watermark 不动
+    assert hub.fetch([{'symbol': 'a', 'time': '2024-01-08'}, {'symbol': 'a', 'time': '2024-01-09'}]) == 2
+    assert hub.watermark == pd.Timestamp('2024-01-05')
+    assert hub.fetch([{'symbol': 'b', 'time': '2024-01-08'}]) == 1
+    assert hub.watermark == pd.Timestamp('2024-01-08')
+    # 补齐轮询从 watermark 开始，取到漏掉通知的 b 而不重复 a
+    assert hub.poll() == 1
+    assert hub.pending('a') == hub.pending('b') == 3
+    assert hub.watermark == pd.Timestamp('2024-01-09')
+    hub.stop()
+
+
+def test_resume_skips_history(market):
+    hub = LiveDataHub(lookback=3, live_start_date='2024-01-05')
+    hub.subscribe('a', since='2024-01-03')
+    hub.subscribe('b')
+    hub.start(background=False)
+    # 恢复的标的只补取快照之后的 K 线，其它标的照常加载 lookback 历史
+    assert market.queries == [('history', ('b',)), ('poll', ('a',))]
+    assert [hub.get('a')['time'] for _ in range(hub.pending('a'))] == list(pd.to_datetime(['2024-01-04', '2024-01-05']))
+    assert hub.pending('b') == 3
+    assert hub.watermark == pd.Timestamp('2024-01-05')
+    hub.stop()
@@ -0,0 +1,92 @@
+"""
+实时行情从写入 fund_market 到策略 next() 的延迟：轮询与 LISTEN/NOTIFY 推送模式对比
+
+需要 .env 中配置的本地 PostgreSQL 已执行 docs/fund_market_notify.sql。
+测试行使用 time_frame='bench'，结束后删除。
+
+    python test/live_latency_bench.py                    # 推送与轮询各写入 20 根 K 线
+    python test/live_latency_bench.py --bars 50 --check-interval 5
+"""
+import argparse
+import threading
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from database import db_pool
+from feeddata.fund_live_feed import FundLiveData
+from feeddata.live_hub import LiveDataHub
+
+SYMBOL = 'BENCH.LATENCY'
+TIME_FRAME = 'bench'
+START = pd.Timestamp('2100-01-01', tz='UTC')
+
+INSERT = text("""
+    INSERT INTO fund_market (time, symbol, time_frame, open, high, low, close, pre_close, change, pct_chg,
+                             vol, amount, created_at, updated_at)
+    VALUES (:time, :symbol, :time_frame, 1, 1, 1, 1, 1, 0, 0, 0, 0, now(), now())
+""")
+DELETE = text("DELETE FROM fund_market WHERE symbol = :symbol AND time_frame = :time_frame")
+
+
+def cleanup():
+    with db_pool.get_engine().begin() as conn:
+        conn.execute(DELETE, {'symbol': SYMBOL, 'time_frame': TIME_FRAME})
+
+
+def bench(push: bool, bars: int, check_interval: float, gap: float) -> np.ndarray:
+    """每隔 gap 秒写入一根 K 线（提交后记时），返回每根 K 线到 next() 的延迟（秒）。"""
+    cleanup()
+    inserted = {}
+    received = {}
+
+    class Record(bt.Strategy):
+        def next(self):
+            received[self.datetime.datetime(0)] = time.perf_counter()
+            if len(received) == bars:
+                self.env.runstop()
+
+    def writer():
+        # 等推送连接或首次轮询就绪
+        time.sleep(max(1.0, check_interval))
+        for i in range(bars):
+            dt = START + pd.Timedelta(minutes=i)
+            with db_pool.get_engine().begin() as conn:
+                conn.execute(INSERT, {'time': dt, 'symbol': SYMBOL, 'time_frame': TIME_FRAME})
+            inserted[dt.tz_localize(None).to_pydatetime()] = time.perf_counter()
+            time.sleep(gap)
+
+    hub = LiveDataHub(time_frame=TIME_FRAME, check_interval=check_interval, lookback=0,
+                      live_start_date='2099-12-31', push=push)
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(FundLiveData(symbol=SYMBOL, hub=hub, qcheck=0.05), name=SYMBOL)
+    cerebro.addstrategy(Record)
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    try:
+        cerebro.run()
+    finally:
+        thread.join()
+        cleanup()
+    return np.array([received[dt] - inserted[dt] for dt in inserted if dt in received])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bars', type=int, default=20)
+    parser.add_argument('--check-interval', dest='check_interval', type=float, default=2.0)
+    parser.add_argument('--gap', type=float, default=0.3)
+    args = parser.parse_args()
+
+    for push in (True, False):
+        latency = bench(push, args.bars, args.check_interval, args.gap) * 1000
+        name = 'push' if push else f'poll ({args.check_interval:g}s)'
+        print(f"{name:>12}: bars {len(latency)}, median {np.median(latency):.1f} ms, "
+              f"p95 {np.percentile(latency, 95):.1f} ms, max {latency.max():.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import backtrader as bt
+import numpy as np
+from feeddata.array_feed import FundArrayIndicatorData, columns_from_frame
+from feeddata.fund_feeddata import FundIndicatorData
+from indicator import panel_indicators
+from runner.relative_runner import LOW_MEMORY_COLUMNS
+from strategy.relative_strength_strategy import RelativeStrengthStrategy
+from test.helpers import random_frames, run_relative
+
+
+def indicator_frames():
+    frames = {name: frame.assign(amount=1.0) for name, frame in random_frames().items()}
+    return panel_indicators.add_indicator_columns(frames, {'atr': 10})
+
+
+def run(frames, **kwargs):
+    feeds = {name: FundIndicatorData(dataname=frame) for name, frame in frames.items()}
+    # 止损阈值很小，保证会用到 close[-1]
+    return run_relative(feeds, bt.Cerebro(stdstats=False, **kwargs), stop_loss_pct=0.05)
+
+
+def test_exactbars_with_trimmed_columns_matches_full_run():
+    frames = indicator_frames()
+    expected, _ = run(frames)
+    trimmed = {name: frame[list(LOW_MEMORY_COLUMNS)] for name, frame in frames.items()}
+    value, strat = run(trimmed, exactbars=1)
+    assert value == expected
+    # data 只保留 lookback 与 atr 预热期需要的历史
+    assert RelativeStrengthStrategy.lookback <= strat.datas[0].close.maxlen <= strat.p.rebalance_period + 1
+    assert np.isnan(strat.datas[0].volume[0])
+
+
+def test_exactbars_with_array_feeds_matches_full_run():
+    frames = indicator_frames()
+    expected, _ = run(frames)
+    feeds = {}
+    for name, frame in frames.items():
+        feeds[name] = FundArrayIndicatorData(name=name)
+        feeds[name].set_columns(columns_from_frame(frame[list(LOW_MEMORY_COLUMNS)], extra=('atr',)))
+    value, strat = run_relative(feeds, bt.Cerebro(stdstats=False, exactbars=1), stop_loss_pct=0.05)
+    assert value == expected
+    assert RelativeStrengthStrategy.lookback <= strat.datas[0].close.maxlen <= strat.p.rebalance_period + 1
+    assert np.isnan(strat.datas[0].volume[0])
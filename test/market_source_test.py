@@ -0,0 +1,63 @@
+import pytest
+from common import config
+from database import fund_market_dao
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    calls = []
+    monkeypatch.setattr(fund_market_dao, 'read_frame', lambda query, params, dtypes: calls.append(query))
+    return calls
+
+
+def test_market_source_without_aggregates(monkeypatch):
+    monkeypatch.setattr(config, 'USE_CONTINUOUS_AGGREGATES', False)
+    for time_frame in ('1d', '1w', '1M'):
+        assert fund_market_dao.market_source(time_frame) == 'fund_market'
+
+
+def test_market_source_routes_weekly_and_monthly(monkeypatch):
+    monkeypatch.setattr(config, 'USE_CONTINUOUS_AGGREGATES', True)
+    assert fund_market_dao.market_source('1d') == 'fund_market'
+    weekly = fund_market_dao.market_source('1w')
+    assert 'FROM fund_market_1w' in weekly
+    assert weekly.rstrip().endswith('AS fund_market')
+    # 补齐外层查询用到的列
+    for column in ('AS change', 'AS pct_chg', "CAST('1w' AS text) AS time_frame"):
+        assert column in weekly
+    assert 'FROM fund_market_1mo' in fund_market_dao.market_source('1M')
+
+
+def test_queries_use_market_source(monkeypatch, queries):
+    monkeypatch.setattr(config, 'USE_CONTINUOUS_AGGREGATES', True)
+    fund_market_dao.list_by_limit('A', '2024-01-01', time_frame='1w')
+    fund_market_dao.list_fund_market('A', '2023-01-01', '2024-01-01', time_frame='1M')
+    fund_market_dao.list_by_limit('A', '2024-01-01', time_frame='1d')
+    assert 'fund_market_1w' in queries[0]
+    assert 'fund_market_1mo' in queries[1]
+    assert 'fund_market_1' not in queries[2]
+
+
+def test_list_bars_aliases_aggregate(monkeypatch, queries):
+    monkeypatch.setattr(config, 'USE_CONTINUOUS_AGGREGATES', True)
+    fund_market_dao.list_bars(['A'], ['2024-01-05'], time_frame='1w')
+    fund_market_dao.list_bars(['A'], ['2024-01-05'], time_frame='1d')
+    weekly, daily = queries
+    assert 'FROM fund_market_1w' in weekly and ') AS m\n' in weekly
+    assert 'AS fund_market' not in weekly
+    assert 'FROM fund_market AS m\n' in daily
+
+
+def test_list_bars_sql_compiles_with_aggregate(monkeypatch, queries):
+    # SQLite 中用同名视图代替连续聚合，检查别名与 JOIN 的语法
+    sqlalchemy = pytest.importorskip('sqlalchemy')
+    monkeypatch.setattr(config, 'USE_CONTINUOUS_AGGREGATES', True)
+    fund_market_dao.list_bars(['A'], ['2024-01-05'], time_frame='1w')
+    query = queries[0].replace('unnest(CAST(:symbols AS text[]), CAST(:times AS timestamptz[])) AS k(symbol, time)',
+                               '(SELECT :symbols AS symbol, :times AS time) AS k')
+    engine = sqlalchemy.create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(sqlalchemy.text("CREATE TABLE fund_market_1w (time TEXT, symbol TEXT, close REAL, pre_close REAL)"))
+        conn.execute(sqlalchemy.text("INSERT INTO fund_market_1w VALUES ('2024-01-05', 'A', 11.0, 10.0)"))
+        rows = conn.execute(sqlalchemy.text(query), {'symbols': 'A', 'times': '2024-01-05', 'time_frame': '1w'}).mappings().all()
+    assert [(r['symbol'], r['time_frame'], r['pct_chg']) for r in rows] == [('A', '1w', pytest.approx(10.0))]
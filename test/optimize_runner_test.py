@@ -0,0 +1,51 @@
+import numpy as np
+from runner import optimize_runner
+from feeddata.shared_panel import SharedPanel
+from test.helpers import random_frames
+
+
+GRID = {'rebalance_period': [5, 10], 'num_top': [2, 3], 'vol_threshold': [5.0], 'correlation_period': [20]}
+
+
+def test_attach_is_zero_copy():
+    with optimize_runner.create_panel(random_frames(n=8, length=150)) as panel:
+        attached = SharedPanel.attach(panel.spec)
+        view = attached.column('s1', 'close')
+        np.testing.assert_array_equal(view, random_frames(n=8, length=150)['s1']['close'].to_numpy())
+        assert not view.flags.writeable and not view.flags.owndata
+        panel.column('s1', 'close')[0] = -1.0
+        assert view[0] == -1.0
+        attached.close()
+
+
+def test_optimize_resumes_and_matches_serial(tmp_path):
+    frames = optimize_runner.add_atr_columns(random_frames(n=8, length=150), GRID['rebalance_period'])
+    output = str(tmp_path / 'results.csv')
+    with optimize_runner.create_panel(frames, GRID['rebalance_period']) as panel:
+        serial = optimize_runner.run_backtest(panel, {'rebalance_period': 5, 'num_top': 2, 'vol_threshold': 5.0,
+                                                      'correlation_period': 20})
+        # 模拟崩溃：只完成了第一组，最后一行写了一半
+        table = optimize_runner.optimize(panel, {**GRID, 'rebalance_period': [5], 'num_top': [2]}, output, workers=1)
+        with open(output, 'a') as f:
+            f.write('10,3,5.0')
+        table = optimize_runner.optimize(panel, GRID, output, workers=2)
+
+    assert len(table) == 4
+    assert sorted(zip(table['rebalance_period'], table['num_top'])) == [(5, 2), (5, 3), (10, 2), (10, 3)]
+    row = table[(table['rebalance_period'] == 5) & (table['num_top'] == 2)].iloc[0]
+    assert row['final_value'] == serial['final_value']
+    assert list(table['sharpe'].fillna(-np.inf)) == sorted(table['sharpe'].fillna(-np.inf), reverse=True)
+
+
+def test_resume_keys_non_numeric_params(tmp_path):
+    output = str(tmp_path / 'results.csv')
+    names = ['rebalance_rule', 'corr_dtype', 'stop_loss_pct', 'corr_threshold']
+    grid = {'rebalance_rule': ['days', 'weekly'], 'corr_dtype': ['float32'], 'stop_loss_pct': [1, 2.5],
+            'corr_threshold': [0.8]}
+    combos = optimize_runner.param_grid(grid)
+    result = {'sharpe': 1.0, 'total_return': 0.1, 'max_drawdown': 2.0, 'final_value': 1.0}
+    with optimize_runner._ResultWriter(output, names) as writer:
+        for params in combos[:3]:
+            writer.write(params, result)
+    done = optimize_runner._completed(output, names)
+    assert [optimize_runner._key(p, names) in done for p in combos] == [True, True, True, False]
@@ -0,0 +1,149 @@
+import threading
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+from broker import order_journal
+from broker.live_broker import LiveBroker
+from broker.order_journal import OrderJournal
+from broker.sim_broker import SimBroker
+from feeddata.fund_feeddata import FundPandasData
+
+
+class AlternatingStrategy(bt.Strategy):
+    """每 5 根 K 线交替买入与平仓。"""
+
+    def next(self):
+        if len(self) % 5:
+            return
+        if self.position.size:
+            self.close()
+        else:
+            self.buy(size=100)
+
+
+def frame(length=40):
+    close = 10 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, length)))
+    return pd.DataFrame({
+        'open': close, 'high': close * 1.01, 'low': close * 0.99,
+        'close': close, 'volume': 1000.0, 'pct_chg': 0.0,
+    }, index=pd.bdate_range('2024-01-01', periods=length))
+
+
+def test_sim_broker_journals_orders_and_fills(tmp_path):
+    path = str(tmp_path / 'orders.jsonl')
+    journal = OrderJournal(path)
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(FundPandasData(dataname=frame()), name='s0')
+    cerebro.addstrategy(AlternatingStrategy)
+    cerebro.broker = SimBroker(journal=journal)
+    cerebro.broker.setcash(100000.0)
+    cerebro.run()
+
+    # broker.stop 已等待写盘，无需 close
+    events = list(order_journal.replay(path))
+    completed = [e for e in events if e['event'] == 'Completed']
+    assert len(completed) == 7
+    assert [e['side'] for e in completed[:2]] == ['buy', 'sell']
+    assert all(e['data'] == 's0' and e['executed_price'] > 0 for e in completed)
+    assert {e['event'] for e in events} == {'Submitted', 'Accepted', 'Completed'}
+    # 最后一根 K 线提交的订单没有机会成交，重启后可据此查到未结束的订单
+    last = order_journal.last_events(path)
+    assert [e['event'] for e in last.values()].count('Completed') == 7
+    assert [e['event'] for e in last.values() if e['event'] != 'Completed'] == ['Submitted']
+    journal.close()
+    assert journal.dropped == 0
+
+
+def test_replay_skips_partial_last_line(tmp_path):
+    path = str(tmp_path / 'orders.jsonl')
+    journal = OrderJournal(path, batch_size=2)
+    for i in range(5):
+        journal.record({'ref': i, 'event': 'Submitted'})
+    journal.close()
+    assert journal.written == 5
+    # 模拟写到一半时崩溃
+    with open(path, 'a') as f:
+        f.write('{"ref": 5, "ev')
+    assert [e['ref'] for e in order_journal.replay(path)] == [0, 1, 2, 3, 4]
+    assert list(order_journal.replay(str(tmp_path / 'missing.jsonl'))) == []
+
+
+def test_record_never_blocks_when_queue_is_full(tmp_path, monkeypatch):
+    entered = threading.Event()
+    release = threading.Event()
+    real_dumps = order_journal.json.dumps
+
+    def slow_dumps(*args, **kwargs):
+        # 后台线程序列化时卡住，模拟写盘很慢
+        entered.set()
+        release.wait()
+        return real_dumps(*args, **kwargs)
+
+    monkeypatch.setattr(order_journal.json, 'dumps', slow_dumps)
+    journal = OrderJournal(str(tmp_path / 'orders.jsonl'), maxsize=3)
+    assert journal.record({'ref': 0})
+    entered.wait()
+    # 后台线程拿着第 0 个事件，队列只能再放 3 个
+    accepted = [journal.record({'ref': i}) for i in range(1, 10)]
+    assert accepted == [True] * 3 + [False] * 6
+    assert journal.dropped == 6
+    release.set()
+    journal.close()
+    assert [e['ref'] for e in order_journal.replay(journal.path)] == [0, 1, 2, 3]
+
+
+def test_open_error_reaches_caller(tmp_path):
+    with pytest.raises(OSError):
+        OrderJournal(str(tmp_path / 'missing' / 'orders.jsonl'))
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_flush_and_close_return_when_writer_died(tmp_path, monkeypatch):
+    def broken_dumps(*args, **kwargs):
+        raise RuntimeError('writer crashed')
+
+    monkeypatch.setattr(order_journal.json, 'dumps', broken_dumps)
+    journal = OrderJournal(str(tmp_path / 'orders.jsonl'), maxsize=2)
+    journal.record({'ref': 0})
+    journal._thread.join(timeout=5.0)
+    assert not journal._thread.is_alive()
+    # 队列已满，且没有线程再取
+    assert journal.record({'ref': 1}) and journal.record({'ref': 2})
+    assert not journal.record({'ref': 3})
+
+    closer = threading.Thread(target=lambda: (journal.flush(), journal.close()))
+    closer.start()
+    closer.join(timeout=5.0)
+    assert not closer.is_alive()
+    assert journal.flush() is False
+
+
+class OneOrderStrategy(bt.Strategy):
+    def __init__(self):
+        self.statuses = []
+
+    def next(self):
+        if len(self) == 2:
+            self.buy(size=100)
+
+    def notify_order(self, order):
+        self.statuses.append(order.getstatusname())
+
+
+def test_live_broker_journals_through_notify(tmp_path, capsys):
+    path = str(tmp_path / 'orders.jsonl')
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(FundPandasData(dataname=frame(5)), name='s0')
+    cerebro.addstrategy(OneOrderStrategy)
+    cerebro.broker = LiveBroker(journal=OrderJournal(path))
+    strat = cerebro.run()[0]
+
+    # 订单发往交易所后由 notify 写日志并通知策略，默认不打印
+    assert strat.statuses == ['Submitted']
+    events = list(order_journal.replay(path))
+    assert [(e['event'], e['side'], e['size'], e['info']['real_order_id']) for e in events] == [('Submitted', 'buy', 100, 1)]
+    assert [o.status for o in cerebro.broker.orders] == [bt.Order.Submitted]
+    assert 'LiveBroker' not in capsys.readouterr().out
+    cerebro.broker.p.journal.close()
@@ -0,0 +1,68 @@
+import backtrader as bt
+import numpy as np
+import pytest
+from feeddata.fund_feeddata import FundIndicatorData
+from indicator import panel_indicators
+from test.helpers import random_frames, run_relative
+
+
+class Record(bt.Strategy):
+    params = (('period', 10),)
+
+    def __init__(self):
+        self.atr = {d: bt.indicators.ATR(d, period=self.p.period) for d in self.datas}
+        self.sma = {d: bt.indicators.SMA(d.close, period=self.p.period * 2) for d in self.datas}
+        self.rows = []
+
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        for d in self.datas:
+            if len(d) and d.datetime[0] == self.datetime[0]:
+                self.rows.append((d._name, len(d), self.atr[d][0], d.atr[0], self.sma[d][0], d.sma[0]))
+
+
+@pytest.mark.parametrize('runonce', [True, False])
+def test_parity_with_backtrader_indicators(runonce):
+    frames = panel_indicators.add_indicator_columns(random_frames(n=5, length=80, stagger=7), {'atr': 10, 'sma': 20})
+    cerebro = bt.Cerebro(stdstats=False, runonce=runonce)
+    for name, frame in frames.items():
+        cerebro.adddata(FundIndicatorData(dataname=frame), name=name)
+    cerebro.addstrategy(Record)
+    rows = cerebro.run()[0].rows
+    assert rows
+    for name, length, bt_atr, atr, bt_sma, sma in rows:
+        if length <= 10:
+            assert np.isnan(atr)
+        else:
+            assert atr == pytest.approx(bt_atr, rel=1e-9)
+        if length < 20:
+            assert np.isnan(sma)
+        else:
+            assert sma == pytest.approx(bt_sma, rel=1e-9)
+
+
+def test_columns_follow_each_symbol():
+    frames = random_frames(n=3, length=30, stagger=7)
+    result = panel_indicators.add_indicator_columns(frames, {'sma': 5})
+    for name, frame in frames.items():
+        expected = frame['close'].rolling(5).mean().to_numpy()
+        np.testing.assert_allclose(result[name]['sma'].to_numpy(), expected, rtol=1e-12)
+        assert 'sma' not in frame.columns
+
+
+def test_unknown_indicator():
+    with pytest.raises(ValueError):
+        panel_indicators.add_indicator_columns(random_frames(n=1, length=30), {'rsi': 14})
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'runonce': False}, {'exactbars': 1}])
+def test_precomputed_atr_matches_indicator_with_late_listings(kwargs):
+    # 上市晚的标的在预热完之前不能参与排序，与 ATR 指标的逐 data 最小周期一致
+    frames = panel_indicators.add_indicator_columns(random_frames(late_every=3), {'atr': 10})
+    values = []
+    for precomputed in (True, False):
+        feeds = {name: FundIndicatorData(dataname=frame) for name, frame in frames.items()}
+        values.append(run_relative(feeds, bt.Cerebro(stdstats=False, **kwargs), precomputed_atr=precomputed)[0])
+    assert values[0] == values[1]
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from database import fund_adj_dao, fund_market_dao
+from feeddata import fund_feeddata
+from feeddata.array_feed import FundArrayIndicatorData
+from feeddata.prefetch import prefetch
+
+
+def test_results_keep_input_order():
+    # 前面的任务更慢，完成顺序与输入顺序相反
+    def loader(item):
+        time.sleep(0.02 * (5 - item))
+        return item * 10
+
+    assert list(prefetch(range(5), loader, workers=5, max_pending=5)) == [(i, i * 10) for i in range(5)]
+
+
+def test_pending_is_bounded():
+    lock = threading.Lock()
+    started = []
+    consumed = []
+    peak = []
+
+    def loader(item):
+        with lock:
+            started.append(item)
+            peak.append(len(started) - len(consumed))
+        return item
+
+    for item, _ in prefetch(range(20), loader, workers=4, max_pending=3):
+        with lock:
+            consumed.append(item)
+        # 消费很慢，加载不应该跑到前面去
+        time.sleep(0.005)
+    assert consumed == list(range(20))
+    assert max(peak) <= 3
+
+
+def test_close_cancels_pending():
+    calls = []
+
+    def loader(item):
+        calls.append(item)
+        time.sleep(0.01)
+        return item
+
+    results = prefetch(range(100), loader, workers=1, max_pending=2)
+    assert next(results) == (0, 0)
+    results.close()
+    # 已提交的任务最多再执行一个，其余被取消
+    assert len(calls) <= 3
+
+
+def fake_market(monkeypatch):
+    times = pd.date_range('2024-01-01', periods=4, tz='UTC')
+    queries = []
+
+    def list_by_symbols_limit(symbols, end_date, limit=500, time_frame='1d', chunk_size=500):
+        queries.append(list(symbols))
+        rows = [{'time': t, 'symbol': s, 'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0 + i,
+                 'vol': 1.0, 'pct_chg': 0.0} for s in symbols for i, t in enumerate(times)]
+        return pd.DataFrame(rows)
+
+    def list_adj(symbols, end_date):
+        return pd.DataFrame({'time': [times[0], times[2]] * len(symbols),
+                             'symbol': [s for s in symbols for _ in range(2)], 'adj_factor': [1.0, 2.0] * len(symbols)})
+
+    monkeypatch.setattr(fund_market_dao, 'list_by_symbols_limit', list_by_symbols_limit)
+    monkeypatch.setattr(fund_adj_dao, 'list_by_symbols', list_adj)
+    return queries
+
+
+def test_prefetch_feeds_batches_in_order(monkeypatch):
+    queries = fake_market(monkeypatch)
+    symbols = [f's{i}' for i in range(7)]
+    feeds = list(fund_feeddata.prefetch_feeds(symbols, '2024-01-04', bars=4, batch_size=3, adjust_type='backward'))
+    assert sorted(queries) == [['s0', 's1', 's2'], ['s3', 's4', 's5'], ['s6']]
+    assert [s for s, _ in feeds] == symbols
+    # 后复权：复权日之后的价格乘以 2
+    assert feeds[0][1].p.dataname['close'].tolist() == [1.0, 2.0, 6.0, 8.0]
+
+
+def test_prefetch_array_feeds(monkeypatch):
+    fake_market(monkeypatch)
+    feeds = dict(fund_feeddata.prefetch_feeds(['s0', 's1'], '2024-01-04', bars=4, adjust_type='backward',
+                                              indicators={'atr': 2}, columns=('open', 'high', 'low', 'close', 'atr'), array=True))
+    assert all(isinstance(feed, FundArrayIndicatorData) for feed in feeds.values())
+    columns = feeds['s0']._columns
+    assert columns['close'].tolist() == [1.0, 2.0, 6.0, 8.0]
+    assert len(columns['atr']) == 4 and np.isnan(columns['volume']).all()
+    with pytest.raises(ValueError):
+        list(fund_feeddata.prefetch_feeds(['s0'], '2024-01-04', bars=4, indicators={'sma': 2}, array=True))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from feeddata import price_adjust
+
+
+def make_bars(n=6):
+    times = pd.date_range('2024-01-01', periods=n, tz='Asia/Shanghai')
+    close = np.arange(1, n + 1, dtype=float)
+    return pd.DataFrame({'time': times, 'symbol': 'A', 'open': close, 'high': close, 'low': close, 'close': close})
+
+
+def make_adjs():
+    times = pd.to_datetime(['2023-12-01', '2024-01-03', '2024-01-05']).tz_localize('Asia/Shanghai')
+    return pd.DataFrame({'time': times, 'symbol': 'A', 'adj_factor': [1.0, 2.0, 4.0]})
+
+
+def test_align_factors_as_of():
+    bars = make_bars()
+    factors = price_adjust.align_factors(bars['time'], make_adjs())
+    assert factors.tolist() == [1.0, 1.0, 2.0, 2.0, 4.0, 4.0]
+
+
+def test_adjust_prices_forward_and_backward():
+    bars = make_bars()
+    adjusted = price_adjust.adjust_prices(bars, make_adjs())
+    factors = np.array([1.0, 1.0, 2.0, 2.0, 4.0, 4.0])
+    np.testing.assert_allclose(adjusted['backward']['close'], bars['close'] * factors)
+    np.testing.assert_allclose(adjusted['forward']['close'], bars['close'] * factors / 4.0)
+    # 原始数据不被修改
+    assert bars['close'].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+
+def test_adjust_frame_cache_tracks_factor_version():
+    price_adjust.clear_cache()
+    bars = make_bars()
+    adjs = make_adjs()
+    first = price_adjust.adjust_frame('A', bars, adjs, 'forward')
+    assert len(price_adjust._cache) == 1
+    price_adjust.adjust_frame('A', bars, adjs, 'forward')
+    assert len(price_adjust._cache) == 1
+    adjs.loc[2, 'adj_factor'] = 8.0
+    updated = price_adjust.adjust_frame('A', bars, adjs, 'forward')
+    assert len(price_adjust._cache) == 2
+    assert updated['close'].iloc[-1] == 6.0
+    assert first['close'].iloc[-1] == 6.0 and updated['close'].iloc[0] == 1.0 / 8.0
+    # 中间的因子被修正同样使缓存失效
+    adjs.loc[1, 'adj_factor'] = 4.0
+    assert price_adjust.adjust_frame('A', bars, adjs, 'forward')['close'].iloc[2] == 3.0 * 4.0 / 8.0
+    assert price_adjust.adjust_frame('A', bars, None, None) is bars
+
+
+def test_adjust_frame_cache_tracks_bar_content():
+    price_adjust.clear_cache()
+    bars = make_bars()
+    adjs = make_adjs()
+    first = price_adjust.adjust_frame('A', bars, adjs, 'backward')
+    # 返回副本，调用方修改不会污染缓存
+    first.loc[first.index[0], 'close'] = -1.0
+    assert price_adjust.adjust_frame('A', bars, adjs, 'backward')['close'].iloc[0] == 1.0
+    # 条数与首尾时间不变、中间的 K 线被修正
+    corrected = bars.copy()
+    corrected.loc[3, 'close'] = 40.0
+    assert price_adjust.adjust_frame('A', corrected, adjs, 'backward')['close'].iloc[3] == 80.0
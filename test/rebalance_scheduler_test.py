@@ -0,0 +1,81 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from strategy.rebalance_scheduler import RebalanceScheduler, day_numbers
+
+
+def bt_times(index):
+    return np.array([bt.date2num(t) for t in index.to_pydatetime()])
+
+
+def due_dates(scheduler, times):
+    return [bt.num2date(t).date().isoformat() for t in times if scheduler.advance(t)]
+
+
+def run_both(rule, times, **kwargs):
+    pre = RebalanceScheduler(rule, **kwargs)
+    pre.build(times)
+    inc = RebalanceScheduler(rule, **kwargs)
+    return due_dates(pre, times), due_dates(inc, times)
+
+
+def test_every_n_trading_days():
+    times = bt_times(pd.bdate_range('2024-01-01', periods=12))
+    pre, inc = run_both('days', times, period=5)
+    assert pre == inc == ['2024-01-01', '2024-01-08', '2024-01-15']
+
+
+def test_weekly_carries_over_holiday():
+    days = pd.bdate_range('2024-01-01', '2024-01-26').drop(pd.Timestamp('2024-01-12'))
+    pre, inc = run_both('weekly', bt_times(days), weekday=4)
+    assert pre == inc == ['2024-01-05', '2024-01-15', '2024-01-19', '2024-01-26']
+
+
+def test_month_end_uses_last_trading_day():
+    days = pd.bdate_range('2024-01-01', '2024-03-29').drop(pd.to_datetime(['2024-02-28', '2024-02-29']))
+    pre, inc = run_both('month_end', bt_times(days))
+    assert pre == ['2024-01-31', '2024-02-27', '2024-03-29']
+    # 没有后续日历时，缺了月末两天的二月在三月第一个交易日补调
+    assert inc == ['2024-01-31', '2024-03-01', '2024-03-29']
+
+
+def test_timezone_day_boundary():
+    # 上海时间的日线在 UTC 是前一天 16:00
+    local = pd.bdate_range('2024-01-01', periods=10, tz='Asia/Shanghai')
+    times = bt_times(local.tz_convert('UTC').tz_localize(None))
+    assert (day_numbers(times, 'Asia/Shanghai') == day_numbers(bt_times(local.tz_localize(None)))).all()
+    pre, inc = run_both('weekly', times, weekday=0, tz='Asia/Shanghai')
+    # 结果按 UTC 打印，周一的 K 线在 UTC 是周日
+    assert pre == inc == ['2023-12-31', '2024-01-07']
+
+
+class Recorder(bt.Strategy):
+    params = (('rule', 'days'), ('period', 3))
+
+    def __init__(self):
+        self.scheduler = RebalanceScheduler(self.p.rule, self.p.period)
+        self.scheduler.build_from_datas(self.datas)
+        self.dates = []
+
+    def prenext(self):
+        self.scheduler.advance(self.datetime[0])
+
+    def next(self):
+        if self.scheduler.advance(self.datetime[0]):
+            self.dates.append(self.datetime.date(0).isoformat())
+
+
+def test_union_calendar_when_first_data_is_shorter():
+    index = pd.bdate_range('2024-01-01', periods=15)
+    frame = pd.DataFrame({'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 0.0}, index=index)
+    results = []
+    for preload in (True, False):
+        cerebro = bt.Cerebro(stdstats=False, preload=preload, runonce=preload)
+        cerebro.adddata(bt.feeds.PandasData(dataname=frame.iloc[5:]), name='short')
+        cerebro.adddata(bt.feeds.PandasData(dataname=frame), name='long')
+        cerebro.addstrategy(Recorder)
+        strat = cerebro.run()[0]
+        assert strat.scheduler.precomputed == preload
+        results.append(strat.dates)
+    # 日历从较长的 long 开始计数，而不是 self.data（short）
+    assert results[0] == results[1] == ['2024-01-09', '2024-01-12', '2024-01-17']
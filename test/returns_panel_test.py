@@ -0,0 +1,26 @@
+import numpy as np
+from analysis.returns_panel import ReturnsPanel
+
+
+def test_window_returns_are_ordered_per_symbol():
+    panel = ReturnsPanel(size=3, window=4)
+    for t in range(6):
+        # 标的 2 只在偶数 K 线上有数据
+        idx = np.array([0, 1, 2]) if t % 2 == 0 else np.array([0, 1])
+        panel.update(idx, closes=np.full(idx.size, 10.0 + t), returns=np.full(idx.size, float(t)))
+
+    np.testing.assert_array_equal(panel.window_returns(np.array([0]))[0], [2.0, 3.0, 4.0, 5.0])
+    assert panel.counts().tolist() == [6, 6, 3]
+    assert panel.valid().tolist() == [True, True, False]
+    np.testing.assert_allclose(panel.total_return(np.array([0, 1])), [(15.0 / 12.0 - 1) * 100] * 2)
+    assert np.isnan(panel.total_return(np.array([2]))[0])
+    np.testing.assert_array_equal(panel.latest_returns(), [5.0, 5.0, 4.0])
+
+
+def test_nan_in_window_invalidates_symbol():
+    panel = ReturnsPanel(size=2, window=2)
+    panel.update(np.array([0, 1]), np.array([1.0, 1.0]), np.array([np.nan, 0.1]))
+    panel.update(np.array([0, 1]), np.array([1.0, 1.0]), np.array([0.2, 0.1]))
+    assert panel.valid().tolist() == [False, True]
+    panel.update(np.array([0]), np.array([1.0]), np.array([0.3]))
+    assert panel.valid().tolist() == [True, True]
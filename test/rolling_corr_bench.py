@@ -0,0 +1,38 @@
+"""
+增量滚动相关与每次 np.corrcoef 重算的耗时对比
+
+    python test/rolling_corr_bench.py
+"""
+import time
+
+import numpy as np
+from analysis.rolling_corr import RollingCorrelation
+
+
+def bench(n, window=60, steps=20, dtype=np.float64):
+    rng = np.random.default_rng(0)
+    data = rng.normal(0, 1, (window + steps, n)).astype(dtype)
+    engine = RollingCorrelation(n, window, dtype=dtype, recompute_every=10**9)
+    for column in data[:window]:
+        engine.update(column)
+
+    t0 = time.perf_counter()
+    for column in data[window:]:
+        engine.update(column)
+    update = (time.perf_counter() - t0) / steps
+
+    t0 = time.perf_counter()
+    engine.corr()
+    corr = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    np.corrcoef(data[-window:].T)
+    corrcoef = time.perf_counter() - t0
+    print(f"n={n:5d} {np.dtype(dtype).name}: update {update * 1000:8.1f} ms/bar, "
+          f"corr {corr * 1000:8.1f} ms, np.corrcoef {corrcoef * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    for n in (500, 2000, 5000):
+        bench(n)
+        bench(n, dtype=np.float32)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from analysis.rolling_corr import RollingCorrelation
+from feeddata.fund_feeddata import FundIndicatorData
+from indicator import panel_indicators
+from test.helpers import random_frames, run_relative
+
+
+def feed(engine, data):
+    for column in data:
+        engine.update(column)
+
+
+def test_parity_with_corrcoef_float64():
+    rng = np.random.default_rng(1)
+    window, n = 20, 37
+    data = rng.normal(0, 1, (3 * window + 7, n)) + rng.normal(0, 1, (3 * window + 7, 1))
+    engine = RollingCorrelation(n, window, block_size=8, recompute_every=1000)
+    feed(engine, data)
+    expected = np.corrcoef(data[-window:].T)
+    np.testing.assert_allclose(engine.corr(), expected, atol=1e-10)
+    idx = np.array([3, 0, 20])
+    np.testing.assert_allclose(engine.corr(idx), expected[np.ix_(idx, idx)], atol=1e-10)
+
+
+def test_parity_with_corrcoef_float32_and_recompute():
+    rng = np.random.default_rng(2)
+    window, n = 30, 16
+    data = rng.normal(0, 2, (5 * window, n))
+    engine = RollingCorrelation(n, window, dtype=np.float32, block_size=5, recompute_every=window)
+    feed(engine, data)
+    np.testing.assert_allclose(engine.corr(), np.corrcoef(data[-window:].T), atol=1e-4)
+
+
+def test_missing_values_and_threshold():
+    rng = np.random.default_rng(3)
+    window, n = 10, 4
+    base = rng.normal(0, 1, (2 * window, 1))
+    data = np.hstack([base, base * 2 + 0.01 * rng.normal(0, 1, (2 * window, 1)), rng.normal(0, 1, (2 * window, 2))])
+    data[window + 3, 3] = np.nan
+    engine = RollingCorrelation(n, window)
+    feed(engine, data)
+    assert engine.valid().tolist() == [True, True, True, False]
+    adj = engine.threshold(np.array([0, 1, 2]), 0.8)
+    assert adj[0, 1] and adj[1, 0]
+    assert not adj.diagonal().any()
+    expected = np.corrcoef(data[-window:, :3].T) > 0.8
+    np.fill_diagonal(expected, False)
+    np.testing.assert_array_equal(adj, expected)
+
+
+def test_strategy_engine_is_opt_in():
+    frames = panel_indicators.add_indicator_columns(random_frames(n=8, length=120), {'atr': 10})
+
+    def run(**params):
+        feeds = {name: FundIndicatorData(dataname=frame) for name, frame in frames.items()}
+        return run_relative(feeds, **params)
+
+    value, strat = run()
+    # 默认只在调仓时对候选计算 np.corrcoef，不维护 n×n 矩阵
+    assert strat.corr_engine is None
+    rolling_value, rolling = run(rolling_corr=True)
+    assert isinstance(rolling.corr_engine, RollingCorrelation)
+    assert rolling_value == pytest.approx(value)
+    assert value != 1000000.0
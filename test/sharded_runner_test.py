@@ -0,0 +1,50 @@
+import backtrader as bt
+from commission.fund_commission import FundCommission
+from feeddata.fund_feeddata import FundPandasData
+from feeddata.shared_panel import SharedPanel
+from runner import sharded_runner
+from strategy.simple_ma_strategy import SimpleMovingAverageStrategy
+from test.helpers import random_frames
+
+PARAMS = {'short_period': 5, 'long_period': 20}
+
+
+def direct_value(frame):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(FundPandasData(dataname=frame))
+    cerebro.addstrategy(SimpleMovingAverageStrategy, printlog=False, **PARAMS)
+    cerebro.broker.setcash(100000.0)
+    cerebro.broker.set_checksubmit(True)
+    cerebro.broker.set_shortcash(False)
+    cerebro.broker.addcommissioninfo(FundCommission())
+    cerebro.run()
+    return cerebro.broker.getvalue()
+
+
+def test_longest_first():
+    with SharedPanel.create(random_frames(n=6, late_every=3)) as panel:
+        # s1、s4 历史较短，排在最后
+        assert sharded_runner.longest_first(panel) == ['s0', 's2', 's3', 's5', 's1', 's4']
+
+
+def test_parallel_matches_serial_and_single_runs():
+    frames = random_frames()
+    with SharedPanel.create(frames) as panel:
+        serial = sharded_runner.run_shards(panel, params=PARAMS, workers=1)
+        parallel = sharded_runner.run_shards(panel, params=PARAMS, workers=3)
+
+    assert list(serial['symbol']) == list(frames)
+    columns = [c for c in sharded_runner.COLUMNS if c != 'elapsed']
+    assert serial[columns].equals(parallel[columns])
+    assert list(serial['bars']) == [len(f) for f in frames.values()]
+    assert serial['trades'].sum() > 0
+    for symbol, value in zip(serial['symbol'], serial['final_value']):
+        assert value == direct_value(frames[symbol])
+
+
+def test_failed_symbol_is_skipped():
+    frames = random_frames(n=3)
+    with SharedPanel.create(frames) as panel:
+        # 不存在的策略参数让每个标的都失败
+        table = sharded_runner.run_shards(panel, params={'bad_param': 1}, workers=1)
+    assert table.empty and list(table.columns) == list(sharded_runner.COLUMNS)
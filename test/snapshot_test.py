@@ -0,0 +1,113 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from broker import snapshot
+from broker.sim_broker import SimBroker
+from commission.fund_commission import FundCommission
+from feeddata.fund_feeddata import FundPandasData
+
+
+class CountingStrategy(bt.Strategy):
+    """每 3 根 K 线挂一个低于收盘价的限价买单（跨越快照仍未成交），持仓超过 4 根 K 线后市价卖出。"""
+
+    def __init__(self):
+        self.bars = 0
+        self.held = {}
+
+    def next(self):
+        self.bars += 1
+        for data in self.datas:
+            name = data._name
+            if self.getposition(data).size:
+                self.held[name] = self.held.get(name, 0) + 1
+                if self.held[name] >= 4:
+                    self.close(data=data)
+                    self.held[name] = 0
+            elif self.bars % 3 == 0:
+                self.buy(data=data, size=100, exectype=bt.Order.Limit, price=data.close[0] * 0.995,
+                         valid=data.datetime.datetime(0) + pd.Timedelta(days=5))
+
+    def get_state(self):
+        return {'bars': self.bars, 'held': self.held}
+
+    def set_state(self, state):
+        self.bars = state['bars']
+        self.held = state['held']
+
+
+def frames(length=60, seed=0):
+    rng = np.random.default_rng(seed)
+    result = {}
+    for i in range(3):
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+        result[f's{i}'] = pd.DataFrame({
+            'open': close * (1 + rng.normal(0, 0.003, length)), 'high': close * 1.01, 'low': close * 0.99,
+            'close': close, 'volume': 1000.0, 'pct_chg': 0.0,
+        }, index=pd.bdate_range('2024-01-01', periods=length))
+    return result
+
+
+def run(data_frames, path=None, broker=None):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker = broker or SimBroker()
+    for name, frame in data_frames.items():
+        cerebro.adddata(FundPandasData(dataname=frame), name=name)
+    cerebro.addstrategy(CountingStrategy)
+    cerebro.broker.setcash(100000.0)
+    cerebro.broker.set_checksubmit(True)
+    cerebro.broker.addcommissioninfo(FundCommission())
+    if path:
+        cerebro.addanalyzer(snapshot.LiveSnapshot, path=path)
+    strat = cerebro.run()[0]
+    positions = {d._name: cerebro.broker.getposition(d).size for d in cerebro.datas}
+    return cerebro.broker.getvalue(), cerebro.broker.getcash(), positions, strat
+
+
+def test_restart_from_snapshot_matches_uninterrupted_run(tmp_path):
+    full = frames()
+    expected_value, expected_cash, expected_positions, expected = run(full)
+
+    for split in (20, 31, 44):
+        path = str(tmp_path / f'snapshot_{split}.json')
+        # 第一段运行到 split，重启后只回放之后的 K 线
+        run({n: f.iloc[:split] for n, f in full.items()}, path)
+        state = snapshot.load_snapshot(path)
+        last = pd.Timestamp(snapshot.feed_resume(state, 's0')).tz_localize(None)
+        assert last == full['s0'].index[split - 1]
+        rest = {n: f[f.index > last] for n, f in full.items()}
+        value, cash, positions, strat = run(rest, path)
+
+        assert value == expected_value
+        assert cash == expected_cash
+        assert positions == expected_positions
+        assert strat.bars == expected.bars
+        assert strat.analyzers.livesnapshot.get_analysis()['restored']
+
+
+def test_snapshot_contents(tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    run({n: f.iloc[:9] for n, f in frames().items()}, path)
+    state = snapshot.load_snapshot(path)
+    assert state['strategy']['bars'] == 9
+    orders = state['broker']['orders']
+    # 第 9 根 K 线挂出的限价单还在 submitted 中
+    assert len(orders) >= 1 and all(o['exectype'] == 'Limit' and o['side'] == 'buy' for o in orders)
+    assert not (tmp_path / 'snapshot.json.tmp').exists()
+    assert snapshot.load_snapshot(str(tmp_path / 'missing.json')) is None
+
+
+def test_plain_broker_resubmits_after_first_bar(tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    full = frames()
+    run({n: f.iloc[:9] for n, f in full.items()}, path)
+    orders = snapshot.load_snapshot(path)['broker']['orders']
+    assert orders
+    last = full['s0'].index[8]
+    # BackBroker 没有 call_before_next，恢复的订单在第一根 K 线的策略逻辑之后提交
+    rest = {n: f[f.index > last] for n, f in full.items()}
+    _, _, _, strat = run(rest, path, broker=bt.brokers.BackBroker())
+    restored = [o for o in strat.broker.orders if o.created.dt in {s['created'] for s in orders}]
+    assert len(restored) == len(orders)
+    # 第一根 K 线上不会成交
+    first = bt.date2num(rest['s0'].index[0])
+    assert all(not o.executed.size or o.executed.dt > first for o in restored)
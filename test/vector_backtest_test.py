@@ -0,0 +1,77 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+from analysis import vector_backtest
+from commission.fund_commission import FundCommission
+from feeddata.fund_feeddata import FundPandasData
+from strategy.simple_ma_strategy import SimpleMovingAverageStrategy
+
+
+def random_frame(seed, length=400, drift=0.0):
+    rng = np.random.default_rng(seed)
+    close = 5 * np.exp(np.cumsum(rng.normal(drift, 0.015, length)))
+    open_ = close * (1 + rng.normal(0, 0.01, length))
+    return pd.DataFrame({
+        'open': open_, 'high': np.maximum(open_, close) * 1.005, 'low': np.minimum(open_, close) * 0.995,
+        'close': close, 'volume': 1000.0, 'pct_chg': 0.0,
+    }, index=pd.bdate_range('2022-01-03', periods=length))
+
+
+def run_cerebro(frame, short_period, long_period, cash, commission=None):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(FundPandasData(dataname=frame))
+    cerebro.addstrategy(SimpleMovingAverageStrategy, short_period=short_period, long_period=long_period,
+                        printlog=False)
+    cerebro.addobserver(bt.observers.Broker)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.addcommissioninfo(commission or FundCommission())
+    strat = cerebro.run()[0]
+    # observer 的缓冲区在 runonce 下会预留多余长度
+    return np.asarray(strat.observers[0].lines.value.array)[:len(frame)], cerebro.broker.getvalue()
+
+
+@pytest.mark.parametrize('seed,short_period,long_period,cash', [
+    (0, 5, 20, 100000.0),
+    (1, 10, 30, 100000.0),
+    (2, 3, 8, 2000.0),     # 资金少，最低佣金占比高
+    (3, 10, 60, 50.0),     # 只能买几份，部分信号因数量为 0 不下单
+])
+def test_parity_with_cerebro(seed, short_period, long_period, cash):
+    frame = random_frame(seed)
+    expected_value, expected_final = run_cerebro(frame, short_period, long_period, cash)
+    signals = vector_backtest.sma_cross_signals(frame['close'].to_numpy(), short_period, long_period)
+    result = vector_backtest.run_long_only(frame['open'].to_numpy(), frame['close'].to_numpy(), signals, cash=cash)
+    assert result['trades'][0] > 0
+    np.testing.assert_allclose(result['value'][0], expected_value, rtol=1e-10)
+    assert result['final_value'][0] == pytest.approx(expected_final, rel=1e-10)
+
+
+def test_margin_rejection_matches_cerebro():
+    # 开盘跳空高开，按收盘价计算的数量在开盘价成交时现金不足，被拒单
+    frame = random_frame(4, length=200)
+    signals = vector_backtest.sma_cross_signals(frame['close'].to_numpy(), 5, 20)
+    buys = np.flatnonzero(signals[:-1] > 0)
+    frame.iloc[buys[0] + 1, frame.columns.get_loc('open')] *= 1.05
+    frame['high'] = frame[['open', 'high']].max(axis=1)
+    expected_value, _ = run_cerebro(frame, 5, 20, 100000.0)
+    result = vector_backtest.run_long_only(frame['open'].to_numpy(), frame['close'].to_numpy(), signals,
+                                           cash=100000.0)
+    assert result['position'][0, buys[0] + 1] == 0
+    np.testing.assert_allclose(result['value'][0], expected_value, rtol=1e-10)
+
+
+def test_crossover_matches_backtrader_with_ties():
+    fast = np.array([1, 2, 2, 2, 3, 1, 1, 2, 0, 0, 1], dtype=float)
+    slow = np.full(fast.shape, 2.0)
+    # 从下方经过相等再到上方算上穿，从上方回到相等不算
+    assert vector_backtest.crossover(fast, slow).tolist() == [0, 0, 0, 0, 1, -1, 0, 0, 0, 0, 0]
+
+
+def test_screen_sma_panel_matches_single_series():
+    frames = {f's{i}': random_frame(10 + i, length=300 - 40 * i) for i in range(4)}
+    table = vector_backtest.screen_sma(frames, short_periods=[5, 10], long_periods=[20, 30], cash=100000.0)
+    assert len(table) == 4 * 4
+    for _, row in table.sample(5, random_state=0).iterrows():
+        _, final = run_cerebro(frames[row['symbol']], row['short_period'], row['long_period'], 100000.0)
+        assert row['final_value'] == pytest.approx(final, rel=1e-10)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from runner import optimize_runner, walkforward_runner
+from test.helpers import random_frames
+
+GRID = {'rebalance_period': [5, 10], 'vol_threshold': [5.0], 'correlation_period': [20], 'num_top': [2]}
+
+
+def test_make_folds():
+    calendar = pd.bdate_range('2024-01-01', periods=100)
+    folds = walkforward_runner.make_folds(calendar, train_bars=50, test_bars=20)
+    assert [f['test'] for f in folds] == [(50, 69), (70, 89)]
+    assert [f['train'] for f in folds] == [(0, 49), (20, 69)]
+
+
+def test_walk_forward_parallel_matches_serial():
+    frames = optimize_runner.add_atr_columns(random_frames(n=8), GRID['rebalance_period'])
+    with optimize_runner.create_panel(frames, GRID['rebalance_period']) as panel:
+        serial = walkforward_runner.walk_forward(panel, GRID, train_bars=80, test_bars=40, workers=1)
+        parallel = walkforward_runner.walk_forward(panel, GRID, train_bars=80, test_bars=40, workers=2)
+        calendar = panel.calendar().tz_localize(None)
+
+    folds = serial['folds']
+    assert len(folds) == 3
+    pd.testing.assert_series_equal(serial['returns'], parallel['returns'])
+    assert folds['params'].tolist() == parallel['folds']['params'].tolist()
+
+    # 拼接后的样本外收益恰好覆盖每个测试窗口的交易日
+    expected = calendar[80:200]
+    assert serial['returns'].index.normalize().equals(expected)
+    for _, row in folds.iterrows():
+        window = serial['returns'][row['test_start']:row['test_end'] + pd.Timedelta(days=1)]
+        assert np.isclose(row['test_return'], (1 + window).prod() - 1)
+    assert np.isclose(serial['equity'].iloc[-1], 1000000.0 * (1 + serial['returns']).prod())
+
+
+def test_train_windows_include_warmup(monkeypatch):
+    frames = optimize_runner.add_atr_columns(random_frames(n=8), GRID['rebalance_period'])
+    run_backtest = optimize_runner.run_backtest
+    windows = []
+
+    def record(panel, params, cash, fromdate, todate, timereturn=False):
+        windows.append((timereturn, params['rebalance_period'], fromdate))
+        return run_backtest(panel, params, cash, fromdate, todate, timereturn)
+
+    monkeypatch.setattr(optimize_runner, 'run_backtest', record)
+    with optimize_runner.create_panel(frames, GRID['rebalance_period']) as panel:
+        walkforward_runner.walk_forward(panel, GRID, train_bars=80, test_bars=40, workers=1)
+        calendar = panel.calendar().tz_localize(None)
+
+    edge = walkforward_runner._EDGE
+    train = [(period, fromdate) for timereturn, period, fromdate in windows if not timereturn]
+    # 第二折训练窗口从 40 开始，向前预热 correlation_period + rebalance_period + 1 根
+    assert train[2:4] == [(5, calendar[40 - 26] - edge), (10, calendar[40 - 31] - edge)]
+    assert train[0] == (5, calendar[0] - edge)
+
+
+def test_failed_backtests_are_reported_not_raised():
+    frames = optimize_runner.add_atr_columns(random_frames(n=8), GRID['rebalance_period'])
+    bad = dict(GRID, rebalance_rule=['days', 'bogus'])
+    with optimize_runner.create_panel(frames, GRID['rebalance_period']) as panel:
+        good = walkforward_runner.walk_forward(panel, GRID, train_bars=80, test_bars=40, workers=1)
+        mixed = walkforward_runner.walk_forward(panel, bad, train_bars=80, test_bars=40, workers=1)
+        failed = walkforward_runner.walk_forward(panel, dict(GRID, rebalance_rule=['bogus']),
+                                                 train_bars=80, test_bars=40, workers=1)
+
+    # 失败的参数组合被跳过，其余结果不受影响
+    pd.testing.assert_series_equal(mixed['returns'], good['returns'])
+    assert mixed['folds']['error'].isna().all()
+    # 参数全部失败的折只记录错误
+    table = failed['folds']
+    assert len(table) == 3 and table['error'].notna().all() and table['params'].isna().all()
+    assert failed['returns'].empty and failed['equity'].empty